@@ -1,3 +1,6 @@
+import time
+_app_start = time.perf_counter()
+
 import streamlit as st
 
 st.set_page_config(
@@ -7,33 +10,23 @@ st.set_page_config(
     initial_sidebar_state="expanded",
 )
 
-from home_page import home_page
-from web_scraping_page import web_scraping_page
-from pdf_table_extraction_page import pdf_table_extraction_page
-from data_visualization_page import data_visualization_page
-from pdf_question_answering_page import pdf_question_answering_page
-from about_page import about_page
+from page_registry import get_page_registry
+
+# Pages are imported on first selection, so opening Home does not load
+# transformers, selenium, camelot, etc.
+registry = get_page_registry()
 
 # Sidebar navigation using a selectbox.
 st.sidebar.title("Navigation")
 page = st.sidebar.selectbox(
     "Select Page",
-    ("Home", "Web Scraping", "PDF Table Extraction", "Data Visualization", 
-     "PDF Question-Answering", "Documentation"),
+    registry.names(),
     index=0
 )
 
 # Render the selected page.
+registry.render(page)
+registry.record_cold_start(time.perf_counter() - _app_start)
 
-if page == "Home":
-    home_page()
-elif page == "Web Scraping":
-    web_scraping_page()
-elif page == "PDF Table Extraction":
-    pdf_table_extraction_page()
-elif page == "Data Visualization":
-    data_visualization_page()
-elif page == "PDF Question-Answering":
-    pdf_question_answering_page()
-elif page == "Documentation":
-    about_page()
+with st.sidebar.expander("⏱️ Load Timings"):
+    st.json(registry.timings())
@@ -0,0 +1,80 @@
+import importlib
+import logging
+import threading
+import time
+
+# Navigation label -> (module, render function). Modules are imported on first selection.
+PAGES = {
+    "Home": ("home_page", "home_page"),
+    "Web Scraping": ("web_scraping_page", "web_scraping_page"),
+    "PDF Table Extraction": ("pdf_table_extraction_page", "pdf_table_extraction_page"),
+    "Data Visualization": ("data_visualization_page", "data_visualization_page"),
+    "PDF Question-Answering": ("pdf_question_answering_page", "pdf_question_answering_page"),
+    "Documentation": ("about_page", "about_page"),
+}
+
+
+class PageRegistry:
+    """
+    Imports a page module (and with it the page's heavy dependencies) only
+    when the page is first selected, caches the render function, and records
+    cold-start, import and first-render timings.
+    """
+
+    def __init__(self, pages=PAGES):
+        self.pages = dict(pages)
+        self._renderers = {}
+        self._lock = threading.Lock()
+        self.cold_start = None
+        self.import_seconds = {}
+        self.first_render_seconds = {}
+
+    def names(self):
+        return list(self.pages)
+
+    def load(self, name):
+        """Returns the page's render function, importing its module the first time."""
+        renderer = self._renderers.get(name)
+        if renderer is not None:
+            return renderer
+        with self._lock:
+            if name not in self._renderers:
+                module_name, function_name = self.pages[name]
+                start = time.perf_counter()
+                module = importlib.import_module(module_name)
+                self.import_seconds[name] = time.perf_counter() - start
+                logging.info(f"Imported page '{name}' ({module_name}) in {self.import_seconds[name]:.2f}s")
+                self._renderers[name] = getattr(module, function_name)
+            return self._renderers[name]
+
+    def render(self, name):
+        """Renders a page, timing its first render (including the import)."""
+        first = name not in self.first_render_seconds
+        start = time.perf_counter()
+        self.load(name)()
+        if first:
+            self.first_render_seconds[name] = time.perf_counter() - start
+            logging.info(f"First render of page '{name}' took {self.first_render_seconds[name]:.2f}s")
+
+    def record_cold_start(self, seconds):
+        """Records how long the first app run took; later calls are ignored."""
+        if self.cold_start is None:
+            self.cold_start = seconds
+            logging.info(f"App cold start took {seconds:.2f}s")
+
+    def timings(self):
+        return {
+            "cold_start_seconds": self.cold_start,
+            "import_seconds": dict(self.import_seconds),
+            "first_render_seconds": dict(self.first_render_seconds),
+            "loaded_pages": list(self._renderers),
+        }
+
+
+# The module stays in sys.modules across Streamlit reruns, so the registry
+# (and the imported pages) live for the whole server process.
+_registry = PageRegistry()
+
+
+def get_page_registry():
+    return _registry
@@ -8,6 +8,7 @@ from sentence_transformers import SentenceTransformer
 from sklearn.metrics.pairwise import cosine_similarity
 import tempfile
 import logging
+from scraper.artifacts import get_artifact_store
 import nltk
 from typing import List, Optional
 
@@ -161,10 +162,9 @@ def pdf_question_answering_page():
     # --------------------------
     # Vector Store and Embeddings
     # --------------------------
-    def store_embeddings(chunks: List[str], file_name: str, embedding_model: SentenceTransformer) -> None:
-        for i, chunk in enumerate(chunks):
+    def store_embeddings(chunks: List[str], file_name: str, embeddings: List[Optional[List[float]]]) -> None:
+        for i, (chunk, embedding) in enumerate(zip(chunks, embeddings)):
             chunk_id = f"{file_name}_chunk_{i}"
-            embedding = get_embeddings(chunk, embedding_model) # embedding model is used
             if embedding is not None: # Only store valid embeddings
                 st.session_state['vector_store'][chunk_id] = embedding
                 st.session_state['document_chunks'][chunk_id] = chunk
@@ -304,45 +304,49 @@ def pdf_question_answering_page():
     # Processing files
     st.markdown("### 📄 Processing Files")
     if uploaded_files:
+        # Uploads are kept in the shared artifact store, where the text and chunk embeddings
+        # of each PDF are recorded so the same file is not parsed and embedded again.
+        store = get_artifact_store()
+        if store is None:
+            st.error("The document store is disabled.")
+            return
         for uploaded_file in uploaded_files:
             with st.spinner(f"Processing {uploaded_file.name}..."):
                 try:
-                    with tempfile.NamedTemporaryFile(delete=False,
-                                                      suffix=os.path.splitext(uploaded_file.name)[1]) as temp_file:
-                        temp_file.write(uploaded_file.getbuffer())
-                        temp_file_path = temp_file.name
+                    artifact = store.put_bytes(uploaded_file.getbuffer(), uploaded_file.name)
 
-                    try:
-                        with open(temp_file_path, "rb") as f:
-                            full_text = load_document(f, uploaded_file.name)
-                            if full_text is None:
-                                continue
-                            st.success(f"File: {uploaded_file.name} extracted successfully!")
-
-                            # Use the selected chunking strategy
-                            selected_strategy_func = chunking_strategies[selected_chunking_strategy]
-
-                            if selected_chunking_strategy == "Fixed Size with Overlap":
-                                chunks = selected_strategy_func(full_text, chunk_size, overlap)
-                            elif selected_chunking_strategy == "Fixed Size without Overlap":
-                                chunks = selected_strategy_func(full_text, chunk_size)
-                            else:
-                                chunks = selected_strategy_func(full_text)
-
-                            with st.spinner("Generating embeddings..."):
-                                store_embeddings(chunks, uploaded_file.name, embedding_model) #add the embedding_model
-                    except Exception as e:
-                        st.error(f"Error processing file {uploaded_file.name}: {e}")
-                        logging.error(f"Error processing file {uploaded_file.name}: {e}", exc_info=True)
-                    finally:
-                        try:
-                            if os.path.exists(temp_file_path):
-                                os.remove(temp_file_path)
-                        except Exception as e:
-                            logging.error(f"Error removing file {temp_file_path}: {e}", exc_info=True)
+                    def read_text():
+                        with open(artifact.path, "rb") as f:
+                            # Failed extractions come back as None and are not recorded.
+                            return load_document(f, uploaded_file.name)
+
+                    full_text = store.memoize(artifact.sha256, "text:pypdf2", read_text)
+                    if full_text is None:
+                        continue
+                    st.success(f"File: {uploaded_file.name} extracted successfully!")
+
+                    # Use the selected chunking strategy
+                    selected_strategy_func = chunking_strategies[selected_chunking_strategy]
+
+                    if selected_chunking_strategy == "Fixed Size with Overlap":
+                        chunks = selected_strategy_func(full_text, chunk_size, overlap)
+                    elif selected_chunking_strategy == "Fixed Size without Overlap":
+                        chunks = selected_strategy_func(full_text, chunk_size)
+                    else:
+                        chunks = selected_strategy_func(full_text)
+
+                    with st.spinner("Generating embeddings..."):
+                        embeddings_key = f"embeddings:{selected_embedding_model_name}|{selected_chunking_strategy}|{chunk_size}|{overlap}"
+                        embeddings = store.load_result(artifact.sha256, embeddings_key)
+                        if embeddings is None:
+                            embeddings = [get_embeddings(chunk, embedding_model) for chunk in chunks]
+                            # Only complete sets are recorded, so failed chunks are retried next time.
+                            if all(embedding is not None for embedding in embeddings):
+                                store.store_result(artifact.sha256, embeddings_key, embeddings)
+                        store_embeddings(chunks, uploaded_file.name, embeddings)
                 except Exception as e:
-                    st.error(f"Error creating temporal file  {uploaded_file.name}: {e}")
-                    logging.error(f"Error creating temporal file {uploaded_file.name}: {e}", exc_info=True)
+                    st.error(f"Error processing file {uploaded_file.name}: {e}")
+                    logging.error(f"Error processing file {uploaded_file.name}: {e}", exc_info=True)
         st.markdown("---")
     else:
         st.info("Please upload a PDF file to start.")
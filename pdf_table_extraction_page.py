@@ -10,10 +10,32 @@ import base64
 import json
 import io  # <--- Added this line
 import tabula #<--Added this library
+from scraper.artifacts import get_artifact_store, with_suffix
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
 
+def count_pages(path):
+    with open(path, 'rb') as f:
+        return len(PdfReader(f).pages)
+
+
+def read_tables(path, engine, method, pages):
+    """Extracts the tables of a PDF (e.g. a stored artifact, which has no .pdf extension) as a list of DataFrames."""
+    if engine not in ("Camelot", "Tabula-py"):
+        raise ValueError("Invalid extraction engine selected.")
+    with with_suffix(path, ".pdf") as pdf_path:
+        if engine == "Camelot":
+            return [table.df for table in camelot.read_pdf(pdf_path, pages=pages, flavor=method, strip_text='\n', line_scale=40)]
+        return tabula.read_pdf(
+            pdf_path,
+            pages=pages,
+            lattice=True if method == "lattice" else False,
+            stream=True if method == "stream" else False,
+            multiple_tables=True
+        )
+
+
 def pdf_table_extraction_page():
     st.markdown(
         """
@@ -48,7 +70,29 @@ def pdf_table_extraction_page():
         "Choose PDF files", type=["pdf"], accept_multiple_files=True, help="Select one or more PDF files to upload."
     )
 
-    if uploaded_files:
+    # Uploads and downloads share one content-addressed store: each PDF is kept once, and its
+    # page count and extracted tables are reused whenever the same file comes back.
+    store = get_artifact_store()
+    if store is None:
+        st.error("The document store is disabled.")
+        return
+    stored_pdfs = {a["sha256"]: a for a in store.artifacts() if (a["name"] or "").lower().endswith(".pdf")}
+    selected_stored = st.multiselect(
+        "📚 Or pick PDFs already downloaded",
+        list(stored_pdfs),
+        format_func=lambda sha256: f"{stored_pdfs[sha256]['name']} ({stored_pdfs[sha256]['size'] // 1024} KB)",
+        key="stored_pdfs",
+        help="Files downloaded on the Web Scraping page or uploaded earlier.",
+    )
+    documents = {}
+    for uploaded_file in uploaded_files or []:
+        documents[uploaded_file.name] = store.put_bytes(uploaded_file.getbuffer(), uploaded_file.name)
+    for sha256 in selected_stored:
+        artifact = store.get(sha256)
+        if artifact is not None:
+            documents.setdefault(artifact.name, artifact)
+
+    if documents:
         if 'camelot' not in globals():
             st.error("Camelot library not installed. Please install it using 'pip install camelot-py[cv]'.")
             return
@@ -92,29 +136,20 @@ def pdf_table_extraction_page():
         st.markdown("---")
         # Page Selection for each uploaded file.
         page_selections = {}
-        for uploaded_file in uploaded_files:
-            logging.info(f"Processing file: {uploaded_file.name}")
+        for file_name, artifact in documents.items():
+            logging.info(f"Processing file: {file_name}")
             num_pages = 0
             # Determine the number of pages
             try:
-                with tempfile.NamedTemporaryFile(delete=False, suffix=".pdf") as temp_file:
-                    temp_file.write(uploaded_file.getbuffer())
-                    temp_file_path = temp_file.name
-                with open(temp_file_path, 'rb') as f:
-                    try:
-                        pdf_reader = PdfReader(f)
-                        num_pages = len(pdf_reader.pages)
-                    except errors.PdfReadError as e:
-                        st.error(f"Error reading PDF file {uploaded_file.name}: {e}. Is it encrypted or corrupted?")
-                        logging.error(f"Error reading PDF file {uploaded_file.name}: {e}")
-                        continue
+                num_pages = store.memoize(artifact.sha256, "page_count", lambda: count_pages(artifact.path))
+            except errors.PdfReadError as e:
+                st.error(f"Error reading PDF file {file_name}: {e}. Is it encrypted or corrupted?")
+                logging.error(f"Error reading PDF file {file_name}: {e}")
+                continue
             except Exception as e:
-                st.error(f"Error determining the number of pages in file {uploaded_file.name}: {e}")
-                logging.error(f"Error determining the number of pages in file {uploaded_file.name}: {e}")
+                st.error(f"Error determining the number of pages in file {file_name}: {e}")
+                logging.error(f"Error determining the number of pages in file {file_name}: {e}")
                 continue
-            finally:
-                f.close()
-            os.remove(temp_file_path)
 
             # Page selection options
             st.subheader(f"📄 Page Selection")
@@ -123,7 +158,7 @@ def pdf_table_extraction_page():
                 "Select pages to process:",
                 pages_options,
                 default="all",
-                key=f"{uploaded_file.name}_pages_multiselect",
+                key=f"{file_name}_pages_multiselect",
                 help="Select 'all' to process all pages or select specific pages to extract tables from."
             )
 
@@ -132,7 +167,7 @@ def pdf_table_extraction_page():
             else:
                 pages_str = ",".join(map(str, selected_pages))
 
-            page_selections[uploaded_file.name] = pages_str
+            page_selections[file_name] = pages_str
 
 
         st.markdown("---")
@@ -140,48 +175,19 @@ def pdf_table_extraction_page():
         if st.button("🚀 Extract Tables", help="Click to start the extraction process with the current settings."):
             with st.spinner("🔄 Extracting tables..."):
                 all_tables = []
-                for uploaded_file in uploaded_files:
+                for file_name, artifact in documents.items():
+                    pages = page_selections.get(file_name, "all")
                     try:
-                        with tempfile.NamedTemporaryFile(delete=False, suffix=".pdf") as temp_file:
-                            temp_file.write(uploaded_file.getbuffer())
-                            temp_file_path = temp_file.name
-                        try:
-                            if extraction_engine == "Camelot":
-                                tables = camelot.read_pdf(
-                                    temp_file_path,
-                                    pages=page_selections.get(uploaded_file.name, "all"),
-                                    flavor=extraction_method,
-                                    strip_text='\n',
-                                    line_scale=40
-                                )
-                            elif extraction_engine == "Tabula-py":
-                                tables = tabula.read_pdf(
-                                     temp_file_path,
-                                     pages=page_selections.get(uploaded_file.name, "all"),
-                                     lattice=True if extraction_method == "lattice" else False,
-                                     stream=True if extraction_method == "stream" else False,
-                                     multiple_tables=True
-                                 )
-
-                                
-                            else:
-                                raise ValueError("Invalid extraction engine selected.")
-
-                        except ValueError as e:
-                            st.error(f"Error extracting tables from file {uploaded_file.name}: {e}")
-                            logging.error(f"Error extracting tables from file {uploaded_file.name}: {e}")
-                            continue
-                        except Exception as e:
-                            st.error(f"Error extracting tables from file {uploaded_file.name}: {e}")
-                            logging.error(f"Error extracting tables from file {uploaded_file.name}: {e}")
-                            continue
-                        all_tables.append((uploaded_file.name, tables))
-
+                        tables = store.memoize(
+                            artifact.sha256,
+                            f"tables:{extraction_engine}|{extraction_method}|{pages}",
+                            lambda: read_tables(artifact.path, extraction_engine, extraction_method, pages),
+                        )
                     except Exception as e:
-                        st.error(f"Error processing file {uploaded_file.name}: {e}")
-                        logging.error(f"Error processing file {uploaded_file.name}: {e}")
-                    finally:
-                        os.remove(temp_file_path)
+                        st.error(f"Error extracting tables from file {file_name}: {e}")
+                        logging.error(f"Error extracting tables from file {file_name}: {e}")
+                        continue
+                    all_tables.append((file_name, tables))
 
                 if not all_tables:
                     st.warning("⚠️ No tables found in any of the uploaded PDFs.")
@@ -241,10 +247,9 @@ def pdf_table_extraction_page():
                              st.error(f"Error processing extracted tables {file_name}: {e}")
                              logging.error(f"Error processing extracted tables {file_name}: {e}")
                     
-                    elif tables.n > 0:
+                    elif tables:
                         st.markdown(f"**📄 Tables found in: {file_name}**")
-                        for i, table in enumerate(tables, start=1):
-                            df = table.df
+                        for i, df in enumerate(tables, start=1):
                             if df is None or df.empty:
                                 st.warning(f"⚠️ Empty Table found {i} in {file_name}")
                                 logging.warning(f"Empty table found {i} in {file_name}")
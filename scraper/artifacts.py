@@ -0,0 +1,301 @@
+# scraper/artifacts.py
+import hashlib
+import logging
+import os
+import pickle
+import shutil
+import sqlite3
+import tempfile
+import threading
+import time
+from collections import namedtuple
+from contextlib import contextmanager
+import requests
+from .downloads import download, probe
+from .filters import file_name_of
+from .metrics import incr
+
+DEFAULT_ARTIFACT_DIR = os.path.join(os.getcwd(), ".scraper_artifacts")
+READ_SIZE = 1024 * 1024
+# A stored copy downloaded or revalidated less than this many seconds ago is reused without a HEAD request.
+FRESH_SECONDS = 10 * 60
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS artifacts (
+    sha256 TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    name TEXT,
+    created_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS sources (
+    url TEXT PRIMARY KEY,
+    sha256 TEXT NOT NULL,
+    fetched_at REAL NOT NULL,
+    etag TEXT,
+    last_modified TEXT,
+    size INTEGER
+);
+CREATE TABLE IF NOT EXISTS results (
+    sha256 TEXT NOT NULL,
+    key TEXT NOT NULL,
+    file TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    PRIMARY KEY (sha256, key)
+);
+"""
+
+Artifact = namedtuple("Artifact", ["sha256", "path", "size", "name"])
+
+
+@contextmanager
+def with_suffix(path, suffix):
+    """
+    Yields a path ending in suffix (e.g. ".pdf") with the content of path:
+    path itself if it already ends in it, else a temporary link (or copy)
+    removed afterwards. Stored objects have no extension, and some readers
+    (camelot) refuse files without one.
+    """
+    if path.lower().endswith(suffix.lower()):
+        yield path
+        return
+    with tempfile.TemporaryDirectory() as temp_dir:
+        named_path = os.path.join(temp_dir, os.path.basename(path) + suffix)
+        try:
+            os.symlink(os.path.abspath(path), named_path)
+        except OSError:  # no symlinks here (e.g. Windows without the privilege)
+            shutil.copyfile(path, named_path)
+        yield named_path
+
+
+def _key_digest(key):
+    return hashlib.sha256(key.encode("utf-8")).hexdigest()
+
+
+class ArtifactStore:
+    """
+    Content-addressed store of downloaded and uploaded documents.
+
+    Each distinct file is kept once, at objects/<2 hex digits>/<sha256>,
+    whichever URL or upload it came from. A SQLite index maps URLs to hashes
+    and records results computed from a file (tables, text, embeddings), so
+    later stages reuse them instead of redoing the work.
+    """
+
+    def __init__(self, root=DEFAULT_ARTIFACT_DIR, fresh_seconds=FRESH_SECONDS):
+        self.root = root
+        self.fresh_seconds = fresh_seconds
+        self._lock = threading.Lock()
+        self._fetch_locks = {}
+        for name in ("objects", "results", "tmp"):
+            os.makedirs(os.path.join(root, name), exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript(_SCHEMA)
+
+    def _connect(self):
+        conn = sqlite3.connect(os.path.join(self.root, "index.sqlite3"), timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        return conn
+
+    def path(self, sha256):
+        return os.path.join(self.root, "objects", sha256[:2], sha256)
+
+    def get(self, sha256):
+        """Returns the stored Artifact with this hash, or None."""
+        with self._lock, self._connect() as conn:
+            row = conn.execute("SELECT size, name FROM artifacts WHERE sha256 = ?", (sha256,)).fetchone()
+        if row is None or not os.path.exists(self.path(sha256)):
+            return None
+        return Artifact(sha256, self.path(sha256), row[0], row[1])
+
+    def _add(self, temp_path, sha256, size, name):
+        """Moves a hashed file from tmp/ into objects/ (dropping it if that content is already stored)."""
+        final_path = self.path(sha256)
+        if os.path.exists(final_path):
+            os.remove(temp_path)
+        else:
+            os.makedirs(os.path.dirname(final_path), exist_ok=True)
+            os.replace(temp_path, final_path)
+        with self._lock, self._connect() as conn:
+            conn.execute(
+                "INSERT INTO artifacts (sha256, size, name, created_at) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT (sha256) DO UPDATE SET name = COALESCE(artifacts.name, excluded.name)",
+                (sha256, size, name, time.time()),
+            )
+        return Artifact(sha256, final_path, size, name)
+
+    def put_bytes(self, data, name=None):
+        """Stores bytes (e.g. an uploaded file's getbuffer()) and returns their Artifact."""
+        sha256 = hashlib.sha256(data).hexdigest()
+        existing = self.get(sha256)
+        if existing is not None:
+            incr("artifact_hits")
+            return existing
+        with tempfile.NamedTemporaryFile(dir=os.path.join(self.root, "tmp"), delete=False) as f:
+            f.write(data)
+        return self._add(f.name, sha256, len(data), name)
+
+    def put_file(self, path, name=None):
+        """Copies a file into the store and returns its Artifact."""
+        digest = hashlib.sha256()
+        with tempfile.NamedTemporaryFile(dir=os.path.join(self.root, "tmp"), delete=False) as temp_file, open(path, "rb") as source:
+            for block in iter(lambda: source.read(READ_SIZE), b""):
+                digest.update(block)
+                temp_file.write(block)
+        return self._add(temp_file.name, digest.hexdigest(), os.path.getsize(temp_file.name), name or os.path.basename(path))
+
+    def lookup(self, url):
+        """Returns the Artifact last downloaded from url, or None."""
+        with self._lock, self._connect() as conn:
+            row = conn.execute("SELECT sha256 FROM sources WHERE url = ?", (url,)).fetchone()
+        return self.get(row[0]) if row else None
+
+    def _source(self, url):
+        """Returns the (etag, last_modified, size, fetched_at) recorded for url, or None."""
+        with self._lock, self._connect() as conn:
+            return conn.execute("SELECT etag, last_modified, size, fetched_at FROM sources WHERE url = ?", (url,)).fetchone()
+
+    def fetch(self, url, name=None, sha256=None, refresh=False):
+        """
+        Returns the Artifact for url, downloading it (see downloads.download)
+        only if it was never stored, it changed, or with refresh. A stored
+        copy is revalidated with a HEAD request first: it is reused when the
+        ETag, Last-Modified and Content-Length are those recorded at download
+        time (or when it matches the requested sha256). Within fresh_seconds
+        of the last download or revalidation it is reused without asking. If
+        the server cannot be reached, the stored copy is returned. Identical
+        content from different URLs is stored once.
+        """
+        with self._lock:
+            fetch_lock = self._fetch_locks.setdefault(url, threading.Lock())
+        # One download per URL at a time; a second caller gets the stored copy.
+        with fetch_lock:
+            artifact = None if refresh else self.lookup(url)
+            if artifact is not None and sha256 is not None and artifact.sha256 == sha256.lower():
+                incr("artifact_hits")
+                return artifact
+            source = self._source(url) if artifact is not None and sha256 is None else None
+            if source is not None and time.time() - source[3] < self.fresh_seconds:
+                incr("artifact_hits")
+                return artifact
+            remote = probe(url)
+            validators = (remote.etag, remote.last_modified, remote.size)
+            if source is not None and any(value is not None for value in validators) and validators == tuple(source[:3]):
+                with self._lock, self._connect() as conn:
+                    conn.execute("UPDATE sources SET fetched_at = ? WHERE url = ?", (time.time(), url))
+                incr("artifact_hits")
+                return artifact
+            # Named after the URL, so an interrupted download is resumed by the next fetch.
+            temp_path = os.path.join(self.root, "tmp", _key_digest(url))
+            try:
+                result = download(url, temp_path, sha256=sha256, remote=remote)
+            except requests.exceptions.RequestException as e:
+                if artifact is None or sha256 is not None:
+                    raise
+                logging.warning(f"Could not revalidate {url} ({e}); using the stored copy")
+                incr("artifact_hits")
+                return artifact
+            artifact = self._add(temp_path, result.sha256, result.size, name or file_name_of(url))
+            with self._lock, self._connect() as conn:
+                conn.execute(
+                    "INSERT INTO sources (url, sha256, fetched_at, etag, last_modified, size) VALUES (?, ?, ?, ?, ?, ?) "
+                    "ON CONFLICT (url) DO UPDATE SET sha256 = excluded.sha256, fetched_at = excluded.fetched_at, "
+                    "etag = excluded.etag, last_modified = excluded.last_modified, size = excluded.size",
+                    (url, artifact.sha256, time.time(), *validators),
+                )
+            incr("artifact_downloads")
+            return artifact
+
+    def artifacts(self):
+        """Returns every stored document (sha256, size, name, created_at, urls), newest first."""
+        with self._lock, self._connect() as conn:
+            rows = conn.execute("SELECT sha256, size, name, created_at FROM artifacts ORDER BY created_at DESC").fetchall()
+            sources = conn.execute("SELECT sha256, url FROM sources").fetchall()
+        urls = {}
+        for sha256, url in sources:
+            urls.setdefault(sha256, []).append(url)
+        return [
+            {"sha256": sha256, "size": size, "name": name, "created_at": created_at, "urls": urls.get(sha256, [])}
+            for sha256, size, name, created_at in rows
+        ]
+
+    def load_result(self, sha256, key):
+        """Returns a result previously stored for a document under key, or None."""
+        with self._lock, self._connect() as conn:
+            row = conn.execute("SELECT file FROM results WHERE sha256 = ? AND key = ?", (sha256, key)).fetchone()
+        if row is None:
+            incr("artifact_result_misses")
+            return None
+        try:
+            with open(os.path.join(self.root, "results", row[0]), "rb") as f:
+                result = pickle.load(f)
+        except Exception as e:
+            logging.warning(f"Discarding unreadable result {key} of {sha256}: {e}")
+            incr("artifact_result_misses")
+            return None
+        incr("artifact_result_hits")
+        return result
+
+    def store_result(self, sha256, key, result):
+        """Records a result computed from a document (anything picklable)."""
+        name = os.path.join(sha256[:2], f"{sha256}-{_key_digest(key)}.pkl")
+        path = os.path.join(self.root, "results", name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(f"{path}.tmp", "wb") as f:
+            pickle.dump(result, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(f"{path}.tmp", path)
+        with self._lock, self._connect() as conn:
+            conn.execute(
+                "INSERT INTO results (sha256, key, file, created_at) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT (sha256, key) DO UPDATE SET file = excluded.file, created_at = excluded.created_at",
+                (sha256, key, name, time.time()),
+            )
+
+    def memoize(self, sha256, key, compute):
+        """Returns the result stored under key for a document, computing and storing it first if needed."""
+        result = self.load_result(sha256, key)
+        if result is None:
+            result = compute()
+            if result is not None:
+                self.store_result(sha256, key, result)
+        return result
+
+    def remove(self, sha256):
+        """Deletes a document, its results and the URLs pointing to it."""
+        with self._lock, self._connect() as conn:
+            files = [row[0] for row in conn.execute("SELECT file FROM results WHERE sha256 = ?", (sha256,))]
+            conn.execute("DELETE FROM results WHERE sha256 = ?", (sha256,))
+            conn.execute("DELETE FROM sources WHERE sha256 = ?", (sha256,))
+            conn.execute("DELETE FROM artifacts WHERE sha256 = ?", (sha256,))
+        for path in [self.path(sha256)] + [os.path.join(self.root, "results", name) for name in files]:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+
+_artifact_store = None
+_artifact_settings = {"enabled": True, "root": DEFAULT_ARTIFACT_DIR}
+_artifact_lock = threading.Lock()
+
+
+def get_artifact_store():
+    """Returns the shared ArtifactStore, or None if it is disabled."""
+    global _artifact_store
+    if not _artifact_settings["enabled"]:
+        return None
+    if _artifact_store is None:
+        with _artifact_lock:
+            if _artifact_store is None:
+                _artifact_store = ArtifactStore(_artifact_settings["root"])
+    return _artifact_store
+
+
+def configure_artifact_store(enabled=None, root=None):
+    """Enables/disables the shared artifact store or changes its location."""
+    global _artifact_store
+    with _artifact_lock:
+        if enabled is not None:
+            _artifact_settings["enabled"] = enabled
+        if root is not None:
+            _artifact_settings["root"] = root
+        _artifact_store = None
@@ -0,0 +1 @@
+# scraper/benchmarks/__init__.py
@@ -0,0 +1,86 @@
+# scraper/benchmarks/fixtures.py
+"""
+Offline fixture site shaped like a national statistics office website:
+a page with one large table, a paginated release listing, a publications
+page with thousands of file links, an overview page laid out with hundreds
+of small tables and a set of slow release pages.
+
+Pages are generated deterministically from a seed, so every run (and the
+stored baseline) measures exactly the same markup.
+"""
+import random
+from .link_filter import MONTHS, synthetic_hrefs
+
+LARGE_TABLE_PATH = "/statistics/cpi-detailed"
+LISTING_PATH = "/releases"
+PUBLICATIONS_PATH = "/publications"
+OVERVIEW_PATH = "/statistics/overview"
+# Heading of the one overview table the keyword benchmark looks for.
+OVERVIEW_KEYWORD = "Consumer Price Index"
+SLOW_PREFIX = "/slow/"
+
+PAGE_TEMPLATE = """<!DOCTYPE html>
+<html><head><title>{title}</title></head>
+<body>
+<header><nav>{nav}</nav></header>
+<main><h1>{title}</h1>
+{content}
+</main>
+<footer><table class="footer"><tr><td>National Statistics Office</td><td>Contact</td></tr></table></footer>
+</body></html>
+"""
+
+
+def _nav():
+    return " ".join(f'<a href="/{section}">{section.title()}</a>' for section in ("statistics", "releases", "publications", "about"))
+
+
+def _page(title, content):
+    return PAGE_TEMPLATE.format(title=title, nav=_nav(), content=content)
+
+
+def _table(rng, rows, columns, caption):
+    header = "".join(f"<th>{name}</th>" for name in ["Period", "Region"] + [f"Indicator {i}" for i in range(columns - 2)])
+    body = []
+    for row in range(rows):
+        period = f"{MONTHS[row % 12]} {2000 + row // 12 % 25}"
+        cells = [period, f"Region {rng.randint(1, 40)}"] + [f"{rng.uniform(0, 1000):,.2f}" for _ in range(columns - 2)]
+        body.append("<tr>" + "".join(f"<td>{cell}</td>" for cell in cells) + "</tr>")
+    return f'<table class="data"><caption>{caption}</caption><thead><tr>{header}</tr></thead><tbody>{"".join(body)}</tbody></table>'
+
+
+def build_site(scale=1.0, seed=0):
+    """
+    Returns {path (with query): html} for the whole fixture site. `scale`
+    multiplies table rows, listing pages and link counts.
+    """
+    rng = random.Random(seed)
+    site = {}
+    site[LARGE_TABLE_PATH] = _page("Consumer Price Index, detailed", _table(rng, int(5000 * scale), 10, "CPI by region"))
+
+    pages = max(2, int(10 * scale))
+    numbers = " ".join(f'<a href="{LISTING_PATH}{"" if n == 1 else f"?page={n}"}">{n}</a>' for n in range(1, pages + 1))
+    for n in range(1, pages + 1):
+        path = LISTING_PATH if n == 1 else f"{LISTING_PATH}?page={n}"
+        content = _table(rng, 200, 6, f"Releases, page {n}") + f'<div class="pagination">{numbers}</div>'
+        site[path] = _page(f"Releases - page {n}", content)
+
+    links = "\n".join(f'<li><a href="{href}">{href.rsplit("/", 1)[-1]}</a></li>' for href in synthetic_hrefs(int(5000 * scale), seed=seed))
+    site[PUBLICATIONS_PATH] = _page("Publications", f"<ul>{links}</ul>")
+
+    sections = []
+    groups = max(2, int(300 * scale))
+    for i in range(groups):
+        title = OVERVIEW_KEYWORD if i == groups // 2 else f"Indicator group {i}"
+        sections.append(f"<h3>{title}</h3>" + _table(rng, 20, 4, f"Group {i}"))
+    site[OVERVIEW_PATH] = _page("Statistics overview", "<div>" + "\n".join(sections) + "</div>")
+
+    for i in range(8):
+        hrefs = synthetic_hrefs(50, seed=seed + i + 1)
+        content = _table(rng, 100, 6, f"Release {i}") + "<ul>" + "".join(f'<li><a href="{href}">download</a></li>' for href in hrefs) + "</ul>"
+        site[f"{SLOW_PREFIX}release-{i}"] = _page(f"Release {i}", content)
+    return site
+
+
+def slow_paths(site):
+    return [path for path in site if path.startswith(SLOW_PREFIX)]
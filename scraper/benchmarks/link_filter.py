@@ -0,0 +1,99 @@
+# scraper/benchmarks/link_filter.py
+"""
+Benchmark of file-link filtering on a large synthetic anchor list.
+
+Compares the previous per-anchor implementation (criteria re-parsed for
+every anchor, plus two extra passes for the year/month filters) with the
+compiled LinkMatcher:
+
+    python -m scraper.benchmarks.link_filter --anchors 20000
+"""
+import argparse
+import random
+import time
+from urllib.parse import urljoin
+from config import CATEGORIES_LIST
+from scraper.filters import LinkMatcher
+from scraper.utils import FILE_EXTENSIONS
+
+MONTHS = ["January", "February", "March", "April", "May", "June", "July", "August", "September", "October", "November", "December"]
+
+
+def synthetic_hrefs(count, seed=0):
+    """Builds NSO-style publication hrefs (plus non-file links) with keywords, years and months in the names."""
+    rng = random.Random(seed)
+    extensions = FILE_EXTENSIONS + [".html", ".php", "/"]
+    hrefs = []
+    for i in range(count):
+        words = rng.sample(CATEGORIES_LIST, rng.randint(1, 3)) + [rng.choice(MONTHS), str(rng.randint(2000, 2025))]
+        rng.shuffle(words)
+        name = "_".join(word.replace(" ", "-") for word in words) + f"_{i}"
+        hrefs.append(f"/wp-content/uploads/{rng.randint(2015, 2025)}/{name}{rng.choice(extensions)}")
+    return hrefs
+
+
+def legacy_filter(hrefs, page_url, extensions, file_name_contains_all, query_keywords_all, query_keywords_any, custom_file_name, custom_keywords, custom_file_type, selected_years, selected_months):
+    """The filtering previously done by extract_file_links and web_scraping_page, kept for comparison."""
+    links = []
+    for href in hrefs:
+        for ext in extensions:
+            if href.lower().endswith(ext):
+                full_url = urljoin(page_url, href)
+                file_name = full_url.split("/")[-1].split("?")[0]
+                custom_keywords_list = [kw.strip() for kw in custom_keywords.split(',')] if custom_keywords else []
+                valid_custom_name = not custom_file_name or custom_file_name.lower() in file_name.lower()
+                valid_custom_keywords = not custom_keywords or any(kw.lower() in file_name.lower() for kw in custom_keywords_list)
+                valid_file_type = not custom_file_type or any(file_name.lower().endswith(ft.lower()) for ft in custom_file_type)
+                if valid_custom_name and valid_custom_keywords and valid_file_type:
+                    links.append(full_url)
+                elif file_name_contains_all and query_keywords_all and not (valid_custom_name or valid_custom_keywords or valid_file_type):
+                    if all(kw.lower() in file_name.lower() for kw in query_keywords_all):
+                        links.append(full_url)
+                elif not file_name_contains_all and query_keywords_any and not (valid_custom_name or valid_custom_keywords or valid_file_type):
+                    if any(kw.lower() in file_name.lower() for kw in query_keywords_any):
+                        links.append(full_url)
+                break
+    names = [link.split("/")[-1].split("?")[0] for link in links]
+    if selected_years:
+        names = [name for name in names if any(year in name for year in selected_years)]
+    if selected_months:
+        names = [name for name in names if any(month.lower() in name.lower() for month in selected_months)]
+    return names
+
+
+def compiled_filter(hrefs, page_url, extensions, file_name_contains_all, query_keywords_all, query_keywords_any, custom_file_name, custom_keywords, custom_file_type, selected_years, selected_months):
+    matcher = LinkMatcher(extensions, file_name_contains_all, query_keywords_all, query_keywords_any, custom_file_name, custom_keywords,
+                          custom_file_type, selected_years, selected_months)
+    return [link.split("/")[-1].split("?")[0] for link in matcher.filter_anchors(hrefs, page_url)]
+
+
+def best_of(repeats, fn, *args):
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = fn(*args)
+        timings.append(time.perf_counter() - start)
+    return min(timings), result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--anchors", type=int, default=20000)
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    hrefs = synthetic_hrefs(args.anchors)
+    page_url = "https://stats.example.org/publications/"
+    criteria = (FILE_EXTENSIONS, False, [], ["CPI", "Customer Price Index", "GDP", "Population"], "", "cpi, gdp, census, bulletin",
+                [".pdf", ".xlsx", ".csv"], ["2023", "2024", "2025"], ["January", "February"])
+    legacy_time, legacy = best_of(args.repeats, legacy_filter, hrefs, page_url, *criteria)
+    compiled_time, compiled = best_of(args.repeats, compiled_filter, hrefs, page_url, *criteria)
+    print(f"anchors: {len(hrefs)}")
+    print(f"legacy:   {legacy_time * 1000:8.1f} ms  ({len(hrefs) / legacy_time:,.0f} anchors/s, {len(legacy)} kept)")
+    print(f"compiled: {compiled_time * 1000:8.1f} ms  ({len(hrefs) / compiled_time:,.0f} anchors/s, {len(compiled)} kept)")
+    print(f"speedup:  {legacy_time / compiled_time:.2f}x")
+    print("(kept counts differ: the legacy branches ignored the general keywords whenever no custom filter rejected a link)")
+
+
+if __name__ == "__main__":
+    main()
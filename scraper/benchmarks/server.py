@@ -0,0 +1,63 @@
+# scraper/benchmarks/server.py
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from .fixtures import SLOW_PREFIX
+
+
+class FixtureServer:
+    """
+    Serves an in-memory fixture site ({path with query: html}) on a free local
+    port. Pages under /slow/ are delayed by `slow_delay` seconds to mimic
+    sluggish government servers; unknown paths (including robots.txt) get 404.
+
+        with FixtureServer(build_site()) as server:
+            extract_static_data(server.url("/statistics/cpi-detailed"))
+    """
+
+    def __init__(self, site, slow_delay=0.2, host="127.0.0.1"):
+        pages = {path: html.encode("utf-8") for path, html in site.items()}
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                body = pages.get(self.path)
+                if body is None:
+                    self.send_error(404)
+                    return
+                if self.path.startswith(SLOW_PREFIX):
+                    time.sleep(slow_delay)
+                self.send_response(200)
+                self.send_header("Content-Type", "text/html; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer((host, 0), Handler)
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def url(self, path):
+        return self.base_url + path
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
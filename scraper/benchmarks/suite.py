@@ -0,0 +1,164 @@
+# scraper/benchmarks/suite.py
+"""
+Offline scraping benchmark suite.
+
+Serves the fixture site (scraper/benchmarks/fixtures.py) from a local HTTP
+server and times the extraction entry points end to end, reporting latency
+percentiles, throughput and peak Python memory per case:
+
+    python -m scraper.benchmarks.suite                   # run and compare to baseline.json
+    python -m scraper.benchmarks.suite --save-baseline   # record a new baseline
+    python -m scraper.benchmarks.suite --case file_links --repeats 20
+
+The page cache is disabled so every repeat downloads and parses the pages.
+Exits with status 1 when a case is slower (median) or uses more memory than
+the baseline by more than --tolerance. Baselines are machine-specific:
+record one on the machine that runs the comparison.
+"""
+import argparse
+import json
+import logging
+import os
+import platform
+import tempfile
+import time
+import tracemalloc
+import numpy as np
+from scraper.cache import configure_page_cache
+from scraper.scraper import extract_static_data
+from scraper.table_store import TableStore
+from scraper.utils import FILE_EXTENSIONS, extract_all_data, extract_file_links, extract_paginated_data
+from .fixtures import LARGE_TABLE_PATH, LISTING_PATH, OVERVIEW_KEYWORD, OVERVIEW_PATH, PUBLICATIONS_PATH, build_site, slow_paths
+from .server import FixtureServer
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+KEYWORDS_ANY = ["CPI", "Customer Price Index", "GDP", "Population"]
+
+
+def _rows(tables):
+    return sum(len(df) for df in tables)
+
+
+def build_cases(server, site):
+    """Returns {case name: (function returning the number of items processed, item unit)}."""
+    max_pages = sum(1 for path in site if path.startswith(LISTING_PATH))
+    anchors = site[PUBLICATIONS_PATH].count("<a href")
+    all_urls = [server.url(path) for path in (LARGE_TABLE_PATH, LISTING_PATH, PUBLICATIONS_PATH, *slow_paths(site))]
+    return {
+        "static_table": (lambda: _rows(extract_static_data(server.url(LARGE_TABLE_PATH))), "rows"),
+        "keyword_table": (lambda: _rows(extract_static_data(server.url(OVERVIEW_PATH), table_keyword=OVERVIEW_KEYWORD)), "rows"),
+        "paginated": (lambda: _rows(extract_paginated_data(server.url(LISTING_PATH), max_pages=max_pages)), "rows"),
+        "file_links": (lambda: _run_file_links(server.url(PUBLICATIONS_PATH), anchors), "anchors"),
+        "all_data": (lambda: _run_all(all_urls, max_pages), "urls"),
+        "all_data_parquet": (lambda: _run_all(all_urls, max_pages, streamed=True), "urls"),
+    }
+
+
+def _run_file_links(url, anchors):
+    extract_file_links(url, FILE_EXTENSIONS, False, [], KEYWORDS_ANY, "", "", [])
+    return anchors
+
+
+def _run_all(urls, max_pages, streamed=False):
+    with tempfile.TemporaryDirectory() as tables_dir:
+        sink = TableStore(tables_dir) if streamed else None
+        extract_all_data(urls, [], KEYWORDS_ANY, False, True, max_pages, "", "", [], False, table_sink=sink)
+    return len(urls)
+
+
+def measure(fn, repeats, warmup=1):
+    """Times fn over `repeats` runs (after warmup runs), then measures its peak traced memory in one extra run."""
+    for _ in range(warmup):
+        fn()
+    timings = []
+    items = 0
+    for _ in range(repeats):
+        start = time.perf_counter()
+        items = fn()
+        timings.append(time.perf_counter() - start)
+    tracemalloc.start()
+    try:
+        fn()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    timings_ms = np.array(timings) * 1000
+    return {
+        "repeats": repeats,
+        "items": items,
+        "p50_ms": round(float(np.percentile(timings_ms, 50)), 2),
+        "p90_ms": round(float(np.percentile(timings_ms, 90)), 2),
+        "p99_ms": round(float(np.percentile(timings_ms, 99)), 2),
+        "mean_ms": round(float(timings_ms.mean()), 2),
+        "throughput": round(items / (float(np.median(timings_ms)) / 1000), 1) if items else 0.0,
+        "peak_mem_mb": round(peak / 2**20, 2),
+    }
+
+
+def compare(results, baseline, tolerance):
+    """Returns human-readable regressions of results against baseline results."""
+    regressions = []
+    for name, result in results.items():
+        reference = baseline.get(name)
+        if not reference:
+            continue
+        for metric in ("p50_ms", "peak_mem_mb"):
+            if reference[metric] and result[metric] > reference[metric] * (1 + tolerance):
+                regressions.append(f"{name}: {metric} {result[metric]} vs baseline {reference[metric]} (+{result[metric] / reference[metric] - 1:.0%})")
+    return regressions
+
+
+def print_report(results, baseline):
+    print(f"{'case':<18}{'p50 ms':>10}{'p90 ms':>10}{'p99 ms':>10}{'throughput':>22}{'peak MB':>10}{'vs base':>10}")
+    for name, r in results.items():
+        reference = baseline.get(name)
+        delta = f"{r['p50_ms'] / reference['p50_ms'] - 1:+.0%}" if reference and reference["p50_ms"] else "-"
+        throughput = f"{r['throughput']:,.0f} {r['unit']}/s"
+        print(f"{name:<18}{r['p50_ms']:>10.1f}{r['p90_ms']:>10.1f}{r['p99_ms']:>10.1f}{throughput:>22}{r['peak_mem_mb']:>10.1f}{delta:>10}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--case", action="append", help="Run only this case; repeatable.")
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--scale", type=float, default=1.0, help="Multiplies fixture sizes (table rows, pages, links).")
+    parser.add_argument("--slow-delay", type=float, default=0.2, help="Seconds each /slow/ page takes to respond.")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--save-baseline", action="store_true", help="Write the results as the new baseline.")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed slowdown / memory growth before failing.")
+    parser.add_argument("--json", help="Also write the results to this file.")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.WARNING)
+    logging.getLogger().setLevel(logging.WARNING)
+
+    configure_page_cache(enabled=False)
+    site = build_site(scale=args.scale)
+    results = {}
+    with FixtureServer(site, slow_delay=args.slow_delay) as server:
+        cases = build_cases(server, site)
+        for name in args.case or cases:
+            fn, unit = cases[name]
+            results[name] = dict(measure(fn, args.repeats), unit=unit)
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f).get("results", {})
+    print_report(results, baseline)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=4)
+    if args.save_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump({"python": platform.python_version(), "machine": platform.machine(), "scale": args.scale,
+                       "slow_delay": args.slow_delay, "results": results}, f, indent=4)
+        print(f"Baseline written to {args.baseline}")
+        return 0
+    regressions = compare(results, baseline, args.tolerance)
+    for regression in regressions:
+        print(f"REGRESSION {regression}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
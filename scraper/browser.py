@@ -0,0 +1,176 @@
+# scraper/browser.py
+import atexit
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from selenium import webdriver
+from selenium.common.exceptions import TimeoutException
+from selenium.webdriver.chrome.options import Options
+from selenium.webdriver.support.ui import WebDriverWait
+
+DEFAULT_POOL_SIZE = 2
+DEFAULT_PAGE_TIMEOUT = 30
+DEFAULT_MAX_PAGES_PER_DRIVER = 50
+# CSS selector whose presence means the content we want has rendered.
+DEFAULT_READY_SELECTOR = "table"
+# Seconds without new network requests after which a page counts as settled.
+DEFAULT_NETWORK_IDLE = 1.0
+
+_RESOURCE_COUNT_JS = "return window.performance.getEntriesByType('resource').length;"
+
+
+def create_headless_chrome():
+    options = Options()
+    options.add_argument("--headless=new")  # Run in headless mode (no visible browser)
+    options.add_argument("--no-sandbox")
+    options.add_argument("--disable-dev-shm-usage")
+    return webdriver.Chrome(options=options)
+
+
+class _NetworkIdle:
+    """WebDriverWait condition: true once no new resources have loaded for `idle` seconds."""
+
+    def __init__(self, idle):
+        self.idle = idle
+        self._count = None
+        self._since = None
+
+    def __call__(self, driver):
+        count = driver.execute_script(_RESOURCE_COUNT_JS)
+        now = time.monotonic()
+        if count != self._count:
+            self._count, self._since = count, now
+            return False
+        return now - self._since >= self.idle
+
+
+def wait_until_ready(driver, timeout=DEFAULT_PAGE_TIMEOUT, ready_selector=DEFAULT_READY_SELECTOR, network_idle=DEFAULT_NETWORK_IDLE):
+    """
+    Waits until the document has loaded and either `ready_selector` matches an
+    element or the network has gone idle, whichever comes first. On timeout
+    the page is used as rendered so far.
+    """
+    network_is_idle = _NetworkIdle(network_idle)
+
+    def ready(driver):
+        if driver.execute_script("return document.readyState") != "complete":
+            return False
+        if ready_selector and driver.execute_script("return document.querySelector(arguments[0]) !== null;", ready_selector):
+            return True
+        return network_is_idle(driver)
+
+    try:
+        WebDriverWait(driver, timeout, poll_frequency=0.2).until(ready)
+    except TimeoutException:
+        logging.warning(f"Page not ready after {timeout}s, using content rendered so far: {driver.current_url}")
+
+
+class BrowserPool:
+    """
+    A bounded pool of long-lived headless browsers.
+    Drivers are leased one URL at a time, started lazily, and recycled after
+    `max_pages_per_driver` pages or as soon as a lease ends in an error.
+    """
+
+    def __init__(self, size=DEFAULT_POOL_SIZE, page_timeout=DEFAULT_PAGE_TIMEOUT, max_pages_per_driver=DEFAULT_MAX_PAGES_PER_DRIVER, driver_factory=create_headless_chrome):
+        self.size = max(1, int(size))
+        self.page_timeout = page_timeout
+        self.max_pages_per_driver = max_pages_per_driver
+        self.driver_factory = driver_factory
+        self._slots = threading.BoundedSemaphore(self.size)
+        self._lock = threading.Lock()
+        self._idle = []  # [(driver, pages_served)]
+        self._closed = False
+
+    def _quit(self, driver):
+        try:
+            driver.quit()
+        except Exception as e:
+            logging.warning(f"Error shutting down browser: {e}")
+
+    @contextmanager
+    def lease(self):
+        """Yields a driver for exclusive use; blocks while all drivers are busy."""
+        self._slots.acquire()
+        driver = None
+        pages_served = 0
+        try:
+            with self._lock:
+                if self._closed:
+                    raise RuntimeError("Browser pool is closed.")
+                if self._idle:
+                    driver, pages_served = self._idle.pop()
+            if driver is None:
+                driver = self.driver_factory()
+                driver.set_page_load_timeout(self.page_timeout)
+            try:
+                yield driver
+            except Exception:
+                # The browser may be in a bad state (crashed tab, hung page): replace it.
+                self._quit(driver)
+                driver = None
+                raise
+            pages_served += 1
+            if pages_served >= self.max_pages_per_driver:
+                self._quit(driver)
+                driver = None
+        finally:
+            if driver is not None:
+                with self._lock:
+                    if self._closed:
+                        self._quit(driver)
+                    else:
+                        self._idle.append((driver, pages_served))
+            self._slots.release()
+
+    def close(self):
+        """Quits every idle driver; drivers still leased are quit when returned."""
+        with self._lock:
+            self._closed = True
+            idle, self._idle = self._idle, []
+        for driver, _ in idle:
+            self._quit(driver)
+
+
+_pool = None
+_pool_settings = {
+    "size": DEFAULT_POOL_SIZE,
+    "page_timeout": DEFAULT_PAGE_TIMEOUT,
+    "max_pages_per_driver": DEFAULT_MAX_PAGES_PER_DRIVER,
+}
+_pool_lock = threading.Lock()
+
+
+def get_browser_pool():
+    """Returns the shared browser pool, creating it on first use."""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = BrowserPool(**_pool_settings)
+    return _pool
+
+
+def configure_browser_pool(**settings):
+    """Changes pool size, page_timeout or max_pages_per_driver; the current pool is closed."""
+    global _pool
+    unknown = set(settings) - set(_pool_settings)
+    if unknown:
+        raise ValueError(f"Unknown browser pool settings: {', '.join(sorted(unknown))}")
+    with _pool_lock:
+        _pool_settings.update(settings)
+        if _pool is not None:
+            _pool.close()
+            _pool = None
+
+
+def close_browser_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.close()
+            _pool = None
+
+
+atexit.register(close_browser_pool)
@@ -0,0 +1,235 @@
+# scraper/cache.py
+import atexit
+import hashlib
+import json
+import logging
+import os
+import pickle
+import threading
+import time
+
+DEFAULT_CACHE_DIR = os.path.join(os.getcwd(), ".scraper_cache")
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+
+def _digest(text):
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class PageCache:
+    """
+    Persistent, size-capped cache of fetched pages keyed by URL.
+
+    Each entry keeps the response body, its ETag / Last-Modified validators and
+    any extraction results (tables, file links) computed from it. When the
+    server answers a conditional request with 304, callers can reuse those
+    results instead of parsing the page again. Entries are evicted least
+    recently used first once the cache grows beyond `max_bytes`.
+
+    Cache hits only update access times in memory; the index is written when
+    entries change, on flush() and at interpreter exit.
+    """
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self._index_path = os.path.join(cache_dir, "index.json")
+        self._lock = threading.Lock()
+        self._counters = {"hits": 0, "misses": 0, "result_hits": 0, "result_misses": 0, "evictions": 0}
+        self._dirty = False
+        os.makedirs(cache_dir, exist_ok=True)
+        self._index = self._load_index()
+        atexit.register(self.flush)
+
+    def _load_index(self):
+        try:
+            with open(self._index_path, "r") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+        except Exception as e:
+            logging.error(f"Discarding unreadable page cache index {self._index_path}: {e}")
+            return {}
+
+    def _save_index(self):
+        tmp_path = self._index_path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self._index, f)
+        os.replace(tmp_path, self._index_path)
+        self._dirty = False
+
+    def flush(self):
+        """Writes access times recorded by cache hits since the index was last saved."""
+        with self._lock:
+            if self._dirty:
+                try:
+                    self._save_index()
+                except OSError as e:
+                    logging.error(f"Could not save page cache index {self._index_path}: {e}")
+
+    def _path(self, name):
+        return os.path.join(self.cache_dir, name)
+
+    def _remove_files(self, entry):
+        for name in [entry["body"]] + list(entry.get("results", {}).values()):
+            try:
+                os.remove(self._path(name))
+            except FileNotFoundError:
+                pass
+
+    def _evict(self):
+        total = sum(entry["size"] for entry in self._index.values())
+        if total <= self.max_bytes:
+            return
+        for url, entry in sorted(self._index.items(), key=lambda item: item[1]["last_access"]):
+            if total <= self.max_bytes:
+                break
+            self._remove_files(entry)
+            total -= entry["size"]
+            del self._index[url]
+            self._counters["evictions"] += 1
+
+    def conditional_headers(self, url):
+        """Returns the If-None-Match / If-Modified-Since headers to revalidate a cached URL."""
+        with self._lock:
+            entry = self._index.get(url)
+        headers = {}
+        if entry:
+            if entry.get("etag"):
+                headers["If-None-Match"] = entry["etag"]
+            if entry.get("last_modified"):
+                headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def get_body(self, url):
+        """Returns the cached body for a URL (after a 304), or None if it is gone."""
+        with self._lock:
+            entry = self._index.get(url)
+            if entry is None:
+                self._counters["misses"] += 1
+                return None
+            try:
+                with open(self._path(entry["body"]), "rb") as f:
+                    body = f.read()
+            except FileNotFoundError:
+                del self._index[url]
+                self._dirty = True
+                self._counters["misses"] += 1
+                return None
+            # Only the LRU order changes; losing it on a crash is harmless, so it is not written per hit.
+            entry["last_access"] = time.time()
+            self._dirty = True
+            self._counters["hits"] += 1
+            return body
+
+    def store(self, url, body, etag=None, last_modified=None):
+        """
+        Stores a freshly downloaded body. Returns True if it is byte-identical
+        to the cached copy, in which case previously extracted results are kept.
+        """
+        key = _digest(url)
+        content_hash = hashlib.sha256(body).hexdigest()
+        with self._lock:
+            self._counters["misses"] += 1
+            entry = self._index.get(url)
+            unchanged = entry is not None and entry.get("content_hash") == content_hash
+            if entry is not None and not unchanged:
+                self._remove_files(entry)
+                entry = None
+            if entry is None:
+                entry = {"body": f"{key}.body", "results": {}, "size": len(body)}
+                with open(self._path(entry["body"]), "wb") as f:
+                    f.write(body)
+            entry.update({
+                "etag": etag,
+                "last_modified": last_modified,
+                "content_hash": content_hash,
+                "last_access": time.time(),
+            })
+            self._index[url] = entry
+            self._evict()
+            self._save_index()
+            return unchanged
+
+    def load_result(self, url, result_key):
+        """Returns a previously stored extraction result for a URL, or None."""
+        with self._lock:
+            entry = self._index.get(url)
+            name = entry.get("results", {}).get(_digest(result_key)) if entry else None
+            if name is None:
+                self._counters["result_misses"] += 1
+                return None
+            try:
+                with open(self._path(name), "rb") as f:
+                    result = pickle.load(f)
+            except Exception:
+                del entry["results"][_digest(result_key)]
+                self._dirty = True
+                self._counters["result_misses"] += 1
+                return None
+            self._counters["result_hits"] += 1
+            return result
+
+    def store_result(self, url, result_key, result):
+        """Stores an extraction result computed from the cached body of a URL."""
+        with self._lock:
+            entry = self._index.get(url)
+            if entry is None:
+                return
+            result_digest = _digest(result_key)
+            name = f"{_digest(url)}-{result_digest}.pkl"
+            data = pickle.dumps(result, protocol=pickle.HIGHEST_PROTOCOL)
+            with open(self._path(name), "wb") as f:
+                f.write(data)
+            entry.setdefault("results", {})[result_digest] = name
+            entry["size"] = entry.get("size", 0) + len(data)
+            self._evict()
+            self._save_index()
+
+    def stats(self):
+        """Returns hit/miss counters and current size, for monitoring."""
+        with self._lock:
+            stats = dict(self._counters)
+            stats["entries"] = len(self._index)
+            stats["bytes"] = sum(entry["size"] for entry in self._index.values())
+            stats["max_bytes"] = self.max_bytes
+        return stats
+
+    def clear(self):
+        with self._lock:
+            for entry in self._index.values():
+                self._remove_files(entry)
+            self._index = {}
+            self._save_index()
+
+
+_page_cache = None
+_page_cache_settings = {"enabled": True, "cache_dir": DEFAULT_CACHE_DIR, "max_bytes": DEFAULT_MAX_BYTES}
+_page_cache_lock = threading.Lock()
+
+
+def get_page_cache():
+    """Returns the shared PageCache, or None if caching is disabled."""
+    global _page_cache
+    if not _page_cache_settings["enabled"]:
+        return None
+    if _page_cache is None:
+        with _page_cache_lock:
+            if _page_cache is None:
+                _page_cache = PageCache(_page_cache_settings["cache_dir"], _page_cache_settings["max_bytes"])
+    return _page_cache
+
+
+def configure_page_cache(enabled=None, cache_dir=None, max_bytes=None):
+    """Enables/disables the shared page cache or changes its location and size cap."""
+    global _page_cache
+    with _page_cache_lock:
+        if enabled is not None:
+            _page_cache_settings["enabled"] = enabled
+        if cache_dir is not None:
+            _page_cache_settings["cache_dir"] = cache_dir
+        if max_bytes is not None:
+            _page_cache_settings["max_bytes"] = max_bytes
+        if _page_cache is not None:
+            _page_cache.flush()
+        _page_cache = None
@@ -0,0 +1,291 @@
+# scraper/cli.py
+"""
+Headless batch crawler.
+
+Runs saved extraction profiles (extraction_configs/*.json) without Streamlit
+and writes the scraped tables and file catalogs to disk:
+
+    python -m scraper --all
+    python -m scraper --profile Kenya --profile Uganda --workers 2 --output crawl_output
+
+With --frontier the URLs go into a durable SQLite queue shared by --workers
+worker processes (and by `python -m scraper --join --frontier FILE` on other
+machines sharing the disk); rerunning the same command resumes an
+interrupted crawl.
+"""
+import argparse
+import json
+import logging
+import os
+import shutil
+import socket
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import pandas as pd
+from .cache import DEFAULT_CACHE_DIR, configure_page_cache
+from .crawler import DEFAULT_MAX_WORKERS, DEFAULT_PER_HOST_LIMIT
+from .events import CrawlEvents
+from .filters import MIN_TABLE_COLS, MIN_TABLE_ROWS
+from .frontier import Frontier, collect_crawl, crawl_settings_from_profile, run_worker
+from .metrics import configure_metrics
+from .ratelimit import configure_rate_control
+from .state import CrawlState, DEFAULT_STATE_PATH
+from .table_store import TableStore
+from .utils import build_file_entries, extract_all_data, filter_files_by_date
+
+DEFAULT_CONFIG_DIR = os.path.join(os.getcwd(), "extraction_configs")
+DEFAULT_OUTPUT_DIR = os.path.join(os.getcwd(), "crawl_output")
+PROFILE_PREFIX = "extraction_config_"
+
+
+def list_profiles(config_dir=DEFAULT_CONFIG_DIR):
+    """Returns {profile name: config path} for every extraction_config_<name>.json."""
+    profiles = {}
+    for filename in sorted(os.listdir(config_dir)):
+        if filename.startswith(PROFILE_PREFIX) and filename.endswith(".json"):
+            profiles[filename[len(PROFILE_PREFIX):-len(".json")]] = os.path.join(config_dir, filename)
+    return profiles
+
+
+def profile_urls(profile):
+    """Returns the URLs a profile scrapes: its url_list, else its country's URLs, else its custom URL."""
+    if profile.get("url_list"):
+        return list(profile["url_list"])
+    if profile.get("selected_country"):
+        try:
+            from config import COUNTRY_URLS
+        except ImportError:
+            COUNTRY_URLS = {}
+        if profile["selected_country"] in COUNTRY_URLS:
+            return list(COUNTRY_URLS[profile["selected_country"]])
+    return [profile["custom_url"]] if profile.get("custom_url") else []
+
+
+class LogSubscriber:
+    """Writes pipeline progress events for one profile to the log."""
+
+    def __init__(self, name):
+        self.name = name
+
+    def __call__(self, event):
+        if event["kind"] == "progress":
+            logging.info(f"[{self.name}] {event['stage']} {event['fraction']:.0%} {event['text']}")
+        elif event["kind"] == "status":
+            logging.info(f"[{self.name}] {event['text']}")
+
+
+def run_profile(name, config_path, output_dir, options):
+    """
+    Crawls one profile and writes its outputs (see write_outputs) to
+    <output_dir>/<name>/. Returns the summary dict.
+    """
+    with open(config_path, "r") as f:
+        profile = json.load(f)
+    urls = profile_urls(profile)
+    metrics = configure_metrics(options.get("metrics", False))
+    if metrics is not None:
+        metrics.reset()
+    configure_rate_control(enabled=options.get("adaptive_rate", True), initial_limit=options["per_host_limit"])
+    if options.get("separate_caches"):
+        # Profiles crawled in parallel processes must not share a page cache index.
+        configure_page_cache(cache_dir=os.path.join(DEFAULT_CACHE_DIR, "profiles", name))
+    events = CrawlEvents(LogSubscriber(name))
+    errors = []
+    events.subscribe(lambda event: errors.append(event["message"]) if event["kind"] == "error" else None)
+    profile_dir = os.path.join(output_dir, name)
+    tables_dir = os.path.join(profile_dir, "tables")
+    shutil.rmtree(tables_dir, ignore_errors=True)
+
+    combined_table, files = extract_all_data(
+        urls,
+        profile.get("query_keywords_all", []),
+        profile.get("query_keywords_any", []),
+        profile.get("file_name_contains_all", options["file_name_contains_all"]),
+        profile.get("enable_pagination", options["enable_pagination"]),
+        profile.get("max_pages", options["max_pages"]),
+        profile.get("custom_file_name", ""),
+        profile.get("custom_keywords", ""),
+        profile.get("custom_file_type", []),
+        profile.get("use_dynamic_content", False),
+        profile.get("table_id", ""),
+        profile.get("table_class", ""),
+        profile.get("table_keyword", ""),
+        max_workers=options["max_workers"],
+        per_host_limit=options["per_host_limit"],
+        events=events,
+        crawl_state=CrawlState(options["state_path"]),
+        state_profile=name,
+        new_since_last_run=options["new_only"],
+        table_sink=TableStore(tables_dir),
+        use_sitemaps=profile.get("use_sitemaps", options["use_sitemaps"]),
+        table_min_rows=profile.get("table_min_rows", MIN_TABLE_ROWS),
+        table_min_cols=profile.get("table_min_cols", MIN_TABLE_COLS),
+    )
+    files = filter_files_by_date(files, profile.get("selected_years", []), profile.get("selected_months", []))
+    return write_outputs(name, profile_dir, urls, combined_table, files, errors, metrics)
+
+
+def write_outputs(name, profile_dir, urls, combined_table, files, errors, metrics=None):
+    """
+    Writes tables/ (a Parquet dataset, see TableStore), tables.csv,
+    tables_provenance.json, files.csv, files.json and summary.json (plus
+    metrics.json and metrics.prom when metrics were recorded) to profile_dir.
+    Returns the summary dict.
+    """
+    os.makedirs(profile_dir, exist_ok=True)
+    if combined_table is not None:
+        combined_table.to_csv(os.path.join(profile_dir, "tables.csv"))
+        with open(os.path.join(profile_dir, "tables_provenance.json"), "w") as f:
+            json.dump(combined_table.provenance(), f, indent=4)
+    files_df = pd.DataFrame(files, columns=["No", "File Extension", "File Name", "URL", "Source URLs"])
+    files_df["Source URLs"] = files_df["Source URLs"].apply(lambda urls: " ".join(urls) if isinstance(urls, list) else "")
+    files_df.to_csv(os.path.join(profile_dir, "files.csv"), index=False)
+    with open(os.path.join(profile_dir, "files.json"), "w") as f:
+        json.dump(files, f, indent=4)
+    summary = {
+        "profile": name,
+        "urls": len(urls),
+        "tables": 0 if combined_table is None else len(combined_table),
+        "table_rows": 0 if combined_table is None else combined_table.total_rows,
+        "files": len(files),
+        "errors": errors,
+    }
+    with open(os.path.join(profile_dir, "summary.json"), "w") as f:
+        json.dump(summary, f, indent=4)
+    if metrics is not None:
+        with open(os.path.join(profile_dir, "metrics.json"), "w") as f:
+            json.dump(metrics.to_json(), f, indent=4)
+        with open(os.path.join(profile_dir, "metrics.prom"), "w") as f:
+            f.write(metrics.to_prometheus())
+    return summary
+
+
+def run_frontier(args, profiles, options):
+    """
+    Seeds the frontier with the selected profiles (unless joining), runs
+    --workers worker processes until it is drained, then writes each
+    profile's outputs from the collected results.
+    """
+    results_dir = args.results_dir or f"{args.frontier}.results"
+    frontier_options = {"per_host_limit": args.per_host_limit, "journal_mode": args.journal_mode}
+    frontier = Frontier(args.frontier, **frontier_options)
+    crawls = None
+    if not args.join:
+        crawls = list(profiles)
+        for name, config_path in profiles.items():
+            with open(config_path, "r") as f:
+                profile = json.load(f)
+            frontier.add_crawl(name, crawl_settings_from_profile(profile, options))
+            added = frontier.enqueue(name, profile_urls(profile))
+            logging.info(f"[{name}] {added} new URLs queued; frontier now {frontier.counts([name])}")
+
+    # One page cache per worker slot (stable across runs, so conditional requests still pay off).
+    cache_dirs = [os.path.join(DEFAULT_CACHE_DIR, f"worker-{socket.gethostname()}-{slot}") for slot in range(max(1, args.workers))]
+    with ProcessPoolExecutor(max_workers=max(1, args.workers)) as executor:
+        futures = [executor.submit(run_worker, args.frontier, results_dir, crawls, None, 1.0, None, frontier_options, cache_dir)
+                   for cache_dir in cache_dirs]
+        processed = sum(future.result() for future in futures)
+    logging.info(f"Workers processed {processed} tasks; frontier: {frontier.counts(crawls)}")
+    if args.join:
+        return 0
+
+    for name, config_path in profiles.items():
+        with open(config_path, "r") as f:
+            profile = json.load(f)
+        profile_dir = os.path.join(args.output, name)
+        tables_dir = os.path.join(profile_dir, "tables")
+        shutil.rmtree(tables_dir, ignore_errors=True)
+        combined_table, links, errors = collect_crawl(frontier, name, table_sink=TableStore(tables_dir))
+        files = filter_files_by_date(build_file_entries(links), profile.get("selected_years", []), profile.get("selected_months", []))
+        summary = write_outputs(name, profile_dir, profile_urls(profile), combined_table, files, errors)
+        logging.info(f"[{name}] done: {summary['table_rows']} table rows, {summary['files']} files, {len(summary['errors'])} errors")
+    return 0
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="python -m scraper", description="Run saved extraction profiles without the Streamlit UI.")
+    selection = parser.add_mutually_exclusive_group(required=True)
+    selection.add_argument("--profile", action="append", help="Profile name (extraction_config_<name>.json); repeatable.")
+    selection.add_argument("--all", action="store_true", help="Run every saved profile.")
+    selection.add_argument("--list", action="store_true", help="List available profiles and exit.")
+    selection.add_argument("--join", action="store_true", help="Only work on the crawls already in --frontier (e.g. from another machine).")
+    parser.add_argument("--config-dir", default=DEFAULT_CONFIG_DIR, help="Directory holding extraction_config_*.json files.")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT_DIR, help="Directory to write results into.")
+    parser.add_argument("--workers", type=int, default=1, help="Number of profiles crawled in parallel (processes).")
+    parser.add_argument("--max-workers", type=int, default=DEFAULT_MAX_WORKERS, help="Concurrent requests per profile.")
+    parser.add_argument("--per-host-limit", type=int, default=DEFAULT_PER_HOST_LIMIT, help="Concurrent requests per host.")
+    parser.add_argument("--fixed-rate", action="store_true",
+                        help="Keep --per-host-limit fixed instead of adapting it to each host's latency and errors.")
+    parser.add_argument("--sitemaps", action="store_true", help="Also discover files through sitemaps and feeds (unless the profile says otherwise).")
+    parser.add_argument("--pagination", action="store_true", help="Follow pagination (unless the profile says otherwise).")
+    parser.add_argument("--max-pages", type=int, default=5, help="Maximum pages per paginated URL.")
+    parser.add_argument("--contains-all", action="store_true", help="Require all general keywords in file names.")
+    parser.add_argument("--download-files", action="store_true",
+                        help="With --frontier, also download the matched files (to <results-dir>/files/<profile>/).")
+    parser.add_argument("--state", default=DEFAULT_STATE_PATH, help="SQLite crawl-state database recording what each profile has seen.")
+    parser.add_argument("--new-only", action="store_true", help="Only output links and tables new since the profile's last run.")
+    parser.add_argument("--metrics", action="store_true", help="Record per-stage timings and write metrics.json / metrics.prom per profile.")
+    parser.add_argument("--frontier", help="SQLite crawl frontier shared by the worker processes; enables resumable multi-process crawling.")
+    parser.add_argument("--results-dir", help="Where frontier workers store task results (default: <frontier>.results).")
+    parser.add_argument("--journal-mode", default="WAL", help="SQLite journal mode for the frontier (use DELETE on network filesystems).")
+    parser.add_argument("--log-level", default="INFO", help="Logging level.")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    logging.basicConfig(level=args.log_level.upper(), format="%(asctime)s - %(levelname)s - %(message)s")
+
+    if args.join and not args.frontier:
+        logging.error("--join needs --frontier")
+        return 2
+    if args.download_files and not args.frontier:
+        logging.error("--download-files needs --frontier")
+        return 2
+    if args.frontier:
+        ignored = [flag for flag, given in (("--new-only", args.new_only), ("--state", args.state != DEFAULT_STATE_PATH),
+                                            ("--sitemaps", args.sitemaps), ("--metrics", args.metrics),
+                                            ("--fixed-rate", args.fixed_rate)) if given]
+        if ignored:
+            logging.error(f"{', '.join(ignored)} cannot be used with --frontier")
+            return 2
+    profiles = list_profiles(args.config_dir)
+    if args.list:
+        for name in profiles:
+            print(name)
+        return 0
+    if args.profile:
+        missing = [name for name in args.profile if name not in profiles]
+        if missing:
+            logging.error(f"Unknown profile(s): {', '.join(missing)}. Available: {', '.join(profiles)}")
+            return 2
+        profiles = {name: profiles[name] for name in args.profile}
+
+    options = {
+        "enable_pagination": args.pagination,
+        "max_pages": args.max_pages,
+        "file_name_contains_all": args.contains_all,
+        "max_workers": args.max_workers,
+        "per_host_limit": args.per_host_limit,
+        "state_path": args.state,
+        "new_only": args.new_only,
+        "metrics": args.metrics,
+        "adaptive_rate": not args.fixed_rate,
+        "use_sitemaps": args.sitemaps,
+        "download_files": args.download_files,
+        "separate_caches": args.workers > 1,
+    }
+    os.makedirs(args.output, exist_ok=True)
+    if args.frontier:
+        return run_frontier(args, {} if args.join else profiles, options)
+    failed = 0
+    with ProcessPoolExecutor(max_workers=max(1, args.workers)) as executor:
+        futures = {executor.submit(run_profile, name, path, args.output, options): name for name, path in profiles.items()}
+        for future in as_completed(futures):
+            name = futures[future]
+            try:
+                summary = future.result()
+                logging.info(f"[{name}] done: {summary['table_rows']} table rows, {summary['files']} files, {len(summary['errors'])} errors")
+            except Exception as e:
+                failed += 1
+                logging.error(f"[{name}] failed: {e}")
+    return 1 if failed else 0
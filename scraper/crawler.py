@@ -0,0 +1,118 @@
+# scraper/crawler.py
+import logging
+import threading
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+DEFAULT_MAX_WORKERS = 8
+DEFAULT_PER_HOST_LIMIT = 2
+# Longest the dispatcher sleeps before re-checking hosts whose limits or pauses may have changed.
+DISPATCH_POLL = 0.25
+
+
+def host_of(url):
+    """Returns the lowercased host (with port) a URL points to."""
+    return urlsplit(url).netloc.lower()
+
+
+class CrawlEngine:
+    """
+    Fans work out over a list of URLs on a thread pool.
+    The pool size is the global concurrency limit. Tasks are only handed to a
+    worker thread when their host has room: at most `per_host_limit` running
+    tasks, or, with an AdaptiveRateController, the host's current adaptive
+    limit (starting from per_host_limit) and never while it is paused by a
+    Retry-After. A slow or throttled host therefore never ties up the
+    threads other hosts could use.
+    """
+
+    def __init__(self, max_workers=DEFAULT_MAX_WORKERS, per_host_limit=DEFAULT_PER_HOST_LIMIT, initializer=None, rate_controller=None):
+        self.max_workers = max(1, int(max_workers))
+        self.per_host_limit = max(1, int(per_host_limit))
+        self.initializer = initializer
+        self.rate_controller = rate_controller
+
+    def _host_limit(self, host):
+        if self.rate_controller is None:
+            return self.per_host_limit
+        return self.rate_controller.limit(host, initial=self.per_host_limit)
+
+    def _host_wait(self, host):
+        return self.rate_controller.ready_in(host) if self.rate_controller is not None else 0.0
+
+    def map(self, fn, urls):
+        """
+        Runs fn(url) for every URL and yields (url, result, error) tuples in
+        the same order as `urls`, as soon as each one (and all before it) is done.
+        """
+        urls = list(urls)
+        if not urls:
+            return
+        workers = min(self.max_workers, len(urls))
+        results = [Future() for _ in urls]
+        stop = threading.Event()
+        with ThreadPoolExecutor(max_workers=workers, initializer=self.initializer) as executor:
+            dispatcher = threading.Thread(target=self._dispatch, args=(executor, fn, urls, results, workers, stop), daemon=True)
+            dispatcher.start()
+            try:
+                for i, url in enumerate(urls):
+                    future = results[i]
+                    try:
+                        result, error = future.result(), None
+                    except Exception as e:
+                        logging.error(f"Crawl task failed for {url}: {e}")
+                        result, error = None, e
+                    # Drop the finished future so its result is freed once the consumer is done with it.
+                    results[i] = future = None
+                    yield url, result, error
+                    result = None
+            finally:
+                # The consumer may stop early: submit nothing more, let running tasks finish.
+                stop.set()
+                dispatcher.join()
+
+    def _dispatch(self, executor, fn, urls, results, workers, stop):
+        """Submits tasks round-robin across hosts whenever a thread and the task's host both have room."""
+        queues = {}
+        for i, url in enumerate(urls):
+            queues.setdefault(host_of(url), deque()).append(i)
+        running = {}
+        total_running = [0]
+        cond = threading.Condition()
+
+        def finished(host, i, future):
+            error = future.exception()
+            if error is not None:
+                results[i].set_exception(error)
+            else:
+                results[i].set_result(future.result())
+            with cond:
+                running[host] -= 1
+                total_running[0] -= 1
+                cond.notify()
+
+        with cond:
+            while queues and not stop.is_set():
+                submitted = False
+                next_ready = None
+                for host in list(queues):
+                    if total_running[0] >= workers:
+                        break
+                    wait = self._host_wait(host)
+                    if wait > 0:
+                        next_ready = wait if next_ready is None else min(next_ready, wait)
+                        continue
+                    if running.get(host, 0) >= self._host_limit(host):
+                        continue
+                    i = queues[host].popleft()
+                    if not queues[host]:
+                        del queues[host]
+                    running[host] = running.get(host, 0) + 1
+                    total_running[0] += 1
+                    future = executor.submit(fn, urls[i])
+                    future.add_done_callback(lambda future, host=host, i=i: finished(host, i, future))
+                    submitted = True
+                if not submitted:
+                    # Woken when a task finishes; re-check periodically as adaptive limits and pauses change.
+                    cond.wait(timeout=min(next_ready or DISPATCH_POLL, DISPATCH_POLL))
@@ -0,0 +1,135 @@
+# scraper/dedup.py
+import hashlib
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+import pandas as pd
+
+DEFAULT_PORTS = {"http": 80, "https": 443}
+# Query parameters that only track the visitor and never change the page.
+TRACKING_PARAMS = ("utm_", "fbclid", "gclid", "mc_cid", "mc_eid")
+
+
+def canonical_url(url):
+    """
+    Normalized form of a URL used to detect duplicates: lowercase scheme and
+    host, no default port, no fragment or tracking parameters, query
+    parameters sorted and an empty path written as "/".
+    """
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or "").rstrip(".")
+    try:
+        port = parts.port
+    except ValueError:
+        port = None
+    netloc = host if port is None or port == DEFAULT_PORTS.get(scheme) else f"{host}:{port}"
+    if parts.username:
+        netloc = f"{parts.username}{':' + parts.password if parts.password else ''}@{netloc}"
+    query = sorted(
+        (key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if not key.lower().startswith(TRACKING_PARAMS)
+    )
+    return urlunsplit((scheme, netloc, parts.path or "/", urlencode(query), ""))
+
+
+def unique_urls(urls):
+    """Returns the URLs with later duplicates (by canonical form) removed, in input order."""
+    seen = set()
+    unique = []
+    for url in urls:
+        key = canonical_url(url)
+        if key not in seen:
+            seen.add(key)
+            unique.append(url)
+    return unique
+
+
+def table_hash(df):
+    """Content hash of a table: its column labels plus every cell value."""
+    digest = hashlib.sha256(repr([str(column) for column in df.columns]).encode("utf-8"))
+    digest.update(pd.util.hash_pandas_object(df.astype(str), index=False).values.tobytes())
+    return digest.hexdigest()
+
+
+class TableDeduplicator:
+    """
+    Keeps each distinct table (by content hash) once, in first-seen order,
+    while remembering every source URL it was found on.
+    With a sink (a TableStore), distinct tables are written to it as they
+    arrive and only their hashes and row counts stay in memory.
+    """
+
+    def __init__(self, sink=None):
+        self.sink = sink
+        self._tables = {}
+        self._rows = {}
+        self._sources = {}
+
+    def add(self, df, source_url):
+        """Adds a table found on source_url. Returns True if its content was not seen before."""
+        digest = table_hash(df)
+        sources = self._sources.setdefault(digest, [])
+        if source_url not in sources:
+            sources.append(source_url)
+        if digest in self._rows:
+            return False
+        self._rows[digest] = len(df)
+        if self.sink is not None:
+            self.sink.write(df, source_url, table_hash=digest)
+        else:
+            self._tables[digest] = df
+        return True
+
+    def __len__(self):
+        return len(self._rows)
+
+    def tables(self):
+        """The distinct tables kept in memory (empty when writing to a sink)."""
+        return list(self._tables.values())
+
+    def provenance(self):
+        """Returns one {"table_hash", "first_row", "rows", "sources"} entry per kept table, in concat order."""
+        entries = []
+        first_row = 0
+        for digest, rows in self._rows.items():
+            entries.append({"table_hash": digest, "first_row": first_row, "rows": rows, "sources": list(self._sources[digest])})
+            first_row += rows
+        return entries
+
+    def combined(self):
+        """
+        Concatenates the distinct tables (None if there are none), with the
+        provenance in attrs["provenance"]. With a sink, closes it and returns it instead.
+        """
+        if self.sink is not None:
+            return self.sink.close(self.provenance())
+        if not self._tables:
+            return None
+        combined = pd.concat(self.tables(), ignore_index=True)
+        combined.attrs["provenance"] = self.provenance()
+        return combined
+
+
+class LinkDeduplicator:
+    """Keeps each distinct file link (by canonical URL) once, with every page it was found on."""
+
+    def __init__(self):
+        self._links = {}
+        self._sources = {}
+
+    def add(self, link, source_url):
+        """Adds a link found on source_url. Returns True if it was not seen before."""
+        key = canonical_url(link)
+        sources = self._sources.setdefault(key, [])
+        if source_url not in sources:
+            sources.append(source_url)
+        if key in self._links:
+            return False
+        self._links[key] = link
+        return True
+
+    def __len__(self):
+        return len(self._links)
+
+    def links(self):
+        """Returns (link, sources) pairs in first-seen order."""
+        return [(link, list(self._sources[key])) for key, link in self._links.items()]
@@ -0,0 +1,391 @@
+# scraper/downloads.py
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+import zipfile
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import contextmanager
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+import requests
+from .http_client import get_session
+from .metrics import STAGE_DOWNLOAD, incr, timed
+from .ratelimit import host_slot
+
+CHUNK_SIZE = 64 * 1024
+# Bodies up to this size stay in memory; larger ones roll over to a temp file on disk.
+SPOOL_MAX_SIZE = 8 * 1024 * 1024
+DEFAULT_DOWNLOAD_WORKERS = 4
+DEFAULT_TIMEOUT = 30
+# Times a dropped connection is resumed (Range from the last byte written) before giving up.
+RESUME_RETRIES = 5
+# Files at least this large are fetched as parallel byte ranges when the server supports them.
+SEGMENT_MIN_SIZE = 64 * 1024 * 1024
+DEFAULT_SEGMENTS = 4
+# Segment progress is saved to the .part.json sidecar every this many bytes.
+CHECKPOINT_BYTES = 8 * 1024 * 1024
+PART_SUFFIX = ".part"
+LOCK_SUFFIX = ".lock"
+# Archives written by write_zip; ones older than ZIP_MAX_AGE seconds are deleted by the next write_zip.
+ZIP_DIR = os.path.join(tempfile.gettempdir(), "scraper_zips")
+ZIP_MAX_AGE = 60 * 60
+# Errors after which a download is resumed rather than failed.
+RESUMABLE_ERRORS = (requests.exceptions.ConnectionError, requests.exceptions.ChunkedEncodingError, requests.exceptions.Timeout)
+
+# validator is what If-Range uses (see _validator); etag and last_modified are the raw headers.
+RemoteFile = namedtuple("RemoteFile", ["size", "accepts_ranges", "validator", "etag", "last_modified"], defaults=(None, None))
+FileDownload = namedtuple("FileDownload", ["path", "size", "sha256"])
+
+
+class DownloadError(requests.exceptions.RequestException):
+    """Raised when a finished download fails its size or hash check, or cannot be resumed."""
+
+
+class _RangeIgnored(Exception):
+    pass
+
+
+def _validator(response):
+    """Value for If-Range: a strong ETag, else Last-Modified."""
+    etag = response.headers.get("ETag")
+    if etag and not etag.startswith("W/"):
+        return etag
+    return response.headers.get("Last-Modified")
+
+
+def probe(url, timeout=DEFAULT_TIMEOUT):
+    """HEADs a URL and returns a RemoteFile (size None when unknown)."""
+    try:
+        with host_slot(url) as feedback:
+            response = get_session().head(url, timeout=timeout, allow_redirects=True)
+            feedback.record(response)
+    except requests.exceptions.RequestException as e:
+        logging.info(f"HEAD {url} failed ({e}); downloading without ranges")
+        return RemoteFile(None, False, None)
+    if not response.ok:
+        return RemoteFile(None, False, None)
+    length = response.headers.get("Content-Length")
+    size = int(length) if length and length.isdigit() else None
+    accepts_ranges = response.headers.get("Accept-Ranges", "").lower() == "bytes"
+    return RemoteFile(size, accepts_ranges, _validator(response), response.headers.get("ETag"), response.headers.get("Last-Modified"))
+
+
+def open_stream(url, timeout, headers=None):
+    """
+    GETs url with stream=True and returns the response, with the body still
+    to be read. The host's rate-limit slot is held only until the headers
+    arrive, so long transfers neither block other requests to the host nor
+    count as slow responses.
+    """
+    with host_slot(url) as feedback:
+        response = get_session().get(url, timeout=timeout, stream=True, headers=headers)
+        feedback.record(response)
+    return response
+
+
+def stream_to_file(url, fileobj, timeout=10, chunk_size=CHUNK_SIZE, offset=0, validator=None, retries=RESUME_RETRIES):
+    """
+    Streams a response body into fileobj in chunks and returns the number of bytes written.
+    With `offset`, fileobj already holds that many bytes of the body and
+    only the rest is requested (Range, guarded by If-Range with `validator`).
+    A dropped connection is resumed the same way up to `retries` times; if
+    the server answers a Range request with the whole body, fileobj is
+    rewound (it must then be seekable) and the download starts over.
+    Raises requests.exceptions.RequestException on network or HTTP errors.
+    """
+    written = 0
+    attempt = 0
+    while True:
+        have = offset + written
+        headers = {}
+        if have:
+            headers["Range"] = f"bytes={have}-"
+            if validator:
+                headers["If-Range"] = validator
+        try:
+            with open_stream(url, timeout, headers) as response:
+                if have and response.status_code == 416:
+                    # Everything was already there.
+                    return written
+                response.raise_for_status()
+                if have and response.status_code != 206:
+                    logging.info(f"{url} was not resumed (Range ignored or the file changed); starting over")
+                    fileobj.seek(fileobj.tell() - have)
+                    fileobj.truncate()
+                    offset = written = 0
+                validator = validator or _validator(response)
+                for chunk in response.iter_content(chunk_size=chunk_size):
+                    if chunk:
+                        fileobj.write(chunk)
+                        written += len(chunk)
+            return written
+        except RESUMABLE_ERRORS as e:
+            attempt += 1
+            if attempt > retries:
+                raise
+            incr("download_resumes")
+            logging.warning(f"Download of {url} interrupted at {offset + written} bytes ({e}); resuming")
+
+
+def _load_meta(meta_path):
+    try:
+        with open(meta_path, "r") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _save_meta(meta_path, meta):
+    temp_path = f"{meta_path}.tmp"
+    with open(temp_path, "w") as f:
+        json.dump(meta, f)
+    os.replace(temp_path, meta_path)
+
+
+def _discard(*paths):
+    for path in paths:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+
+@contextmanager
+def _part_lock(part_path):
+    """
+    Holds an exclusive lock on part_path + ".lock" while a .part is written, so
+    two processes (or threads) never resume the same .part. The OS releases
+    the lock if its holder dies. Raises DownloadError if another writer has it.
+    """
+    lock_path = part_path + LOCK_SUFFIX
+    with open(lock_path, "a+b") as f:
+        try:
+            if fcntl is not None:
+                fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            else:
+                msvcrt.locking(f.fileno(), msvcrt.LK_NBLCK, 1)
+            # The previous holder may have removed the lock file between our open and lock.
+            if not os.path.samestat(os.fstat(f.fileno()), os.stat(lock_path)):
+                raise OSError
+        except OSError:
+            raise DownloadError(f"{part_path} is being written by another download") from None
+        try:
+            yield
+        finally:
+            # Removed before the lock is released (the file closes), so nobody locks a stale copy.
+            try:
+                os.remove(lock_path)
+            except OSError:
+                pass
+
+
+def _fetch_segment(url, part_path, segment, progress, timeout, retries, validator, on_progress):
+    """Fills bytes [start, end] of the .part file, resuming from progress[index] after drops."""
+    index, start, end = segment
+    attempt = 0
+    while progress[index] < end - start + 1:
+        position = start + progress[index]
+        headers = {"Range": f"bytes={position}-{end}"}
+        if validator:
+            headers["If-Range"] = validator
+        try:
+            # The host slot covers only the request, so segments transfer in parallel even at a low host limit.
+            with open_stream(url, timeout, headers) as response:
+                response.raise_for_status()
+                if response.status_code != 206:
+                    raise _RangeIgnored()
+                # Unbuffered, so checkpointed progress never runs ahead of what reached the file.
+                with open(part_path, "r+b", buffering=0) as f:
+                    f.seek(position)
+                    for chunk in response.iter_content(chunk_size=CHUNK_SIZE):
+                        if chunk:
+                            chunk = chunk[:end - start + 1 - progress[index]]
+                            f.write(chunk)
+                            progress[index] += len(chunk)
+                            on_progress(len(chunk))
+        except RESUMABLE_ERRORS as e:
+            attempt += 1
+            if attempt > retries:
+                raise
+            incr("download_resumes")
+            logging.warning(f"Segment {index} of {url} interrupted at byte {start + progress[index]} ({e}); resuming")
+
+
+def _download_segments(url, part_path, meta_path, meta, segments, timeout, retries):
+    """Fetches the file as parallel byte ranges into a pre-sized .part, checkpointing progress to meta_path."""
+    size = meta["size"]
+    if meta.get("segments") is None:
+        step = -(-size // segments)
+        meta["segments"] = [[start, min(start + step, size) - 1, 0] for start in range(0, size, step)]
+        with open(part_path, "wb") as f:
+            f.truncate(size)
+        _save_meta(meta_path, meta)
+    bounds = [(index, start, end) for index, (start, end, _) in enumerate(meta["segments"])]
+    progress = [done for _, _, done in meta["segments"]]
+    lock = threading.Lock()
+    unsaved = [0]
+
+    def checkpoint():
+        meta["segments"] = [[start, end, progress[index]] for index, start, end in bounds]
+        _save_meta(meta_path, meta)
+
+    def on_progress(count):
+        with lock:
+            unsaved[0] += count
+            if unsaved[0] >= CHECKPOINT_BYTES:
+                unsaved[0] = 0
+                checkpoint()
+
+    try:
+        with ThreadPoolExecutor(max_workers=len(bounds)) as executor:
+            futures = [executor.submit(_fetch_segment, url, part_path, segment, progress, timeout, retries, meta["validator"], on_progress)
+                       for segment in bounds]
+            for future in futures:
+                future.result()
+    finally:
+        with lock:
+            checkpoint()
+
+
+def _sha256_of(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def download(url, path, expected_size=None, sha256=None, segments=DEFAULT_SEGMENTS, segment_min_size=SEGMENT_MIN_SIZE,
+             timeout=DEFAULT_TIMEOUT, retries=RESUME_RETRIES, remote=None):
+    """
+    Downloads url to path without holding it in memory and returns a FileDownload.
+
+    The body goes to path + ".part" and is renamed once complete. An existing
+    .part from an interrupted run is resumed with a Range request unless the
+    remote file changed (its ETag/Last-Modified or size differ from those
+    saved in the .part.json sidecar). Files of at least segment_min_size on
+    servers that accept ranges are fetched as `segments` parallel ranges.
+    The result must match expected_size (or the advertised size) and, when
+    given, the sha256 hex digest; otherwise DownloadError is raised.
+    `remote` is the RemoteFile from an earlier probe(url), saving the HEAD request.
+    DownloadError is also raised while another download writes the same .part.
+    """
+    part_path = path + PART_SUFFIX
+    meta_path = part_path + ".json"
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with _part_lock(part_path):
+        remote = remote or probe(url, timeout)
+        meta = _load_meta(meta_path)
+        if meta is None or meta.get("validator") != remote.validator or meta.get("size") != remote.size or not os.path.exists(part_path):
+            _discard(part_path, meta_path)
+            meta = {"url": url, "size": remote.size, "validator": remote.validator, "segments": None}
+
+        with timed(STAGE_DOWNLOAD, url):
+            done = False
+            if remote.accepts_ranges and remote.size and (meta["segments"] is not None or (segments > 1 and remote.size >= segment_min_size)):
+                try:
+                    _download_segments(url, part_path, meta_path, meta, segments, timeout, retries)
+                    done = True
+                except _RangeIgnored:
+                    logging.info(f"{url} ignored the Range request; downloading it in one piece")
+                    _discard(part_path, meta_path)
+                    meta["segments"] = None
+            if not done:
+                offset = os.path.getsize(part_path) if remote.accepts_ranges and os.path.exists(part_path) else 0
+                if offset:
+                    incr("download_resumes")
+                    logging.info(f"Resuming {url} at byte {offset}")
+                else:
+                    _save_meta(meta_path, meta)
+                with open(part_path, "ab" if offset else "wb") as f:
+                    stream_to_file(url, f, timeout=timeout, offset=offset, validator=remote.validator, retries=retries)
+
+        size = os.path.getsize(part_path)
+        expected = expected_size if expected_size is not None else remote.size
+        if expected is not None and size != expected:
+            if size > expected:
+                _discard(part_path, meta_path)
+            raise DownloadError(f"Downloaded {size} bytes of {url}, expected {expected}")
+        digest = _sha256_of(part_path)
+        if sha256 is not None and digest != sha256.lower():
+            _discard(part_path, meta_path)
+            raise DownloadError(f"SHA-256 mismatch for {url}: got {digest}, expected {sha256}")
+        os.replace(part_path, path)
+        _discard(meta_path)
+    incr("files_downloaded")
+    return FileDownload(path, size, digest)
+
+
+def download_to_spool(url, timeout=10):
+    """Downloads a file into a SpooledTemporaryFile positioned at the start."""
+    spool = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_SIZE)
+    try:
+        stream_to_file(url, spool, timeout=timeout)
+    except Exception:
+        spool.close()
+        raise
+    spool.seek(0)
+    return spool
+
+
+def remove_stale_zips(max_age=ZIP_MAX_AGE):
+    """Deletes archives in ZIP_DIR last written more than max_age seconds ago."""
+    cutoff = time.time() - max_age
+    try:
+        names = os.listdir(ZIP_DIR)
+    except FileNotFoundError:
+        return
+    for name in names:
+        path = os.path.join(ZIP_DIR, name)
+        try:
+            if os.path.getmtime(path) < cutoff:
+                os.remove(path)
+        except OSError:
+            pass
+
+
+def write_zip(files, folder_name, max_workers=DEFAULT_DOWNLOAD_WORKERS, zip_path=None):
+    """
+    Downloads the given files (dicts with "File Name" and "URL") concurrently to
+    disk (see download) and writes them into a ZIP archive as each download
+    finishes. Files go through the artifact store when it is enabled, so ones
+    downloaded before are not fetched again.
+    Without zip_path the archive goes to ZIP_DIR, where stale archives are
+    cleaned up (see remove_stale_zips).
+    Returns (zip_path, errors) where errors is a list of (file, exception).
+    """
+    from .artifacts import get_artifact_store
+    store = get_artifact_store()
+    if zip_path is None:
+        remove_stale_zips()
+        os.makedirs(ZIP_DIR, exist_ok=True)
+        with tempfile.NamedTemporaryFile(dir=ZIP_DIR, delete=False, suffix=".zip") as temp_file:
+            zip_path = temp_file.name
+    errors = []
+    with tempfile.TemporaryDirectory() as download_dir, zipfile.ZipFile(zip_path, "w", zipfile.ZIP_DEFLATED) as zf, \
+            ThreadPoolExecutor(max_workers=max_workers) as executor:
+        if store is not None:
+            futures = {executor.submit(store.fetch, file["URL"], file["File Name"]): file for file in files}
+        else:
+            futures = {executor.submit(download, file["URL"], os.path.join(download_dir, str(number))): file
+                       for number, file in enumerate(files)}
+        for future in as_completed(futures):
+            file = futures[future]
+            try:
+                result = future.result()
+            except Exception as e:
+                logging.error(f"Error downloading file from {file['URL']}: {e}")
+                errors.append((file, e))
+                continue
+            zf.write(result.path, f"{folder_name}/{file['File Name']}")
+            if store is None:
+                os.remove(result.path)
+    return zip_path, errors
@@ -0,0 +1,123 @@
+# scraper/events.py
+import logging
+import threading
+
+# Progress stages reported by the pipeline.
+STAGE_TABLES = "tables"
+STAGE_FILES = "files"
+STAGE_PAGES = "pages"
+
+
+class CrawlEvents:
+    """
+    Progress and error events raised by the scraping pipeline.
+
+    The pipeline never talks to a UI directly: it calls the helpers below and
+    every subscriber receives an event dict with a "kind" ("progress",
+    "status", "info", "success", "error") plus kind-specific fields.
+    Errors and info messages are also written to the log.
+    Events may be emitted from crawl worker threads.
+    """
+
+    def __init__(self, *subscribers):
+        self._subscribers = list(subscribers)
+        self._lock = threading.Lock()
+
+    def subscribe(self, callback):
+        with self._lock:
+            self._subscribers.append(callback)
+        return callback
+
+    def emit(self, kind, **fields):
+        event = dict(fields, kind=kind)
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for callback in subscribers:
+            try:
+                callback(event)
+            except Exception as e:
+                logging.error(f"Event subscriber failed on {kind} event: {e}")
+
+    def progress(self, stage, fraction, text="", url=None):
+        self.emit("progress", stage=stage, fraction=min(max(fraction, 0.0), 1.0), text=text, url=url)
+
+    def status(self, text):
+        self.emit("status", text=text)
+
+    def info(self, message):
+        logging.info(message)
+        self.emit("info", message=message)
+
+    def success(self, message):
+        logging.info(message)
+        self.emit("success", message=message)
+
+    def error(self, message):
+        logging.error(message)
+        self.emit("error", message=message)
+
+    def thread_initializer(self):
+        """Returns an initializer that prepares crawl worker threads for every subscriber, or None."""
+        with self._lock:
+            initializers = [
+                subscriber.thread_initializer() for subscriber in self._subscribers
+                if hasattr(subscriber, "thread_initializer")
+            ]
+        initializers = [initializer for initializer in initializers if initializer is not None]
+        if not initializers:
+            return None
+
+        def initialize():
+            for initializer in initializers:
+                initializer()
+        return initialize
+
+
+class StreamlitSubscriber:
+    """
+    Renders pipeline events in a Streamlit script: table/file progress bars,
+    a status line, per-URL pagination progress bars and st.error/st.success messages.
+    """
+
+    def __init__(self, table_progress_bar=None, file_progress_bar=None, progress_text=None):
+        import streamlit as st
+        from streamlit.runtime.scriptrunner import get_script_run_ctx
+        self._st = st
+        self._ctx = get_script_run_ctx()
+        self._bars = {STAGE_TABLES: table_progress_bar, STAGE_FILES: file_progress_bar}
+        self._page_bars = {}
+        self._progress_text = progress_text
+        self._lock = threading.Lock()
+
+    def __call__(self, event):
+        kind = event["kind"]
+        if kind == "progress":
+            if event["stage"] == STAGE_PAGES:
+                with self._lock:
+                    if event["url"] not in self._page_bars:
+                        self._page_bars[event["url"]] = self._st.progress(0, text="Scraping pages...")
+                    bar = self._page_bars[event["url"]]
+            else:
+                bar = self._bars.get(event["stage"])
+            if bar is not None:
+                bar.progress(event["fraction"], text=event["text"])
+        elif kind == "status":
+            if self._progress_text is not None:
+                self._progress_text.text(event["text"])
+        elif kind == "error":
+            self._st.error(event["message"])
+        elif kind == "success":
+            self._st.success(event["message"])
+
+    def thread_initializer(self):
+        """Attaches worker threads to the current script run so they can update the page."""
+        if self._ctx is None:
+            return None
+        from streamlit.runtime.scriptrunner import add_script_run_ctx
+        ctx = self._ctx
+        return lambda: add_script_run_ctx(threading.current_thread(), ctx)
+
+
+def default_events():
+    """Events that are only logged (used when a caller passes no events)."""
+    return CrawlEvents()
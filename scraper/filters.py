@@ -0,0 +1,207 @@
+# scraper/filters.py
+import re
+from urllib.parse import urljoin
+import soupsieve
+from .parsing import HEADING_TAGS, TABLE_CONTEXT_TAGS
+
+# Tables with fewer rows (header included) or columns are skipped before their cells are read.
+MIN_TABLE_ROWS = 2
+MIN_TABLE_COLS = 1
+# Rows looked at to find the widest one for min_cols.
+COLUMN_PROBE_ROWS = 5
+# Elements looked back through for the heading of a table; the search also stops at the previous table.
+HEADING_LOOKBACK = 50
+# Parts of another table: a heading before them describes that table, not this one.
+TABLE_PART_TAGS = ("table", "tr", "td", "th")
+
+class KeywordSet:
+    """
+    A set of lowercased keywords compiled into one regular expression.
+    find() reports every keyword occurring in a text, overlapping ones
+    included, in a single scan: a zero-width lookahead tries the keywords
+    longest-first at each position, and each hit also counts the shorter
+    keywords contained in it.
+    """
+
+    def __init__(self, keywords):
+        keywords = sorted(set(keywords), key=len, reverse=True)
+        self._pattern = re.compile("(?=(" + "|".join(re.escape(keyword) for keyword in keywords) + "))")
+        self._contained = {keyword: frozenset(other for other in keywords if other in keyword) for keyword in keywords}
+
+    def find(self, text):
+        found = set()
+        for hit in set(self._pattern.findall(text)):
+            found |= self._contained[hit]
+        return found
+
+
+def _keywords(values):
+    return tuple(dict.fromkeys(value.strip().lower() for value in values if value and value.strip()))
+
+
+class LinkMatcher:
+    """
+    File-link filter criteria compiled once and applied to each link in one pass.
+
+    Every criterion that is set must hold:
+      - the href ends with one of `extensions`;
+      - the file name contains `custom_file_name`;
+      - it contains at least one of the comma-separated `custom_keywords`;
+      - it ends with one of `custom_file_type`;
+      - it contains every keyword in `query_keywords_all`;
+      - it contains at least one keyword in `query_keywords_any`, or all of
+        them when `file_name_contains_all` is set;
+      - it mentions one of `selected_years` and one of `selected_months`.
+    Matching is case-insensitive.
+    """
+
+    def __init__(self, extensions=(), file_name_contains_all=False, query_keywords_all=(), query_keywords_any=(),
+                 custom_file_name="", custom_keywords="", custom_file_type=(), selected_years=(), selected_months=()):
+        self.extensions = tuple(ext.lower() for ext in extensions)
+        self.custom_file_types = tuple(ft.lower() for ft in custom_file_type or ())
+        self.custom_name = custom_file_name.strip().lower() if custom_file_name else ""
+        self.custom_keywords = frozenset(_keywords(custom_keywords.split(",") if custom_keywords else ()))
+        self.keywords_all = frozenset(_keywords(query_keywords_all or ()))
+        self.keywords_any = frozenset(_keywords(query_keywords_any or ()))
+        self.any_requires_all = bool(file_name_contains_all)
+        self.years = frozenset(_keywords(selected_years or ()))
+        self.months = frozenset(_keywords(selected_months or ()))
+        keywords = set(self.custom_keywords | self.keywords_all | self.keywords_any | self.years | self.months)
+        if self.custom_name:
+            keywords.add(self.custom_name)
+        self._keywords = KeywordSet(keywords) if keywords else None
+
+    def accepts_href(self, href):
+        return not self.extensions or href.lower().endswith(self.extensions)
+
+    def matches(self, file_name):
+        """Returns True if a file name passes every active criterion."""
+        name = file_name.lower()
+        if self.custom_file_types and not name.endswith(self.custom_file_types):
+            return False
+        return self.matches_keywords(name)
+
+    @property
+    def has_keywords(self):
+        return self._keywords is not None
+
+    def matches_keywords(self, text):
+        """Returns True if a text (e.g. a page slug) passes every keyword criterion; file types are not checked."""
+        if self._keywords is None:
+            return True
+        found = self._keywords.find(text.lower())
+        if self.custom_name and self.custom_name not in found:
+            return False
+        if self.custom_keywords and found.isdisjoint(self.custom_keywords):
+            return False
+        if self.keywords_all and not self.keywords_all <= found:
+            return False
+        if self.keywords_any:
+            if self.any_requires_all and not self.keywords_any <= found:
+                return False
+            if not self.any_requires_all and found.isdisjoint(self.keywords_any):
+                return False
+        if self.years and found.isdisjoint(self.years):
+            return False
+        if self.months and found.isdisjoint(self.months):
+            return False
+        return True
+
+    def filter_anchors(self, hrefs, page_url):
+        """Returns the absolute URLs of the hrefs that pass the filters, in page order."""
+        links = []
+        for href in hrefs:
+            if not self.accepts_href(href):
+                continue
+            full_url = urljoin(page_url, href)
+            if self.matches(file_name_of(full_url)):
+                links.append(full_url)
+        return links
+
+
+def file_name_of(url):
+    return url.split("/")[-1].split("?")[0]
+
+
+def table_selector(table_id="", table_class=""):
+    """CSS selector for tables with the given id and (space-separated) classes, e.g. 'table#cpi.data.sortable'."""
+    selector = "table"
+    if table_id and table_id.strip():
+        selector += "#" + soupsieve.escape(table_id.strip())
+    for name in (table_class or "").split():
+        selector += "." + soupsieve.escape(name)
+    return selector
+
+
+class TableFilter:
+    """
+    Table identification criteria, checked before a table's cells are read.
+
+    Every criterion that is set must hold:
+      - the table matches the CSS selector built from `table_id` and
+        `table_class` (a table may have other classes as well);
+      - `table_keyword` occurs in the text describing the table: its
+        <caption>, summary/title/aria-label, header row, the paragraph right
+        before it or the nearest preceding heading (within HEADING_LOOKBACK
+        elements and not before the previous table);
+      - it has at least `min_rows` rows and `min_cols` cells in its widest
+        row (of the first few).
+    The keyword is matched case-insensitively and only against that nearby
+    text, so no check serializes the page around a table.
+    """
+
+    def __init__(self, table_id="", table_class="", table_keyword="", min_rows=MIN_TABLE_ROWS, min_cols=MIN_TABLE_COLS):
+        self.selector = table_selector(table_id, table_class)
+        self._compiled = soupsieve.compile(self.selector)
+        self.keyword = table_keyword.strip().lower() if table_keyword else ""
+        self.min_rows = min_rows
+        self.min_cols = min_cols
+
+    def select(self, soup):
+        """Returns the tables of a parsed page that match the selector, in page order."""
+        # find_all walks the tree natively; soupsieve's select would test every element in Python.
+        return [table for table in soup.find_all("table") if self._compiled.match(table)]
+
+    def context(self, table_tag):
+        """Lowercased text describing a table, which table_keyword is matched against."""
+        parts = [table_tag.get(attribute, "") for attribute in ("summary", "title", "aria-label")]
+        caption = table_tag.find("caption")
+        if caption is not None:
+            parts.append(caption.get_text(" ", strip=True))
+        header = table_tag.find("tr")
+        if header is not None:
+            parts.append(header.get_text(" ", strip=True))
+        previous = table_tag.find_previous_sibling(True)
+        if previous is not None and previous.name in TABLE_CONTEXT_TAGS:
+            parts.append(previous.get_text(" ", strip=True))
+        heading = self._heading(table_tag)
+        if heading is not None:
+            parts.append(heading.get_text(" ", strip=True))
+        return " ".join(parts).lower()
+
+    def _heading(self, table_tag):
+        """The nearest heading before a table, or None if another table or HEADING_LOOKBACK elements come first."""
+        ancestors = None
+        for element in table_tag.find_all_previous(True, limit=HEADING_LOOKBACK):
+            if element.name in HEADING_TAGS:
+                return element
+            if element.name in TABLE_PART_TAGS:
+                # Cells of an enclosing layout table are passed; those of a previous table end the search.
+                if ancestors is None:
+                    ancestors = {id(parent) for parent in table_tag.parents}
+                if id(element) not in ancestors:
+                    return None
+        return None
+
+    def rows(self, table_tag):
+        """Returns the <tr> rows of a table that passes every criterion, otherwise None."""
+        if not self._compiled.match(table_tag):
+            return None
+        if self.keyword and self.keyword not in self.context(table_tag):
+            return None
+        rows = table_tag.find_all("tr")
+        if len(rows) < self.min_rows:
+            return None
+        if self.min_cols and max((len(row.find_all(["th", "td"])) for row in rows[:COLUMN_PROBE_ROWS]), default=0) < self.min_cols:
+            return None
+        return rows
@@ -0,0 +1,468 @@
+# scraper/frontier.py
+"""
+Durable crawl frontier shared by any number of worker processes.
+
+URLs to crawl live in a SQLite database instead of a Python list. Workers
+lease one task at a time, run the usual extraction functions on it and
+record the result; failed tasks are retried with exponential backoff, and a
+worker that dies simply lets its lease expire so another worker picks the
+task up. Pagination pages (and, optionally, the file links found) are
+enqueued as new tasks. Several machines can share one frontier file on a
+common disk; use journal_mode="DELETE" there, since WAL needs shared memory
+and does not work over network filesystems.
+"""
+import json
+import logging
+import os
+import random
+import socket
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+import requests
+from .cache import configure_page_cache
+from .dedup import LinkDeduplicator, TableDeduplicator, canonical_url
+from .crawler import DEFAULT_PER_HOST_LIMIT, host_of
+from .filters import MIN_TABLE_COLS, MIN_TABLE_ROWS, LinkMatcher
+from .pagination import discover_page_urls, find_next_url
+from .parsing import extraction_tags
+from .robots import DisallowedByRobots
+from .table_store import TableStore
+
+KIND_PAGE = "page"        # landing page: tables, file links and pagination discovery
+KIND_LISTING = "listing"  # further page of a paginated listing: tables only
+KIND_FILE = "file"        # file link to download
+
+PENDING = "pending"
+LEASED = "leased"
+DONE = "done"
+FAILED = "failed"
+
+DEFAULT_LEASE_SECONDS = 300
+DEFAULT_MAX_ATTEMPTS = 4
+DEFAULT_BACKOFF_BASE = 30.0
+DEFAULT_BACKOFF_MAX = 3600.0
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS crawls (
+    name TEXT PRIMARY KEY,
+    settings TEXT NOT NULL,
+    created_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS tasks (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    crawl TEXT NOT NULL,
+    url TEXT NOT NULL,
+    url_key TEXT NOT NULL,
+    host TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    depth INTEGER NOT NULL DEFAULT 0,
+    root_url TEXT,
+    parent_url TEXT,
+    status TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    next_attempt_at REAL NOT NULL,
+    lease_owner TEXT,
+    lease_expires REAL,
+    last_error TEXT,
+    result TEXT,
+    enqueued_at REAL NOT NULL,
+    updated_at REAL NOT NULL,
+    UNIQUE (crawl, kind, url_key)
+);
+CREATE INDEX IF NOT EXISTS tasks_ready ON tasks (status, next_attempt_at);
+CREATE INDEX IF NOT EXISTS tasks_host ON tasks (host, status);
+CREATE TABLE IF NOT EXISTS hosts (
+    host TEXT PRIMARY KEY,
+    last_leased_at REAL NOT NULL
+);
+"""
+
+
+class Frontier:
+    """
+    SQLite-backed task queue with leases, retries and per-host fairness.
+
+    lease() hands out the ready task whose host was leased least recently,
+    skipping hosts that already have `per_host_limit` tasks in flight across
+    all workers. Leases expire after `lease_seconds` unless renewed (run_worker
+    renews them while a task runs); expired tasks go back to the queue (crash
+    recovery). Failures are retried after
+    backoff_base * 2**(attempt - 1) seconds (plus jitter), up to max_attempts.
+    """
+
+    def __init__(self, path, lease_seconds=DEFAULT_LEASE_SECONDS, max_attempts=DEFAULT_MAX_ATTEMPTS,
+                 backoff_base=DEFAULT_BACKOFF_BASE, backoff_max=DEFAULT_BACKOFF_MAX,
+                 per_host_limit=DEFAULT_PER_HOST_LIMIT, journal_mode="WAL"):
+        self.path = path
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.per_host_limit = max(1, int(per_host_limit))
+        self.journal_mode = journal_mode
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with self._transaction() as conn:
+            conn.executescript(_SCHEMA)
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=60, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        conn.execute(f"PRAGMA journal_mode={self.journal_mode}")
+        return conn
+
+    def _transaction(self):
+        return _Transaction(self._connect())
+
+    def add_crawl(self, name, settings):
+        """Registers (or updates) a crawl and the extraction settings its workers use."""
+        with self._transaction() as conn:
+            conn.execute(
+                "INSERT INTO crawls (name, settings, created_at) VALUES (?, ?, ?) "
+                "ON CONFLICT(name) DO UPDATE SET settings = excluded.settings",
+                (name, json.dumps(settings), time.time()),
+            )
+
+    def crawl_settings(self, name):
+        with self._transaction() as conn:
+            row = conn.execute("SELECT settings FROM crawls WHERE name = ?", (name,)).fetchone()
+        return json.loads(row["settings"]) if row else None
+
+    def crawls(self):
+        with self._transaction() as conn:
+            return [row["name"] for row in conn.execute("SELECT name FROM crawls ORDER BY created_at")]
+
+    def enqueue(self, crawl, urls, kind=KIND_PAGE, depth=0, root_url=None, parent_url=None):
+        """Adds URLs to a crawl; URLs already queued (by canonical form) are ignored. Returns the number added."""
+        now = time.time()
+        added = 0
+        with self._transaction() as conn:
+            for url in urls:
+                cursor = conn.execute(
+                    "INSERT OR IGNORE INTO tasks (crawl, url, url_key, host, kind, depth, root_url, parent_url, status, "
+                    "next_attempt_at, enqueued_at, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (crawl, url, canonical_url(url), host_of(url), kind, depth, root_url or url, parent_url, PENDING, now, now, now),
+                )
+                added += cursor.rowcount
+        return added
+
+    def reclaim_expired(self, conn=None):
+        """
+        Returns tasks whose lease expired (their worker died or hung) to the
+        queue, or fails them when that was their last attempt.
+        """
+        if conn is None:
+            with self._transaction() as conn:
+                return self.reclaim_expired(conn)
+        now = time.time()
+        conn.execute(
+            "UPDATE tasks SET status = ?, last_error = 'lease expired', lease_owner = NULL, lease_expires = NULL, updated_at = ? "
+            "WHERE status = ? AND lease_expires < ? AND attempts >= ?",
+            (FAILED, now, LEASED, now, self.max_attempts),
+        )
+        cursor = conn.execute(
+            "UPDATE tasks SET status = ?, lease_owner = NULL, lease_expires = NULL, updated_at = ? "
+            "WHERE status = ? AND lease_expires < ?",
+            (PENDING, now, LEASED, now),
+        )
+        if cursor.rowcount:
+            logging.warning(f"Reclaimed {cursor.rowcount} expired crawl leases")
+        return cursor.rowcount
+
+    def lease(self, worker_id, crawls=None):
+        """Leases the next ready task (a dict), or returns None if none is ready right now."""
+        now = time.time()
+        crawl_filter, params = _crawl_filter(crawls)
+        with self._transaction() as conn:
+            # Take the write lock up front so two workers never lease the same task.
+            conn.execute("BEGIN IMMEDIATE")
+            self.reclaim_expired(conn)
+            row = conn.execute(
+                f"""
+                SELECT t.* FROM tasks t LEFT JOIN hosts h ON h.host = t.host
+                WHERE t.status = ? AND t.next_attempt_at <= ? {crawl_filter}
+                  AND (SELECT COUNT(*) FROM tasks l WHERE l.host = t.host AND l.status = ?) < ?
+                ORDER BY COALESCE(h.last_leased_at, 0), t.depth, t.id
+                LIMIT 1
+                """,
+                (PENDING, now, *params, LEASED, self.per_host_limit),
+            ).fetchone()
+            if row is None:
+                return None
+            conn.execute(
+                "UPDATE tasks SET status = ?, lease_owner = ?, lease_expires = ?, attempts = attempts + 1, updated_at = ? WHERE id = ?",
+                (LEASED, worker_id, now + self.lease_seconds, now, row["id"]),
+            )
+            conn.execute(
+                "INSERT INTO hosts (host, last_leased_at) VALUES (?, ?) ON CONFLICT(host) DO UPDATE SET last_leased_at = excluded.last_leased_at",
+                (row["host"], now),
+            )
+        task = dict(row, status=LEASED, lease_owner=worker_id, lease_expires=now + self.lease_seconds)
+        task["attempts"] += 1
+        return task
+
+    def complete(self, task_id, worker_id, result=None):
+        """Marks a leased task done with its result. Returns False if the lease was lost meanwhile."""
+        with self._transaction() as conn:
+            cursor = conn.execute(
+                "UPDATE tasks SET status = ?, result = ?, lease_owner = NULL, lease_expires = NULL, last_error = NULL, updated_at = ? "
+                "WHERE id = ? AND status = ? AND lease_owner = ?",
+                (DONE, json.dumps(result or {}), time.time(), task_id, LEASED, worker_id),
+            )
+        return cursor.rowcount == 1
+
+    def renew(self, task_id, worker_id):
+        """Extends a lease by lease_seconds from now. Returns False if the lease was lost meanwhile."""
+        now = time.time()
+        with self._transaction() as conn:
+            cursor = conn.execute(
+                "UPDATE tasks SET lease_expires = ?, updated_at = ? WHERE id = ? AND status = ? AND lease_owner = ?",
+                (now + self.lease_seconds, now, task_id, LEASED, worker_id),
+            )
+        return cursor.rowcount == 1
+
+    def fail(self, task_id, worker_id, error, permanent=False):
+        """
+        Records a failed attempt. The task is retried after a backoff unless the
+        error is permanent or it ran out of attempts. Returns the new status.
+        """
+        with self._transaction() as conn:
+            row = conn.execute("SELECT attempts FROM tasks WHERE id = ? AND status = ? AND lease_owner = ?",
+                               (task_id, LEASED, worker_id)).fetchone()
+            if row is None:
+                return None
+            attempts = row["attempts"]
+            if permanent or attempts >= self.max_attempts:
+                status, next_attempt_at = FAILED, time.time()
+            else:
+                delay = min(self.backoff_max, self.backoff_base * 2 ** (attempts - 1))
+                status, next_attempt_at = PENDING, time.time() + delay * random.uniform(1.0, 1.25)
+            conn.execute(
+                "UPDATE tasks SET status = ?, next_attempt_at = ?, last_error = ?, lease_owner = NULL, lease_expires = NULL, updated_at = ? WHERE id = ?",
+                (status, next_attempt_at, str(error)[:2000], time.time(), task_id),
+            )
+        return status
+
+    def counts(self, crawls=None):
+        """Returns {status: number of tasks}."""
+        crawl_filter, params = _crawl_filter(crawls)
+        with self._transaction() as conn:
+            rows = conn.execute(f"SELECT status, COUNT(*) AS n FROM tasks t WHERE 1 = 1 {crawl_filter} GROUP BY status", params)
+            return {row["status"]: row["n"] for row in rows}
+
+    def drained(self, crawls=None):
+        """True when no task is pending or leased, i.e. the crawl is finished."""
+        counts = self.counts(crawls)
+        return not counts.get(PENDING) and not counts.get(LEASED)
+
+    def tasks(self, crawl, status=None):
+        """Returns the crawl's tasks (optionally only those with `status`) in enqueue order, results decoded."""
+        query = "SELECT * FROM tasks WHERE crawl = ?" + (" AND status = ?" if status else "") + " ORDER BY id"
+        with self._transaction() as conn:
+            rows = [dict(row) for row in conn.execute(query, (crawl, status) if status else (crawl,))]
+        for row in rows:
+            row["result"] = json.loads(row["result"]) if row["result"] else None
+        return rows
+
+
+class _Transaction:
+    """Connection context manager: commits (or rolls back) an open transaction, then closes."""
+
+    def __init__(self, conn):
+        self.conn = conn
+
+    def __enter__(self):
+        return self.conn
+
+    def __exit__(self, exc_type, exc, tb):
+        try:
+            if self.conn.in_transaction:
+                self.conn.execute("ROLLBACK" if exc_type else "COMMIT")
+        finally:
+            self.conn.close()
+
+
+def _crawl_filter(crawls):
+    if not crawls:
+        return "", ()
+    crawls = list(crawls)
+    return f"AND t.crawl IN ({', '.join('?' for _ in crawls)})", tuple(crawls)
+
+
+def crawl_settings_from_profile(profile, defaults):
+    """The extraction settings a crawl's workers need, taken from a saved profile with CLI defaults."""
+    return {
+        "query_keywords_all": profile.get("query_keywords_all", []),
+        "query_keywords_any": profile.get("query_keywords_any", []),
+        "file_name_contains_all": profile.get("file_name_contains_all", defaults["file_name_contains_all"]),
+        "enable_pagination": profile.get("enable_pagination", defaults["enable_pagination"]),
+        "max_pages": profile.get("max_pages", defaults["max_pages"]),
+        "custom_file_name": profile.get("custom_file_name", ""),
+        "custom_keywords": profile.get("custom_keywords", ""),
+        "custom_file_type": profile.get("custom_file_type", []),
+        "use_dynamic_content": profile.get("use_dynamic_content", False),
+        "table_id": profile.get("table_id", ""),
+        "table_class": profile.get("table_class", ""),
+        "table_keyword": profile.get("table_keyword", ""),
+        "table_min_rows": profile.get("table_min_rows", MIN_TABLE_ROWS),
+        "table_min_cols": profile.get("table_min_cols", MIN_TABLE_COLS),
+        "download_files": defaults.get("download_files", False),
+    }
+
+
+def _is_permanent(error):
+    if isinstance(error, DisallowedByRobots):
+        return True
+    if isinstance(error, requests.exceptions.HTTPError) and error.response is not None:
+        return 400 <= error.response.status_code < 500 and error.response.status_code not in (408, 429)
+    return False
+
+
+@contextmanager
+def _lease_kept(frontier, task, worker_id):
+    """Renews the task's lease every lease_seconds / 3 while the block runs, so long downloads keep it."""
+    stop = threading.Event()
+
+    def renew():
+        while not stop.wait(frontier.lease_seconds / 3):
+            try:
+                if not frontier.renew(task["id"], worker_id):
+                    logging.warning(f"[{worker_id}] lost the lease on {task['url']}")
+                    return
+            except sqlite3.Error as e:
+                logging.warning(f"[{worker_id}] could not renew the lease on {task['url']}: {e}")
+
+    keeper = threading.Thread(target=renew, name=f"lease-{task['id']}", daemon=True)
+    keeper.start()
+    try:
+        yield
+    finally:
+        stop.set()
+        keeper.join()
+
+
+def process_task(frontier, task, settings, results_dir, matcher):
+    """
+    Runs the extraction for one leased task and returns its result dict.
+    Tables are written to <results_dir>/task_<id>/ (a TableStore); new
+    pagination pages and, with download_files, file links are enqueued.
+    """
+    from scraper.scraper import extract_tables, fetch_dynamic_page
+    from .downloads import download
+    from .page import fetch_page
+    from .utils import filter_file_links, is_file_link
+
+    url = task["url"]
+    if task["kind"] == KIND_PAGE and is_file_link(url):
+        # A seed URL that is itself a file: nothing to scrape.
+        return {"tables_dir": None, "tables": 0, "file_links": [url]}
+    if task["kind"] == KIND_FILE:
+        files_dir = os.path.join(results_dir, "files", task["crawl"])
+        os.makedirs(files_dir, exist_ok=True)
+        path = os.path.join(files_dir, f"{task['id']}_{url.split('/')[-1].split('?')[0] or 'download'}")
+        # A retried lease resumes the .part left by the failed attempt.
+        result = download(url, path)
+        return {"path": path, "size": result.size, "sha256": result.sha256}
+
+    parse_only = extraction_tags(settings["table_keyword"])
+    if settings["use_dynamic_content"]:
+        page = fetch_dynamic_page(url, parse_only=parse_only)
+        if page is None:
+            raise RuntimeError(f"Could not render {url}")
+    else:
+        page = fetch_page(url, parse_only=parse_only)
+
+    tables = extract_tables(page.soup, url, settings["table_id"], settings["table_class"], settings["table_keyword"],
+                            settings.get("table_min_rows", MIN_TABLE_ROWS), settings.get("table_min_cols", MIN_TABLE_COLS))
+    tables_dir = None
+    if tables:
+        tables_dir = os.path.join(results_dir, f"task_{task['id']}")
+        store = TableStore(tables_dir)
+        for df in tables:
+            store.write(df, url)
+        store.close()
+
+    links = []
+    if task["kind"] == KIND_PAGE:
+        # File links come from the landing page only, as in extract_all_data.
+        links = filter_file_links(page.soup, url, matcher.extensions, settings["file_name_contains_all"], settings["query_keywords_all"],
+                                  settings["query_keywords_any"], settings["custom_file_name"], settings["custom_keywords"],
+                                  settings["custom_file_type"], matcher=matcher)
+        if settings["download_files"]:
+            frontier.enqueue(task["crawl"], links, kind=KIND_FILE, root_url=task["root_url"], parent_url=url)
+
+    if settings["enable_pagination"]:
+        max_pages = settings["max_pages"]
+        if task["kind"] == KIND_PAGE:
+            page_urls, _ = discover_page_urls(page.soup, url, max_pages)
+            for number, page_url in enumerate(page_urls or (), start=1):
+                frontier.enqueue(task["crawl"], [page_url], kind=KIND_LISTING, depth=number, root_url=task["root_url"], parent_url=url)
+        next_url = find_next_url(page.soup, url)
+        if next_url and task["depth"] + 1 < max_pages:
+            frontier.enqueue(task["crawl"], [next_url], kind=KIND_LISTING, depth=task["depth"] + 1, root_url=task["root_url"], parent_url=url)
+
+    return {"tables_dir": tables_dir, "tables": len(tables), "file_links": links}
+
+
+def run_worker(frontier_path, results_dir, crawls=None, worker_id=None, poll_interval=1.0, max_tasks=None, frontier_options=None,
+               cache_dir=None):
+    """
+    Leases and processes tasks until the frontier (restricted to `crawls`)
+    is drained or max_tasks were processed. Safe to run in many processes
+    and on many machines at once. Returns the number of tasks processed.
+    Workers running at the same time need their own page cache: pass each a
+    different cache_dir (the cache index is not shared between processes).
+    """
+    if cache_dir is not None:
+        configure_page_cache(cache_dir=cache_dir)
+    frontier = Frontier(frontier_path, **(frontier_options or {}))
+    worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}"
+    settings_by_crawl = {}
+    matchers = {}
+    processed = 0
+    while max_tasks is None or processed < max_tasks:
+        task = frontier.lease(worker_id, crawls)
+        if task is None:
+            if frontier.drained(crawls):
+                break
+            time.sleep(poll_interval)
+            continue
+        crawl = task["crawl"]
+        if crawl not in settings_by_crawl:
+            settings = settings_by_crawl[crawl] = frontier.crawl_settings(crawl)
+            from .utils import FILE_EXTENSIONS
+            matchers[crawl] = LinkMatcher(FILE_EXTENSIONS, settings["file_name_contains_all"], settings["query_keywords_all"],
+                                          settings["query_keywords_any"], settings["custom_file_name"],
+                                          settings["custom_keywords"], settings["custom_file_type"])
+        try:
+            with _lease_kept(frontier, task, worker_id):
+                result = process_task(frontier, task, settings_by_crawl[crawl], results_dir, matchers[crawl])
+        except Exception as e:
+            status = frontier.fail(task["id"], worker_id, e, permanent=_is_permanent(e))
+            logging.error(f"[{worker_id}] {task['url']} failed (attempt {task['attempts']}, now {status}): {e}")
+        else:
+            if not frontier.complete(task["id"], worker_id, result):
+                logging.warning(f"[{worker_id}] lease on {task['url']} expired before it finished; result discarded")
+        processed += 1
+    return processed
+
+
+def collect_crawl(frontier, crawl, table_sink=None):
+    """
+    Merges a crawl's finished tasks into distinct tables and file links.
+    Returns (combined_table, links, errors): combined_table as from
+    TableDeduplicator.combined(), links as (link, sources) pairs and errors
+    as messages for the tasks that failed for good.
+    """
+    tables = TableDeduplicator(sink=table_sink)
+    links = LinkDeduplicator()
+    for task in frontier.tasks(crawl, status=DONE):
+        result = task["result"] or {}
+        if result.get("tables_dir"):
+            for df in TableStore(result["tables_dir"]).iter_tables():
+                tables.add(df, task["url"])
+        for link in result.get("file_links", ()):
+            links.add(link, task["url"])
+    errors = [f"Error accessing {task['url']}: {task['last_error']}" for task in frontier.tasks(crawl, status=FAILED)]
+    return tables.combined(), links.links(), errors
@@ -0,0 +1,79 @@
+# scraper/http_client.py
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+DEFAULT_RETRIES = 3
+DEFAULT_BACKOFF_FACTOR = 1
+# 429 and 503 are not retried here: fetch_page retries them per host after
+# their Retry-After (see ratelimit), without blocking requests to other hosts.
+DEFAULT_STATUS_FORCELIST = (500, 502, 504)
+# Number of distinct hosts whose connection pools are kept alive.
+DEFAULT_POOL_CONNECTIONS = 64
+# Keep-alive connections kept per host; should be >= the crawler's per-host limit.
+DEFAULT_POOL_MAXSIZE = 8
+
+_settings = {
+    "retries": DEFAULT_RETRIES,
+    "backoff_factor": DEFAULT_BACKOFF_FACTOR,
+    "status_forcelist": DEFAULT_STATUS_FORCELIST,
+    "pool_connections": DEFAULT_POOL_CONNECTIONS,
+    "pool_maxsize": DEFAULT_POOL_MAXSIZE,
+}
+_session = None
+_lock = threading.Lock()
+
+
+def build_session(retries=DEFAULT_RETRIES, backoff_factor=DEFAULT_BACKOFF_FACTOR, status_forcelist=DEFAULT_STATUS_FORCELIST,
+                  pool_connections=DEFAULT_POOL_CONNECTIONS, pool_maxsize=DEFAULT_POOL_MAXSIZE):
+    """Builds a requests.Session with retry/backoff and keep-alive connection pools."""
+    session = requests.Session()
+    # Retry-After is honoured per host by the rate controller, not by sleeping inside the connection pool.
+    retry = Retry(total=retries, backoff_factor=backoff_factor, status_forcelist=list(status_forcelist), allowed_methods=["GET", "HEAD"],
+                  respect_retry_after_header=False)
+    adapter = HTTPAdapter(max_retries=retry, pool_connections=pool_connections, pool_maxsize=pool_maxsize)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def get_session():
+    """
+    Returns the process-wide pooled session shared by every fetch in the scraper.
+    Connections are reused across calls and threads (urllib3 pools are thread-safe),
+    so repeated requests to a host skip the TCP/TLS handshake.
+    Callers must not close it.
+    """
+    global _session
+    if _session is None:
+        with _lock:
+            if _session is None:
+                _session = build_session(**_settings)
+    return _session
+
+
+def configure_http_client(**settings):
+    """
+    Updates retry/backoff and pool sizing (retries, backoff_factor, status_forcelist,
+    pool_connections, pool_maxsize). The shared session is rebuilt on next use.
+    """
+    unknown = set(settings) - set(_settings)
+    if unknown:
+        raise ValueError(f"Unknown HTTP client settings: {', '.join(sorted(unknown))}")
+    with _lock:
+        _settings.update(settings)
+        _reset_locked()
+
+
+def close_http_client():
+    """Closes the shared session and its pooled connections."""
+    with _lock:
+        _reset_locked()
+
+
+def _reset_locked():
+    global _session
+    if _session is not None:
+        _session.close()
+        _session = None
@@ -0,0 +1,154 @@
+# scraper/inference.py
+import pandas as pd
+
+# Cell values treated as missing rather than as text.
+MISSING_VALUES = ["", "-", "--", "..", "...", "…", "n/a", "N/A", "NA", "na", "nan", "None"]
+# Number of non-missing values used to shortlist a column's type before the
+# whole column is converted and checked.
+SAMPLE_SIZE = 200
+
+_SPACES = r"[\s  ']"
+_PLAIN = r"[+-]?\d+"
+# 1,234,567.89 / 12.5
+_DOT_DECIMAL = r"[+-]?(?:\d{1,3}(?:,\d{3})+(?:\.\d+)?|\d*\.\d+)"
+# 1.234.567,89 / 12,5 (French / Portuguese style)
+_COMMA_DECIMAL = r"[+-]?(?:\d{1,3}(?:\.\d{3})+(?:,\d+)?|\d*,\d+)"
+# Unambiguous markers of each convention (e.g. "1,234" could be either).
+_DOT_ONLY = r"[+-]?(?:\d+\.\d{1,2}|\d+\.\d{4,}|\d{1,3}(?:,\d{3})+\.\d+|\d{1,3}(?:,\d{3}){2,})"
+_COMMA_ONLY = r"[+-]?(?:\d+,\d{1,2}|\d+,\d{4,}|\d{1,3}(?:\.\d{3})+,\d+|\d{1,3}(?:\.\d{3}){2,})"
+
+# (regex every value must match, strptime format), tried in order.
+DATE_FORMATS = [
+    (r"\d{4}-\d{2}-\d{2}", "%Y-%m-%d"),
+    (r"\d{4}/\d{2}/\d{2}", "%Y/%m/%d"),
+    (r"\d{1,2}/\d{1,2}/\d{4}", "%d/%m/%Y"),
+    (r"\d{1,2}-\d{1,2}-\d{4}", "%d-%m-%Y"),
+    (r"\d{1,2}\.\d{1,2}\.\d{4}", "%d.%m.%Y"),
+    (r"\d{4}-\d{2}", "%Y-%m"),
+    (r"\d{1,2} [A-Za-z]{3,9} \d{4}", "%d %B %Y"),
+    (r"\d{1,2} [A-Za-z]{3} \d{4}", "%d %b %Y"),
+    (r"[A-Za-z]{3,9} \d{4}", "%B %Y"),
+    (r"[A-Za-z]{3}[ -]\d{4}", "%b %Y"),
+]
+# Day-first numeric formats and their month-first equivalents.
+MONTH_FIRST_FORMATS = {"%d/%m/%Y": "%m/%d/%Y", "%d-%m-%Y": "%m-%d-%Y", "%d.%m.%Y": "%m.%d.%Y"}
+
+
+def _sample(values):
+    if len(values) <= SAMPLE_SIZE:
+        return values
+    return values.sample(SAMPLE_SIZE, random_state=0)
+
+
+def _to_numeric(values):
+    """
+    Converts a column of strings to numbers, or returns None if any value is not a number.
+    Handles thousands separators, decimal commas and percent signs.
+    Returns (numbers, is_percent).
+    """
+    text = values.str.replace(_SPACES, "", regex=True)
+    is_percent = bool(text.str.endswith("%").all())
+    if is_percent:
+        text = text.str[:-1]
+
+    sample = _sample(text)
+    plain = sample.str.fullmatch(_PLAIN)
+    dot = sample.str.fullmatch(_DOT_DECIMAL)
+    comma = sample.str.fullmatch(_COMMA_DECIMAL)
+    if not (plain | dot | comma).all():
+        return None, False
+
+    # Ambiguous values such as "1,234" are read as thousands unless some value
+    # can only be a decimal comma.
+    if text.str.fullmatch(_COMMA_ONLY).any() and not text.str.fullmatch(_DOT_ONLY).any():
+        text = text.str.replace(".", "", regex=False).str.replace(",", ".", regex=False)
+    else:
+        text = text.str.replace(",", "", regex=False)
+
+    numbers = pd.to_numeric(text, errors="coerce")
+    if numbers.isna().any():
+        return None, False
+    return numbers, is_percent
+
+
+def _to_datetime(values):
+    """Converts a column of strings to datetimes, or returns None if no known date format fits every value."""
+    sample = _sample(values)
+    for pattern, fmt in DATE_FORMATS:
+        # The sample only shortlists formats; every value must fit before its fields are read.
+        if not sample.str.fullmatch(pattern).all() or not values.str.fullmatch(pattern).all():
+            continue
+        if fmt in MONTH_FIRST_FORMATS:
+            # Day-first unless the second field can only be a day.
+            parts = values.str.extract(r"^(\d{1,2})\D(\d{1,2})\D").astype(int)
+            if (parts[1] > 12).any() and not (parts[0] > 12).any():
+                fmt = MONTH_FIRST_FORMATS[fmt]
+        dates = pd.to_datetime(values.str.replace("-", " ", regex=False) if fmt == "%b %Y" else values, format=fmt, errors="coerce")
+        if not dates.isna().any():
+            return dates
+    return None
+
+
+def infer_column(column):
+    """
+    Infers the type of a single column of scraped text.
+    Returns (converted_column, type) where type is one of
+    "integer", "float", "percent", "datetime", "string" or "empty".
+    """
+    if column.dtype != "object":
+        return column, detect_series_type(column)
+
+    text = column.astype("string").str.strip()
+    missing = text.isna() | text.isin(MISSING_VALUES)
+    values = text[~missing]
+    if values.empty:
+        return column, "empty"
+
+    numbers, is_percent = _to_numeric(values)
+    if numbers is not None:
+        converted = pd.Series(pd.NA, index=column.index, dtype="Float64")
+        converted[~missing] = numbers
+        integral = bool((numbers % 1 == 0).all())
+        if is_percent:
+            return converted.astype("float64"), "percent"
+        if integral:
+            converted = converted.astype("Int64")
+            return (converted.astype("int64") if not missing.any() else converted), "integer"
+        return converted.astype("float64"), "float"
+
+    dates = _to_datetime(values)
+    if dates is not None:
+        converted = pd.Series(pd.NaT, index=column.index, dtype="datetime64[ns]")
+        converted[~missing] = dates
+        return converted, "datetime"
+
+    return column, "string"
+
+
+def infer_column_types(df):
+    """
+    Converts every column of a scraped table to its inferred type using
+    whole-column string operations. Returns (typed_df, {position: type}).
+    Columns are addressed by position so duplicate headers are handled.
+    """
+    df = df.copy()
+    column_types = {}
+    for position in range(df.shape[1]):
+        converted, column_type = infer_column(df.iloc[:, position])
+        df.isetitem(position, converted)
+        column_types[position] = column_type
+    return df, column_types
+
+
+def detect_series_type(column):
+    """Detects the type of an already typed column without looping over its values."""
+    if pd.api.types.is_bool_dtype(column):
+        return "string"
+    if pd.api.types.is_integer_dtype(column):
+        return "integer"
+    if pd.api.types.is_numeric_dtype(column):
+        values = column.dropna()
+        return "integer" if bool((values % 1 == 0).all()) else "float"
+    if pd.api.types.is_datetime64_any_dtype(column):
+        return "datetime"
+    return "string"
@@ -0,0 +1,200 @@
+# scraper/metrics.py
+import bisect
+import os
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+
+# Histogram bucket upper bounds in seconds (Prometheus "le" labels).
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+MAX_SPANS = 10000
+PROMETHEUS_PREFIX = "scraper"
+
+# Pipeline stages timed by the scraper.
+STAGE_POLITENESS = "politeness_wait"
+STAGE_RESPONSE = "http_response"
+STAGE_DOWNLOAD = "download"
+STAGE_RENDER = "render"
+STAGE_PARSE = "parse"
+STAGE_TABLES = "table_build"
+STAGE_LINKS = "link_filter"
+STAGE_URL = "url_total"
+
+
+class Histogram:
+    """Cumulative-bucket histogram of durations in seconds."""
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+        self.max = max(self.max, value)
+
+    def quantile(self, q):
+        """Estimates a quantile as the upper bound of the bucket holding it."""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(self.buckets, self.counts):
+            seen += count
+            if seen >= rank:
+                return min(bound, self.max)
+        return self.max
+
+    def to_dict(self):
+        return {
+            "count": self.count,
+            "sum": round(self.sum, 6),
+            "mean": round(self.sum / self.count, 6) if self.count else 0.0,
+            "p50": self.quantile(0.5),
+            "p95": self.quantile(0.95),
+            "max": round(self.max, 6),
+            "buckets": dict(zip([str(bound) for bound in self.buckets] + ["+Inf"], self.counts)),
+        }
+
+
+class Metrics:
+    """
+    Counters, per-stage duration histograms and per-URL spans collected while
+    crawling. Thread-safe; exported with to_json() or to_prometheus().
+    """
+
+    def __init__(self, buckets=DEFAULT_BUCKETS, max_spans=MAX_SPANS):
+        self._lock = threading.Lock()
+        self._buckets = buckets
+        self._max_spans = max_spans
+        self.counters = {}
+        self.histograms = {}
+        self.spans = []
+        self.dropped_spans = 0
+        self._started = time.time()
+
+    def incr(self, name, value=1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def observe(self, stage, seconds, url=None, start=None):
+        with self._lock:
+            histogram = self.histograms.get(stage)
+            if histogram is None:
+                histogram = self.histograms[stage] = Histogram(self._buckets)
+            histogram.observe(seconds)
+            if url is None:
+                return
+            if len(self.spans) >= self._max_spans:
+                self.dropped_spans += 1
+                return
+            self.spans.append({
+                "url": url,
+                "stage": stage,
+                "start": round((start or time.time()) - self._started, 6),
+                "seconds": round(seconds, 6),
+                "thread": threading.current_thread().name,
+            })
+
+    @contextmanager
+    def span(self, stage, url=None):
+        start_wall = time.time()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, time.perf_counter() - start, url=url, start=start_wall)
+
+    def url_breakdown(self):
+        """Returns {url: {stage: total seconds}} from the recorded spans."""
+        with self._lock:
+            spans = list(self.spans)
+        breakdown = {}
+        for span in spans:
+            stages = breakdown.setdefault(span["url"], {})
+            stages[span["stage"]] = round(stages.get(span["stage"], 0.0) + span["seconds"], 6)
+        return breakdown
+
+    def to_json(self):
+        with self._lock:
+            data = {
+                "counters": dict(self.counters),
+                "stages": {stage: histogram.to_dict() for stage, histogram in self.histograms.items()},
+                "spans": list(self.spans),
+                "dropped_spans": self.dropped_spans,
+            }
+        data["urls"] = self.url_breakdown()
+        return data
+
+    def to_prometheus(self):
+        """Renders the counters and stage histograms in the Prometheus text exposition format."""
+        lines = []
+        with self._lock:
+            for name, value in sorted(self.counters.items()):
+                metric = f"{PROMETHEUS_PREFIX}_{name}_total"
+                lines += [f"# TYPE {metric} counter", f"{metric} {value}"]
+            metric = f"{PROMETHEUS_PREFIX}_stage_seconds"
+            if self.histograms:
+                lines.append(f"# HELP {metric} Time spent in each scraping pipeline stage.")
+                lines.append(f"# TYPE {metric} histogram")
+            for stage, histogram in sorted(self.histograms.items()):
+                cumulative = 0
+                for bound, count in zip([str(bound) for bound in histogram.buckets] + ["+Inf"], histogram.counts):
+                    cumulative += count
+                    lines.append(f'{metric}_bucket{{stage="{stage}",le="{bound}"}} {cumulative}')
+                lines.append(f'{metric}_sum{{stage="{stage}"}} {histogram.sum:.6f}')
+                lines.append(f'{metric}_count{{stage="{stage}"}} {histogram.count}')
+        return "\n".join(lines) + "\n"
+
+    def reset(self):
+        with self._lock:
+            self.counters = {}
+            self.histograms = {}
+            self.spans = []
+            self.dropped_spans = 0
+            self._started = time.time()
+
+
+_metrics = Metrics() if os.environ.get("SCRAPER_METRICS", "").lower() in ("1", "true", "yes") else None
+_metrics_lock = threading.Lock()
+_NO_SPAN = nullcontext()
+
+
+def get_metrics():
+    """Returns the shared Metrics, or None when instrumentation is disabled (the default)."""
+    return _metrics
+
+
+def configure_metrics(enabled):
+    """Enables (keeping collected data) or disables pipeline instrumentation."""
+    global _metrics
+    with _metrics_lock:
+        if enabled and _metrics is None:
+            _metrics = Metrics()
+        elif not enabled:
+            _metrics = None
+    return _metrics
+
+
+def timed(stage, url=None):
+    """Context manager timing a pipeline stage; a shared no-op when instrumentation is disabled."""
+    metrics = _metrics
+    if metrics is None:
+        return _NO_SPAN
+    return metrics.span(stage, url)
+
+
+def incr(name, value=1):
+    metrics = _metrics
+    if metrics is not None:
+        metrics.incr(name, value)
+
+
+def observe(stage, seconds, url=None):
+    metrics = _metrics
+    if metrics is not None:
+        metrics.observe(stage, seconds, url=url)
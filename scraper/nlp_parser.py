@@ -1,16 +1,84 @@
 
 # scraper/nlp_parser.py
-import spacy
+import threading
+from collections import OrderedDict
+
+MODEL_NAME = "en_core_web_sm"
+# Only part-of-speech tags are used; the dependency parser, NER and lemmatizer are never loaded.
+EXCLUDED_COMPONENTS = ("parser", "ner", "lemmatizer")
+KEYWORD_POS = ("NOUN", "PROPN")
+MEMO_SIZE = 4096
+
+_nlp = None
+_nlp_lock = threading.Lock()
+
+
+def get_nlp():
+    """Loads the spaCy model on first use (ensure you have downloaded 'en_core_web_sm')."""
+    global _nlp
+    if _nlp is None:
+        with _nlp_lock:
+            if _nlp is None:
+                import spacy
+                _nlp = spacy.load(MODEL_NAME, exclude=list(EXCLUDED_COMPONENTS))
+    return _nlp
+
+
+class _Memo:
+    """Thread-safe LRU of query -> keywords."""
+
+    def __init__(self, maxsize=MEMO_SIZE):
+        self.maxsize = maxsize
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, query):
+        with self._lock:
+            if query in self._items:
+                self._items.move_to_end(query)
+                self.hits += 1
+                return self._items[query]
+            self.misses += 1
+            return None
+
+    def put(self, query, keywords):
+        with self._lock:
+            self._items[query] = keywords
+            self._items.move_to_end(query)
+            while len(self._items) > self.maxsize:
+                self._items.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+            self.hits = self.misses = 0
+
+
+_memo = _Memo()
+
+
+def _keywords(doc):
+    # Extract nouns and proper nouns as candidate keywords
+    return tuple(token.text for token in doc if token.pos_ in KEYWORD_POS)
 
-# Load the spaCy model (ensure you have downloaded 'en_core_web_sm')
-nlp = spacy.load("en_core_web_sm")
 
 def parse_query(query: str):
     """
     Process the plain English query and extract keywords.
     This could be extended to perform more complex intent recognition.
     """
-    doc = nlp(query)
-    # Extract nouns and proper nouns as candidate keywords
-    keywords = [token.text for token in doc if token.pos_ in ["NOUN", "PROPN"]]
-    return keywords
+    keywords = _memo.get(query)
+    if keywords is None:
+        keywords = _keywords(get_nlp()(query))
+        _memo.put(query, keywords)
+    return list(keywords)
+
+
+def memo_stats():
+    return {"hits": _memo.hits, "misses": _memo.misses, "entries": len(_memo._items), "max_entries": _memo.maxsize}
+
+
+def clear_memo():
+    _memo.clear()
@@ -0,0 +1,92 @@
+# scraper/page.py
+from .cache import get_page_cache
+from .http_client import get_session
+from .metrics import STAGE_DOWNLOAD, STAGE_PARSE, STAGE_POLITENESS, STAGE_RESPONSE, incr, observe, timed
+from .parsing import make_soup
+from .ratelimit import THROTTLE_RETRIES, THROTTLE_STATUSES, host_slot, wait_before_retry
+from .robots import polite_wait
+
+
+class Page:
+    """
+    A fetched web page. The HTML is downloaded once and parsed lazily into a
+    single BeautifulSoup tree that every extraction stage (tables, file links,
+    pagination) shares. parse_only optionally restricts the tree to the given
+    tag names, which is much cheaper on large pages.
+    """
+
+    def __init__(self, url, content, not_modified=False, parse_only=None):
+        self.url = url
+        self.content = content
+        self.parse_only = parse_only
+        # True when the content is known to be unchanged since it was last cached,
+        # so extraction results stored in the page cache can be reused.
+        self.not_modified = not_modified
+        # True when the page is backed by a page cache entry that results can be stored against.
+        self.cacheable = False
+        self._soup = None
+
+    @property
+    def soup(self):
+        if self._soup is None:
+            with timed(STAGE_PARSE, self.url):
+                self._soup = make_soup(self.content, parse_only=self.parse_only)
+        return self._soup
+
+
+def _get(client, url, timeout, headers):
+    """
+    GET under the host's adaptive rate limit (see ratelimit), retrying 429/503
+    responses after their Retry-After. Records download metrics: http_response
+    is the time until the headers arrived (DNS, connect, server time),
+    download the whole request.
+    """
+    for attempt in range(THROTTLE_RETRIES + 1):
+        with host_slot(url) as feedback:
+            with timed(STAGE_DOWNLOAD, url):
+                response = client.get(url, timeout=timeout, headers=headers)
+            feedback.record(response)
+        if response.status_code not in THROTTLE_STATUSES or attempt == THROTTLE_RETRIES:
+            break
+        incr("throttled")
+        wait_before_retry(url, feedback, attempt)
+    observe(STAGE_RESPONSE, response.elapsed.total_seconds(), url)
+    incr("http_requests")
+    incr("bytes_downloaded", len(response.content))
+    if response.status_code == 304:
+        incr("not_modified")
+    if not response.ok:
+        incr("http_errors")
+    response.raise_for_status()
+    return response
+
+
+def fetch_page(url, session=None, timeout=10, use_cache=True, parse_only=None):
+    """
+    Downloads a page and wraps it in a Page.
+    robots.txt is enforced and requests to a host are spaced by its Crawl-delay.
+    When the page cache is enabled, a conditional request is sent and a 304
+    response is served from the cached body.
+    Raises requests.exceptions.RequestException on network or HTTP errors,
+    including DisallowedByRobots.
+    """
+    with timed(STAGE_POLITENESS, url):
+        polite_wait(url)
+    client = session if session is not None else get_session()
+    cache = get_page_cache() if use_cache else None
+    headers = cache.conditional_headers(url) if cache is not None else {}
+    response = _get(client, url, timeout, headers)
+    if cache is None:
+        return Page(url, response.content, parse_only=parse_only)
+    if response.status_code == 304:
+        body = cache.get_body(url)
+        if body is not None:
+            page = Page(url, body, not_modified=True, parse_only=parse_only)
+            page.cacheable = True
+            return page
+        # The cached copy disappeared; fetch it again unconditionally.
+        response = _get(client, url, timeout, {})
+    unchanged = cache.store(url, response.content, etag=response.headers.get("ETag"), last_modified=response.headers.get("Last-Modified"))
+    page = Page(url, response.content, not_modified=unchanged, parse_only=parse_only)
+    page.cacheable = True
+    return page
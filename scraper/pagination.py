@@ -0,0 +1,71 @@
+# scraper/pagination.py
+import re
+from urllib.parse import urljoin
+from .dedup import canonical_url
+
+# ?page=3, &p=3, ?paged=3 ... and /page/3/ style pagination URLs.
+PAGE_QUERY_RE = re.compile(r"([?&](?:page|p|pg|paged|pagina|page_no)=)(\d+)", re.IGNORECASE)
+PAGE_PATH_RE = re.compile(r"(/(?:page|pagina)/)(\d+)(?=/|$)", re.IGNORECASE)
+
+
+def page_key(url):
+    """Key used to detect duplicate page URLs (see canonical_url)."""
+    return canonical_url(url)
+
+
+def find_next_url(soup, current_url):
+    """Returns the absolute URL of the page's "Next" link, or None."""
+    next_link = soup.find("a", string="Next")
+    if next_link and next_link.get("href"):
+        return urljoin(current_url, next_link["href"])
+    return None
+
+
+def _page_number(url):
+    match = PAGE_QUERY_RE.search(url) or PAGE_PATH_RE.search(url)
+    return (int(match.group(2)), match) if match else (None, None)
+
+
+def _url_for_page(template_url, template_match, number):
+    start, end = template_match.span(2)
+    return template_url[:start] + str(number) + template_url[end:]
+
+
+def discover_page_urls(soup, current_url, max_pages):
+    """
+    Works out the URLs of pages 2..N up front from numbered page links and
+    ?page=N / /page/N/ URL patterns, capped at max_pages pages in total.
+
+    Returns (urls, complete). `urls` is None when the page set cannot be known
+    ahead of time. `complete` is False when the listing may continue past the
+    discovered pages (e.g. "1 2 3 ... Next"), so the caller should keep
+    following Next links from the last one.
+    """
+    numbered = {}
+    template = None
+    for a in soup.find_all("a", href=True):
+        url = urljoin(current_url, a["href"])
+        text = a.get_text(strip=True)
+        if text.isdigit():
+            numbered.setdefault(int(text), url)
+        if template is None:
+            number, match = _page_number(url)
+            if number is not None:
+                template = (url, match)
+
+    if not numbered:
+        return None, False
+
+    highest = max(numbered)
+    last = min(highest, max_pages)
+    urls = []
+    for number in range(2, last + 1):
+        url = numbered.get(number)
+        if url is None and template is not None:
+            url = _url_for_page(template[0], template[1], number)
+        if url is None:
+            # A gap we cannot fill (e.g. "1 2 ... 9 10" without a URL pattern).
+            return urls or None, False
+        urls.append(url)
+    complete = highest <= max_pages and find_next_url(soup, current_url) is None
+    return urls, complete or last >= max_pages
@@ -0,0 +1,73 @@
+# scraper/parsing.py
+import logging
+import os
+from bs4 import BeautifulSoup, SoupStrainer
+
+try:
+    import lxml  # noqa: F401  (C-backed tree builder used by BeautifulSoup)
+    LXML_AVAILABLE = True
+except ImportError:
+    LXML_AVAILABLE = False
+
+FALLBACK_PARSER = "html.parser"
+SUPPORTED_PARSERS = ("lxml", FALLBACK_PARSER)
+# Only these tags are needed to extract tables, file links and pagination links.
+EXTRACTION_TAGS = ("table", "a")
+HEADING_TAGS = ("h1", "h2", "h3", "h4", "h5", "h6")
+# Elements before a table that describe it (besides its <caption>); table_keyword is looked for there.
+TABLE_CONTEXT_TAGS = HEADING_TAGS + ("p",)
+
+_parser = None
+
+
+def default_parser():
+    """
+    Returns the BeautifulSoup backend to use: the SCRAPER_HTML_PARSER environment
+    variable if set, otherwise lxml when installed, otherwise html.parser.
+    """
+    requested = os.environ.get("SCRAPER_HTML_PARSER")
+    if requested:
+        if requested not in SUPPORTED_PARSERS:
+            raise ValueError(f"Unsupported HTML parser '{requested}'. Choose one of: {', '.join(SUPPORTED_PARSERS)}")
+        if requested == "lxml" and not LXML_AVAILABLE:
+            logging.warning("lxml requested but not installed; falling back to html.parser.")
+            return FALLBACK_PARSER
+        return requested
+    return "lxml" if LXML_AVAILABLE else FALLBACK_PARSER
+
+
+def get_parser():
+    global _parser
+    if _parser is None:
+        _parser = default_parser()
+    return _parser
+
+
+def set_parser(parser):
+    """Overrides the parser backend (None restores the default)."""
+    global _parser
+    if parser is not None and parser not in SUPPORTED_PARSERS:
+        raise ValueError(f"Unsupported HTML parser '{parser}'. Choose one of: {', '.join(SUPPORTED_PARSERS)}")
+    if parser == "lxml" and not LXML_AVAILABLE:
+        raise ValueError("lxml is not installed.")
+    _parser = parser
+
+
+def make_soup(markup, parse_only=None, parser=None):
+    """
+    Parses HTML with the configured backend.
+    parse_only is an optional sequence of tag names; when given, only those
+    elements (and their contents) are built into the tree.
+    """
+    strainer = SoupStrainer(list(parse_only)) if parse_only else None
+    return BeautifulSoup(markup, parser or get_parser(), parse_only=strainer)
+
+
+def extraction_tags(table_keyword=""):
+    """
+    Returns the tags to restrict parsing to for table/link extraction, or
+    None (the full tree) with a table_keyword: the text it is matched against
+    depends on which elements precede a table (see filters.TableFilter), so a
+    restricted tree would change the result.
+    """
+    return None if table_keyword else EXTRACTION_TAGS
@@ -0,0 +1,267 @@
+# scraper/ratelimit.py
+import email.utils
+import logging
+import threading
+import time
+from contextlib import contextmanager
+import requests
+from .crawler import DEFAULT_PER_HOST_LIMIT, host_of
+
+DEFAULT_MIN_LIMIT = 1
+DEFAULT_MAX_LIMIT = 16
+# Multiplicative decrease applied to a host's concurrency when it struggles.
+DEFAULT_DECREASE = 0.5
+# A response this many times slower than the host's best is treated as congestion...
+DEFAULT_SLOW_FACTOR = 4.0
+# ...as long as it also took at least this long (fast hosts jitter a lot in relative terms).
+DEFAULT_SLOW_FLOOR = 1.0
+DEFAULT_MAX_RETRY_AFTER = 300.0
+EWMA_ALPHA = 0.2
+# Responses asking us to slow down; retried after Retry-After (or a backoff).
+THROTTLE_STATUSES = (429, 503)
+THROTTLE_RETRIES = 3
+# Pause before retrying a throttled request that came without Retry-After (doubles per retry).
+THROTTLE_BACKOFF = 1.0
+
+
+def parse_retry_after(value, now=None):
+    """Returns the seconds to wait from a Retry-After header (delta-seconds or HTTP-date), or None."""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        when = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when is None:
+        return None
+    return max(0.0, when.timestamp() - (now if now is not None else time.time()))
+
+
+class HostState:
+    """Adaptive concurrency window and health statistics of one host."""
+
+    def __init__(self, limit):
+        self.limit = float(limit)
+        self.in_flight = 0
+        self.latency = None
+        self.best_latency = None
+        self.error_rate = 0.0
+        self.blocked_until = 0.0
+        self.last_decrease = 0.0
+        self.requests = 0
+        self.throttled = 0
+
+    def to_dict(self):
+        return {
+            "limit": round(self.limit, 2),
+            "in_flight": self.in_flight,
+            "latency": round(self.latency, 3) if self.latency is not None else None,
+            "best_latency": round(self.best_latency, 3) if self.best_latency is not None else None,
+            "error_rate": round(self.error_rate, 3),
+            "blocked_for": round(max(0.0, self.blocked_until - time.monotonic()), 1),
+            "requests": self.requests,
+            "throttled": self.throttled,
+        }
+
+
+class RequestFeedback:
+    """
+    Outcome of one request, filled in by the caller inside AdaptiveRateController.slot().
+    record() also takes the latency from the response (time until its
+    headers arrived), so reading a large body does not count as server delay.
+    """
+
+    def __init__(self):
+        self.status = None
+        self.retry_after = None
+        self.latency = None
+
+    def record(self, response):
+        self.status = response.status_code
+        self.retry_after = parse_retry_after(response.headers.get("Retry-After"))
+        self.latency = response.elapsed.total_seconds()
+
+
+class AdaptiveRateController:
+    """
+    Per-host AIMD concurrency control.
+
+    Each host gets a concurrency window starting at `initial_limit`. Every
+    healthy response grows it by about one request per window (additive
+    increase, up to max_limit); a 429/5xx, a timeout or a response much slower
+    than the host's best shrinks it by `decrease` (multiplicative decrease,
+    at most once per response time). A Retry-After header pauses only that
+    host. Slow servers therefore end up with few parallel requests and fast
+    ones with many.
+    """
+
+    def __init__(self, initial_limit=DEFAULT_PER_HOST_LIMIT, min_limit=DEFAULT_MIN_LIMIT, max_limit=DEFAULT_MAX_LIMIT,
+                 decrease=DEFAULT_DECREASE, slow_factor=DEFAULT_SLOW_FACTOR, slow_floor=DEFAULT_SLOW_FLOOR,
+                 max_retry_after=DEFAULT_MAX_RETRY_AFTER):
+        self.initial_limit = initial_limit
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.decrease = decrease
+        self.slow_factor = slow_factor
+        self.slow_floor = slow_floor
+        self.max_retry_after = max_retry_after
+        self._hosts = {}
+        self._cond = threading.Condition()
+
+    def _state(self, host, initial=None):
+        state = self._hosts.get(host)
+        if state is None:
+            limit = min(max(initial or self.initial_limit, self.min_limit), self.max_limit)
+            state = self._hosts[host] = HostState(limit)
+        return state
+
+    def limit(self, host, initial=None):
+        """Current number of concurrent requests allowed to a host."""
+        with self._cond:
+            return max(self.min_limit, int(self._state(host, initial).limit))
+
+    def ready_in(self, host):
+        """Seconds until the host may be contacted again (0 unless a Retry-After is pending)."""
+        with self._cond:
+            state = self._hosts.get(host)
+            return max(0.0, state.blocked_until - time.monotonic()) if state else 0.0
+
+    def acquire(self, url):
+        """Blocks until a request to url's host fits in its window and is not paused by Retry-After."""
+        host = host_of(url)
+        with self._cond:
+            while True:
+                state = self._state(host)
+                wait = state.blocked_until - time.monotonic()
+                if wait <= 0 and state.in_flight < max(self.min_limit, int(state.limit)):
+                    state.in_flight += 1
+                    state.requests += 1
+                    return
+                self._cond.wait(timeout=wait if wait > 0 else None)
+
+    def release(self, url, latency, status=None, error=None, retry_after=None):
+        """Frees the request's slot and adapts the host's window to how the request went."""
+        host = host_of(url)
+        now = time.monotonic()
+        with self._cond:
+            state = self._state(host)
+            state.in_flight = max(0, state.in_flight - 1)
+            overloaded = error is not None or (status is not None and (status in THROTTLE_STATUSES or status >= 500))
+            state.error_rate += EWMA_ALPHA * ((1.0 if overloaded else 0.0) - state.error_rate)
+            if status in THROTTLE_STATUSES:
+                state.throttled += 1
+            if retry_after is not None:
+                self._pause_locked(state, host, retry_after, now)
+            if not overloaded:
+                state.latency = latency if state.latency is None else state.latency + EWMA_ALPHA * (latency - state.latency)
+                state.best_latency = latency if state.best_latency is None else min(state.best_latency, latency)
+                congested = latency > self.slow_floor and latency > self.slow_factor * state.best_latency
+            else:
+                congested = True
+            if congested:
+                # One decrease per response time, so a burst of failures of requests sent together counts once.
+                if now - state.last_decrease > (state.latency or latency or 0.0):
+                    state.limit = max(self.min_limit, state.limit * self.decrease)
+                    state.last_decrease = now
+            else:
+                state.limit = min(self.max_limit, state.limit + 1.0 / state.limit)
+            self._cond.notify_all()
+
+    def pause(self, url, seconds):
+        """Stops new requests to url's host for `seconds` (capped at max_retry_after); other hosts are unaffected."""
+        host = host_of(url)
+        with self._cond:
+            self._pause_locked(self._state(host), host, seconds, time.monotonic())
+            self._cond.notify_all()
+
+    def _pause_locked(self, state, host, seconds, now):
+        pause = min(seconds, self.max_retry_after)
+        state.blocked_until = max(state.blocked_until, now + pause)
+        logging.warning(f"{host} asked us to slow down; pausing requests to it for {pause:.0f}s")
+
+    @contextmanager
+    def slot(self, url):
+        """Holds a request slot for url's host; record the response on the yielded RequestFeedback."""
+        self.acquire(url)
+        feedback = RequestFeedback()
+        start = time.perf_counter()
+        error = None
+        try:
+            yield feedback
+        except (requests.exceptions.Timeout, requests.exceptions.ConnectionError) as e:
+            error = e
+            raise
+        finally:
+            latency = feedback.latency if feedback.latency is not None else time.perf_counter() - start
+            self.release(url, latency, status=feedback.status, error=error, retry_after=feedback.retry_after)
+
+    def stats(self):
+        with self._cond:
+            return {host: state.to_dict() for host, state in self._hosts.items()}
+
+
+@contextmanager
+def _unlimited(url):
+    yield RequestFeedback()
+
+
+_controller = None
+_settings = {
+    "enabled": True,
+    "initial_limit": DEFAULT_PER_HOST_LIMIT,
+    "min_limit": DEFAULT_MIN_LIMIT,
+    "max_limit": DEFAULT_MAX_LIMIT,
+    "decrease": DEFAULT_DECREASE,
+    "slow_factor": DEFAULT_SLOW_FACTOR,
+    "slow_floor": DEFAULT_SLOW_FLOOR,
+    "max_retry_after": DEFAULT_MAX_RETRY_AFTER,
+}
+_lock = threading.Lock()
+
+
+def get_rate_controller():
+    """Returns the shared AdaptiveRateController, or None if adaptive rate control is disabled."""
+    global _controller
+    if not _settings["enabled"]:
+        return None
+    if _controller is None:
+        with _lock:
+            if _controller is None and _settings["enabled"]:
+                _controller = AdaptiveRateController(**{key: value for key, value in _settings.items() if key != "enabled"})
+    return _controller
+
+
+def configure_rate_control(**settings):
+    """Changes enabled, initial_limit, min_limit, max_limit, decrease, slow_factor, slow_floor or max_retry_after."""
+    global _controller
+    unknown = set(settings) - set(_settings)
+    if unknown:
+        raise ValueError(f"Unknown rate control settings: {', '.join(sorted(unknown))}")
+    with _lock:
+        _settings.update(settings)
+        _controller = None
+
+
+def wait_before_retry(url, feedback, attempt):
+    """
+    Waits out a throttled (429/503) response before retrying: the host is
+    paused in the shared controller, so only requests to that host wait, or
+    without adaptive control the calling thread sleeps.
+    """
+    seconds = feedback.retry_after if feedback.retry_after is not None else THROTTLE_BACKOFF * 2 ** attempt
+    controller = get_rate_controller()
+    if controller is not None:
+        # A Retry-After already paused the host when the slot was released.
+        if feedback.retry_after is None:
+            controller.pause(url, seconds)
+    else:
+        time.sleep(min(seconds, DEFAULT_MAX_RETRY_AFTER))
+
+
+def host_slot(url):
+    """Request slot for url's host from the shared controller (a no-op when adaptive control is disabled)."""
+    controller = get_rate_controller()
+    return controller.slot(url) if controller is not None else _unlimited(url)
@@ -0,0 +1,247 @@
+# scraper/robots.py
+import logging
+import re
+import threading
+import time
+from urllib.parse import unquote, urljoin, urlsplit
+import requests
+from .http_client import get_session
+
+# Product token matched against robots.txt User-agent lines (the token our requests send).
+DEFAULT_USER_AGENT = "python-requests"
+DEFAULT_ROBOTS_TTL = 24 * 60 * 60
+# Failed robots.txt fetches are retried sooner than successful ones are refreshed.
+FAILED_ROBOTS_TTL = 5 * 60
+# Upper bound applied to Crawl-delay values so one site cannot stall a crawl.
+MAX_CRAWL_DELAY = 10.0
+
+
+class DisallowedByRobots(requests.exceptions.RequestException):
+    """Raised when robots.txt does not allow fetching a URL."""
+
+
+class RobotsRules:
+    """
+    Parsed robots.txt rules for one user agent, evaluated as in RFC 9309:
+    the most specific (longest) matching rule wins, Allow wins ties, and
+    '*' / '$' wildcards are supported.
+    """
+
+    def __init__(self, rules=None, crawl_delay=None, sitemaps=None, allow_all=False, disallow_all=False):
+        self.rules = rules or []  # [(compiled pattern, pattern length, allow)]
+        self.crawl_delay = crawl_delay
+        self.sitemaps = sitemaps or []
+        self.allow_all = allow_all
+        self.disallow_all = disallow_all
+
+    @classmethod
+    def parse(cls, text, user_agent=DEFAULT_USER_AGENT):
+        groups = []  # [(agents, rules, crawl_delay)]
+        sitemaps = []
+        agents, rules, delay = [], [], None
+        in_rules = False
+        for raw_line in text.splitlines():
+            line = raw_line.split("#", 1)[0].strip()
+            if ":" not in line:
+                continue
+            field, value = (part.strip() for part in line.split(":", 1))
+            field = field.lower()
+            if field == "user-agent":
+                if in_rules:
+                    groups.append((agents, rules, delay))
+                    agents, rules, delay = [], [], None
+                    in_rules = False
+                agents.append(_product_token(value))
+            elif field in ("allow", "disallow"):
+                in_rules = True
+                if value:
+                    rules.append((value, field == "allow"))
+            elif field == "crawl-delay":
+                in_rules = True
+                try:
+                    delay = float(value)
+                except ValueError:
+                    pass
+            elif field == "sitemap":
+                sitemaps.append(value)
+        if agents:
+            groups.append((agents, rules, delay))
+
+        # RFC 9309 2.2.1: the product token is matched case-insensitively, as a whole.
+        token = _product_token(user_agent)
+        matched = [group for group in groups if token in group[0]]
+        if not matched:
+            matched = [group for group in groups if "*" in group[0]]
+        merged_rules, crawl_delay = [], None
+        for _, group_rules, group_delay in matched:
+            merged_rules.extend(group_rules)
+            if group_delay is not None:
+                crawl_delay = group_delay
+        compiled = [(_compile(pattern), len(pattern), allow) for pattern, allow in merged_rules]
+        return cls(compiled, crawl_delay, sitemaps)
+
+    def can_fetch(self, url):
+        if self.allow_all:
+            return True
+        if self.disallow_all:
+            return False
+        parts = urlsplit(url)
+        path = unquote(parts.path or "/") + (f"?{parts.query}" if parts.query else "")
+        best = None
+        for pattern, length, allow in self.rules:
+            if pattern.match(path) and (best is None or length > best[0] or (length == best[0] and allow)):
+                best = (length, allow)
+        return True if best is None else best[1]
+
+
+def _product_token(user_agent):
+    """Product token of a user agent, lowercased: 'Googlebot/2.1 (+http://...)' -> 'googlebot'."""
+    return user_agent.strip().split("/", 1)[0].split(None, 1)[0].lower() if user_agent.strip() else ""
+
+
+def _compile(pattern):
+    anchored = pattern.endswith("$")
+    if anchored:
+        pattern = pattern[:-1]
+    regex = ".*".join(re.escape(unquote(part)) for part in pattern.split("*"))
+    return re.compile(regex + ("$" if anchored else ""))
+
+
+class RobotsCache:
+    """Per-host cache of robots.txt rules with a time-to-live."""
+
+    def __init__(self, ttl=DEFAULT_ROBOTS_TTL, user_agent=DEFAULT_USER_AGENT):
+        self.ttl = ttl
+        self.user_agent = user_agent
+        self._lock = threading.Lock()
+        self._entries = {}  # origin -> (expires_at, RobotsRules)
+        self._fetch_locks = {}
+
+    def _fetch(self, origin):
+        robots_url = urljoin(origin, "/robots.txt")
+        try:
+            response = get_session().get(robots_url, timeout=5)
+        except requests.exceptions.RequestException as e:
+            # Unreachable robots.txt: assume complete disallow (RFC 9309 section 2.3.1.4).
+            logging.error(f"Error fetching {robots_url}: {e}")
+            return RobotsRules(disallow_all=True), FAILED_ROBOTS_TTL
+        if response.status_code >= 500:
+            return RobotsRules(disallow_all=True), FAILED_ROBOTS_TTL
+        if response.status_code >= 400:
+            # Unavailable robots.txt (404 etc.): no restrictions.
+            return RobotsRules(allow_all=True), self.ttl
+        return RobotsRules.parse(response.text, self.user_agent), self.ttl
+
+    def rules(self, url):
+        parts = urlsplit(url)
+        origin = f"{parts.scheme}://{parts.netloc.lower()}"
+        with self._lock:
+            entry = self._entries.get(origin)
+            if entry and entry[0] > time.monotonic():
+                return entry[1]
+            fetch_lock = self._fetch_locks.setdefault(origin, threading.Lock())
+        # Only one thread fetches a given host's robots.txt at a time.
+        with fetch_lock:
+            with self._lock:
+                entry = self._entries.get(origin)
+                if entry and entry[0] > time.monotonic():
+                    return entry[1]
+            rules, ttl = self._fetch(origin)
+            with self._lock:
+                self._entries[origin] = (time.monotonic() + ttl, rules)
+            return rules
+
+    def can_fetch(self, url):
+        return self.rules(url).can_fetch(url)
+
+    def crawl_delay(self, url):
+        return self.rules(url).crawl_delay
+
+    def sitemaps(self, url):
+        return self.rules(url).sitemaps
+
+
+class PolitenessScheduler:
+    """
+    Spaces requests to each host by its robots.txt Crawl-delay (or a default
+    delay). Waiting for one host never blocks requests to other hosts.
+    """
+
+    def __init__(self, robots, default_delay=0.0, max_delay=MAX_CRAWL_DELAY):
+        self.robots = robots
+        self.default_delay = default_delay
+        self.max_delay = max_delay
+        self._lock = threading.Lock()
+        self._next_slot = {}
+
+    def delay_for(self, url):
+        delay = self.robots.crawl_delay(url)
+        if delay is None:
+            delay = self.default_delay
+        return min(max(delay, 0.0), self.max_delay)
+
+    def wait(self, url):
+        """Blocks until a request to url's host is allowed, and reserves the following slot."""
+        delay = self.delay_for(url)
+        if delay <= 0:
+            return
+        host = urlsplit(url).netloc.lower()
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next_slot.get(host, now))
+            self._next_slot[host] = start + delay
+        if start > now:
+            time.sleep(start - now)
+
+
+_robots_cache = None
+_scheduler = None
+_settings = {"enabled": True, "ttl": DEFAULT_ROBOTS_TTL, "user_agent": DEFAULT_USER_AGENT, "default_delay": 0.0, "max_delay": MAX_CRAWL_DELAY}
+_lock = threading.Lock()
+
+
+def get_robots_cache():
+    global _robots_cache
+    if _robots_cache is None:
+        with _lock:
+            if _robots_cache is None:
+                _robots_cache = RobotsCache(_settings["ttl"], _settings["user_agent"])
+    return _robots_cache
+
+
+def get_scheduler():
+    """Returns the shared PolitenessScheduler, or None if politeness is disabled."""
+    global _scheduler
+    if not _settings["enabled"]:
+        return None
+    if _scheduler is None:
+        robots = get_robots_cache()
+        with _lock:
+            if _scheduler is None:
+                _scheduler = PolitenessScheduler(robots, _settings["default_delay"], _settings["max_delay"])
+    return _scheduler
+
+
+def configure_politeness(**settings):
+    """Changes enabled, ttl, user_agent, default_delay or max_delay; caches are rebuilt on next use."""
+    global _robots_cache, _scheduler
+    unknown = set(settings) - set(_settings)
+    if unknown:
+        raise ValueError(f"Unknown politeness settings: {', '.join(sorted(unknown))}")
+    with _lock:
+        _settings.update(settings)
+        _robots_cache = None
+        _scheduler = None
+
+
+def polite_wait(url):
+    """
+    Enforces robots.txt before a request: raises DisallowedByRobots if the URL
+    is disallowed, otherwise waits for the host's next crawl slot.
+    """
+    scheduler = get_scheduler()
+    if scheduler is None:
+        return
+    if not scheduler.robots.can_fetch(url):
+        raise DisallowedByRobots(f"Scraping disallowed by robots.txt: {url}")
+    scheduler.wait(url)
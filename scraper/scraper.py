@@ -1,40 +1,32 @@
 # scraper/scraper.py
 import requests
-from bs4 import BeautifulSoup
 import pandas as pd
-from .utils import check_robots_txt  # Assuming check_robots_txt is in utils.py
-from selenium import webdriver
-from selenium.webdriver.chrome.options import Options
-import time
-import re
 import logging
+from .browser import get_browser_pool, wait_until_ready
+from .page import Page, fetch_page
+from .filters import MIN_TABLE_COLS, MIN_TABLE_ROWS, TableFilter
+from .parsing import extraction_tags
+from .inference import infer_column_types, detect_series_type
+from .metrics import STAGE_POLITENESS, STAGE_RENDER, STAGE_TABLES, incr, timed
+from .ratelimit import host_slot
+from .robots import DisallowedByRobots, polite_wait
 
 
 def detect_column_type(column):
     """Detect the data type of a column."""
-    if pd.api.types.is_numeric_dtype(column):
-        if all(x % 1 == 0 for x in column if pd.notna(x)):
-            return "integer"
-        else:
-            return "float"
-    elif pd.api.types.is_datetime64_any_dtype(column):
-        return "datetime"
-    else:
-        return "string"
-
+    return detect_series_type(column)
 
-def extract_table_data(table_tag, table_id, table_class, table_keyword):
-    """Extracts data from a table tag, handling identification heuristics."""
 
-    if table_id and table_tag.get("id") != table_id:
-        return None
-    if table_class and table_tag.get("class") != [table_class]:
+def extract_table_data(table_tag, table_id="", table_class="", table_keyword="", min_rows=MIN_TABLE_ROWS, min_cols=MIN_TABLE_COLS, table_filter=None):
+    """
+    Extracts data from a table tag, handling identification heuristics (see
+    filters.TableFilter). Returns None for a table that does not pass them.
+    """
+    table_filter = table_filter or TableFilter(table_id, table_class, table_keyword, min_rows, min_cols)
+    rows = table_filter.rows(table_tag)
+    if rows is None:
         return None
-    if table_keyword:
-        if not table_tag.parent or table_keyword.lower() not in table_tag.parent.text.lower():
-            return None
 
-    rows = table_tag.find_all("tr")
     data = []
     for row in rows:
         cols = row.find_all(["th", "td"])
@@ -46,79 +38,95 @@ def extract_table_data(table_tag, table_id, table_class, table_keyword):
     df = pd.DataFrame(data[1:], columns=data[0]) if len(data) > 1 else pd.DataFrame()
     if not df.empty:
         logging.info(f"Found a table with ID: {table_tag.get('id')} , class: {table_tag.get('class')}")
-        for col in df.columns:
-            if df[col].dtype == "object":
-                df[col] = pd.to_numeric(df[col], errors='ignore')
-                if all(isinstance(x, (int, float)) for x in df[col]):
-                    continue
-                if all(re.fullmatch(r'\d{4}-\d{2}-\d{2}', str(x)) for x in df[col]):
-                    df[col] = pd.to_datetime(df[col], errors='coerce')
+        df, column_types = infer_column_types(df)
+        df.attrs["column_types"] = column_types
 
     return df
 
 
-def extract_static_data(url: str, table_id="", table_class="", table_keyword="") -> list:
+def extract_tables(soup, url, table_id="", table_class="", table_keyword="", min_rows=MIN_TABLE_ROWS, min_cols=MIN_TABLE_COLS) -> list:
     """
-    Extracts tabular data from a static webpage.
-    Checks robots.txt and uses BeautifulSoup to parse HTML.
+    Extracts every matching table from an already parsed page. Tables are
+    selected by id/class first and checked against the keyword and size
+    thresholds before any of their cells are read.
     """
-    # Check robots.txt for ethical scraping (commented out for now)
-    # if not check_robots_txt(url):
-    #     raise Exception("Scraping disallowed by robots.txt.")
+    table_filter = TableFilter(table_id, table_class, table_keyword, min_rows, min_cols)
+    tables = table_filter.select(soup)
+    if tables:
+        logging.info(f"Found {len(tables)} tables matching {table_filter.selector} in url:{url}")
+        all_tables_data = []
+        filtered = 0
+        with timed(STAGE_TABLES, url):
+            for table in tables:
+                df = extract_table_data(table, table_filter=table_filter)
+                if df is None:
+                    filtered += 1
+                elif not df.empty:
+                    all_tables_data.append(df)
+        incr("tables_filtered", filtered)
+        incr("tables_extracted", len(all_tables_data))
+        return all_tables_data
+    else:
+        logging.info(f"No tables matching {table_filter.selector} found in url: {url}")
+        return []
+
 
+def fetch_static_page(url: str, parse_only=None):
+    """
+    Downloads a static webpage once so that tables and file links can both be
+    extracted from the same parse tree. Returns None if the page cannot be fetched.
+    """
+    # robots.txt rules and Crawl-delay are enforced inside fetch_page.
     try:
-        response = requests.get(url, timeout=10)
-        response.raise_for_status()
+        return fetch_page(url, parse_only=parse_only)
     except requests.exceptions.RequestException as e:
         logging.error(f"Error accessing URL {url}: {e}")
-        return []
+        return None
 
-    soup = BeautifulSoup(response.content, "html.parser")
 
-    tables = soup.find_all("table")
-    if tables:
-        logging.info(f"Found {len(tables)} tables in url:{url}")
-        all_tables_data = []
-        for table in tables:
-            df = extract_table_data(table, table_id, table_class, table_keyword)
-            if df is not None and not df.empty:
-                all_tables_data.append(df)
-        return all_tables_data
-    else:
-        logging.info(f"No tables found in url: {url}")
+def extract_static_data(url: str, table_id="", table_class="", table_keyword="", min_rows=MIN_TABLE_ROWS, min_cols=MIN_TABLE_COLS) -> list:
+    """
+    Extracts tabular data from a static webpage.
+    Checks robots.txt and uses BeautifulSoup to parse HTML.
+    """
+    page = fetch_static_page(url, parse_only=extraction_tags(table_keyword))
+    if page is None:
         return []
+    return extract_tables(page.soup, url, table_id, table_class, table_keyword, min_rows, min_cols)
 
 
-def extract_dynamic_data(url: str, table_id="", table_class="", table_keyword="") -> list:
+def fetch_dynamic_page(url: str, parse_only=None):
     """
-    Extracts tabular data from a dynamic webpage using Selenium.
+    Renders a dynamic webpage with a pooled headless browser and returns it as a Page.
+    robots.txt, Crawl-delay and the host's rate limit apply as for fetch_page.
+    Returns None if the page cannot be rendered.
     """
-    options = Options()
-    options.headless = True  # Run in headless mode (no visible browser)
     try:
-        driver = webdriver.Chrome(options=options)
-        driver.get(url)
-        # Wait for JavaScript to load content (adjust as necessary)
-        time.sleep(5)  # Consider using WebDriverWait for more reliable waiting
-        page_source = driver.page_source
+        with timed(STAGE_POLITENESS, url):
+            polite_wait(url)
+    except DisallowedByRobots as e:
+        logging.error(f"Error during dynamic extraction from {url}: {e}")
+        return None
+    pool = get_browser_pool()
+    try:
+        with timed(STAGE_RENDER, url), pool.lease() as driver:
+            with host_slot(url):
+                driver.get(url)
+            # Wait for a table to render or the network to go quiet, instead of a fixed sleep.
+            wait_until_ready(driver, timeout=pool.page_timeout)
+            page_source = driver.page_source
     except Exception as e:
         logging.error(f"Error during dynamic extraction from {url}: {e}")
-        return []
-    finally:
-        driver.quit()
+        return None
 
-    # Continue processing with BeautifulSoup
-    soup = BeautifulSoup(page_source, "html.parser")
-    tables = soup.find_all("table")
-    if tables:
-        logging.info(f"Found {len(tables)} tables in url:{url}")
-        all_tables_data = []
-        for table in tables:
-            df = extract_table_data(table, table_id, table_class, table_keyword)
-            if df is not None and not df.empty:
-                all_tables_data.append(df)
-        return all_tables_data
-    else:
-        logging.info(f"No tables found in url: {url}")
-        return []
+    return Page(url, page_source, parse_only=parse_only)
 
+
+def extract_dynamic_data(url: str, table_id="", table_class="", table_keyword="", min_rows=MIN_TABLE_ROWS, min_cols=MIN_TABLE_COLS) -> list:
+    """
+    Extracts tabular data from a dynamic webpage using Selenium.
+    """
+    page = fetch_dynamic_page(url, parse_only=extraction_tags(table_keyword))
+    if page is None:
+        return []
+    return extract_tables(page.soup, url, table_id, table_class, table_keyword, min_rows, min_cols)
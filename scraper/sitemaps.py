@@ -0,0 +1,251 @@
+# scraper/sitemaps.py
+import logging
+import xml.etree.ElementTree as ET
+import zlib
+from collections import deque, namedtuple
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from urllib.parse import unquote, urljoin, urlsplit
+import requests
+from .downloads import open_stream
+from .filters import file_name_of
+from .metrics import incr
+from .robots import get_robots_cache, polite_wait
+
+# Tried in order when robots.txt lists no sitemaps (generic, WordPress and Drupal locations);
+# the first one that parses is used.
+DEFAULT_SITEMAP_PATHS = ("/sitemap.xml", "/sitemap_index.xml", "/wp-sitemap.xml", "/feed/", "/rss.xml")
+# Per site, so a huge sitemap index cannot turn discovery into a crawl of its own.
+MAX_SITEMAPS = 200
+# HTML pages listed in sitemaps whose slug matches the keywords, fetched per site to find the files they link.
+MAX_PAGES = 100
+SITEMAP_TIMEOUT = 30
+READ_SIZE = 64 * 1024
+GZIP_MAGIC = b"\x1f\x8b"
+
+SitemapEntry = namedtuple("SitemapEntry", ["url", "lastmod", "is_sitemap"])
+# links: [(source URL, [file links])]; pages: page URLs to fetch for file links;
+# lastmods: {url: (lastmod, parent sitemap)} to save() once the pages were processed.
+SiteDiscovery = namedtuple("SiteDiscovery", ["links", "pages", "lastmods"])
+
+
+def parse_lastmod(value):
+    """Returns a W3C datetime (sitemaps, Atom) or RFC 822 date (RSS) as a UTC timestamp, or None."""
+    if not value or not value.strip():
+        return None
+    value = value.strip()
+    try:
+        when = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        try:
+            when = parsedate_to_datetime(value)
+        except (TypeError, ValueError):
+            return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return when.timestamp()
+
+
+def _local_name(tag):
+    return tag.rsplit("}", 1)[-1].lower()
+
+
+def _child_text(element, name):
+    for child in element:
+        if _local_name(child.tag) == name:
+            return (child.text or "").strip()
+    return None
+
+
+def _entries(element, base_url):
+    """SitemapEntries of a finished <url>, <sitemap>, RSS <item> or Atom <entry> element."""
+    name = _local_name(element.tag)
+    if name in ("url", "sitemap"):
+        loc = _child_text(element, "loc")
+        if loc:
+            yield SitemapEntry(urljoin(base_url, loc), parse_lastmod(_child_text(element, "lastmod")), name == "sitemap")
+    elif name == "item":
+        lastmod = parse_lastmod(_child_text(element, "pubdate"))
+        link = _child_text(element, "link")
+        if link:
+            yield SitemapEntry(urljoin(base_url, link), lastmod, False)
+        for child in element:
+            if _local_name(child.tag) == "enclosure" and child.get("url"):
+                yield SitemapEntry(urljoin(base_url, child.get("url")), lastmod, False)
+    elif name == "entry":
+        lastmod = parse_lastmod(_child_text(element, "updated") or _child_text(element, "published"))
+        for child in element:
+            if _local_name(child.tag) == "link" and child.get("href"):
+                yield SitemapEntry(urljoin(base_url, child.get("href")), lastmod, False)
+
+
+def iter_sitemap(url, timeout=SITEMAP_TIMEOUT):
+    """
+    Streams a sitemap, sitemap index, RSS or Atom feed (plain or gzipped) and
+    yields a SitemapEntry per listed URL as the body arrives, so large
+    sitemaps are never held in memory. Raises requests exceptions and
+    ET.ParseError (e.g. when an HTML page is served instead).
+    """
+    polite_wait(url)
+    parser = ET.XMLPullParser(events=("end",))
+    decompressor = None
+    with open_stream(url, timeout) as response:
+        response.raise_for_status()
+        incr("sitemaps_fetched")
+        for chunk in response.iter_content(chunk_size=READ_SIZE):
+            if not chunk:
+                continue
+            if decompressor is None:
+                # .xml.gz files are usually served as application/gzip, which requests does not decode.
+                decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS) if chunk.startswith(GZIP_MAGIC) else False
+            parser.feed(decompressor.decompress(chunk) if decompressor else chunk)
+            for _, element in parser.read_events():
+                yield from _entries(element, url)
+                if _local_name(element.tag) in ("url", "sitemap", "item", "entry"):
+                    element.clear()
+        parser.close()
+        for _, element in parser.read_events():
+            yield from _entries(element, url)
+
+
+def site_root(url):
+    parts = urlsplit(url)
+    return f"{parts.scheme}://{parts.netloc.lower()}/"
+
+
+def _slug(url):
+    """Last path segment of a page URL as words, e.g. '/pubs/cpi-january-2024/' -> 'cpi january 2024'."""
+    segment = unquote(urlsplit(url).path.rstrip("/").rsplit("/", 1)[-1])
+    return segment.replace("-", " ").replace("_", " ")
+
+
+class SitemapDiscovery:
+    """
+    Finds file links through a site's sitemaps and feeds instead of its HTML.
+
+    Sitemaps come from robots.txt (or the usual locations when it lists
+    none); sitemap indexes are followed. Listed files pass through the same
+    LinkMatcher as anchors on a page. Listed HTML pages whose slug matches
+    the keywords are returned for fetching, since publications are often a
+    page linking the file.
+
+    With a CrawlState, the lastmod of every sitemap and page processed is
+    remembered per profile, with the sitemap that listed it. A child sitemap
+    or page whose lastmod has not changed since is not fetched again; the
+    links recorded for it (and for the pages and sitemaps it listed) last
+    time are returned instead.
+    """
+
+    def __init__(self, matcher, crawl_state=None, profile="", max_sitemaps=MAX_SITEMAPS, max_pages=MAX_PAGES):
+        self.matcher = matcher
+        self.crawl_state = crawl_state
+        self.profile = profile
+        self.max_sitemaps = max_sitemaps
+        self.max_pages = max_pages
+        previous = crawl_state.lastmods(profile) if crawl_state is not None else {}
+        self.known = {url: lastmod for url, (lastmod, _) in previous.items()}
+        self.listed_by = {}
+        for url, (_, parent) in previous.items():
+            self.listed_by.setdefault(parent, []).append(url)
+
+    def sitemap_urls(self, site_url):
+        """Sitemaps listed in robots.txt for the site, or None if it lists none."""
+        return list(get_robots_cache().sitemaps(site_url)) or None
+
+    def _unchanged(self, entry):
+        known = self.known.get(entry.url)
+        return known is not None and entry.lastmod is not None and entry.lastmod <= known
+
+    def _previous_links(self, source_url):
+        """(source, links) recorded for an unchanged sitemap or page, and for everything it listed."""
+        if self.crawl_state is None:
+            return []
+        found = []
+        stack, visited = [source_url], set()
+        while stack:
+            url = stack.pop()
+            if url in visited:
+                continue
+            visited.add(url)
+            found.append((url, self.crawl_state.links_from(self.profile, url)))
+            stack.extend(self.listed_by.get(url, ()))
+        return found
+
+    def discover(self, site_url):
+        """
+        Reads the sitemaps of the site site_url belongs to and returns a
+        SiteDiscovery.
+        """
+        site = site_root(site_url)
+        listed = self.sitemap_urls(site)
+        candidates = listed or [urljoin(site, path) for path in DEFAULT_SITEMAP_PATHS]
+        queue = deque(candidates)
+        seen = set()
+        links = []
+        pages = {}
+        pending = {}
+        lastmods = {}
+        fetched = 0
+        while queue and fetched < self.max_sitemaps:
+            sitemap_url = queue.popleft()
+            if sitemap_url in seen:
+                continue
+            seen.add(sitemap_url)
+            fetched += 1
+            children, files, listed_pages = [], [], []
+            try:
+                # Children are only queued here: fetching them while this response streams could
+                # wait on our own slot for the host.
+                for entry in iter_sitemap(sitemap_url):
+                    if entry.is_sitemap:
+                        children.append(entry)
+                    elif self.matcher.accepts_href(entry.url):
+                        if self.matcher.matches(file_name_of(entry.url)):
+                            files.append(entry.url)
+                    elif self.matcher.has_keywords and self.matcher.matches_keywords(_slug(entry.url)):
+                        listed_pages.append(entry)
+            except (requests.exceptions.RequestException, ET.ParseError) as e:
+                log = logging.warning if listed else logging.info
+                log(f"No usable sitemap at {sitemap_url}: {e}")
+                continue
+            logging.info(f"Sitemap {sitemap_url}: {len(files)} files, {len(listed_pages)} matching pages, {len(children)} sitemaps")
+            if not listed:
+                # The first of the usual locations that works is enough.
+                seen.update(candidates)
+            if sitemap_url in pending:
+                lastmods[sitemap_url] = pending.pop(sitemap_url)
+            links.append((sitemap_url, files))
+            for child in children:
+                if child.url in seen:
+                    continue
+                if self._unchanged(child):
+                    incr("sitemaps_unchanged")
+                    seen.add(child.url)
+                    links.extend(self._previous_links(child.url))
+                    continue
+                queue.append(child.url)
+                pending[child.url] = (child.lastmod, sitemap_url)
+            for entry in listed_pages:
+                pages.setdefault(entry.url, (entry, sitemap_url))
+        unread = [url for url in queue if url not in seen]
+        if unread:
+            logging.warning(f"Stopped after {self.max_sitemaps} sitemaps of {site}; {len(unread)} left unread")
+
+        pages_to_fetch = []
+        # Most recently changed first, so the page cap drops the oldest publications.
+        for entry, parent in sorted(pages.values(), key=lambda page: page[0].lastmod or 0.0, reverse=True):
+            if self._unchanged(entry):
+                incr("sitemap_pages_unchanged")
+                links.extend(self._previous_links(entry.url))
+                continue
+            if len(pages_to_fetch) == self.max_pages:
+                logging.info(f"Fetching only the {self.max_pages} most recent matching pages listed in the sitemaps of {site}")
+                break
+            pages_to_fetch.append(entry.url)
+            lastmods[entry.url] = (entry.lastmod, parent)
+        return SiteDiscovery(links, pages_to_fetch, lastmods)
+
+    def save(self, lastmods):
+        """Remembers the lastmod of sitemaps and pages that were processed completely."""
+        if self.crawl_state is not None and lastmods:
+            self.crawl_state.record_lastmods(self.profile, lastmods)
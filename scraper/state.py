@@ -0,0 +1,167 @@
+# scraper/state.py
+import os
+import sqlite3
+import threading
+import time
+from .dedup import table_hash
+
+DEFAULT_STATE_PATH = os.path.join(os.getcwd(), ".scraper_state", "crawl_state.sqlite3")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    profile TEXT NOT NULL,
+    started_at REAL NOT NULL,
+    finished_at REAL
+);
+CREATE TABLE IF NOT EXISTS links (
+    profile TEXT NOT NULL,
+    url TEXT NOT NULL,
+    source_url TEXT,
+    first_seen REAL NOT NULL,
+    last_seen REAL NOT NULL,
+    content_hash TEXT,
+    PRIMARY KEY (profile, url)
+);
+CREATE TABLE IF NOT EXISTS tables (
+    profile TEXT NOT NULL,
+    source_url TEXT NOT NULL,
+    table_hash TEXT NOT NULL,
+    first_seen REAL NOT NULL,
+    last_seen REAL NOT NULL,
+    PRIMARY KEY (profile, source_url, table_hash)
+);
+CREATE TABLE IF NOT EXISTS lastmods (
+    profile TEXT NOT NULL,
+    url TEXT NOT NULL,
+    parent TEXT,
+    lastmod REAL,
+    checked_at REAL NOT NULL,
+    PRIMARY KEY (profile, url)
+);
+"""
+
+
+class CrawlState:
+    """
+    Persistent record of what each profile (a selected_country / saved
+    configuration) has already seen: file links and table contents with
+    first-seen and last-seen times, so a run can report only the delta.
+    """
+
+    def __init__(self, path=DEFAULT_STATE_PATH):
+        self.path = path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._lock = threading.Lock()
+        with self._connect() as conn:
+            conn.executescript(_SCHEMA)
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        return conn
+
+    def start_run(self, profile):
+        """Starts a run for a profile and returns its id; everything recorded until finish_run belongs to it."""
+        with self._lock, self._connect() as conn:
+            cursor = conn.execute("INSERT INTO runs (profile, started_at) VALUES (?, ?)", (profile, time.time()))
+            return cursor.lastrowid
+
+    def finish_run(self, run_id):
+        with self._lock, self._connect() as conn:
+            conn.execute("UPDATE runs SET finished_at = ? WHERE id = ?", (time.time(), run_id))
+
+    def last_run(self, profile):
+        """Returns (started_at, finished_at) of the profile's last finished run, or None."""
+        with self._lock, self._connect() as conn:
+            return conn.execute(
+                "SELECT started_at, finished_at FROM runs WHERE profile = ? AND finished_at IS NOT NULL ORDER BY id DESC LIMIT 1",
+                (profile,),
+            ).fetchone()
+
+    def record_links(self, profile, links, source_url=None, content_hashes=None):
+        """
+        Records file links seen in this run. Returns the links that are new for
+        the profile, or whose known content hash changed.
+        """
+        content_hashes = content_hashes or {}
+        now = time.time()
+        fresh = []
+        with self._lock, self._connect() as conn:
+            for link in links:
+                new_hash = content_hashes.get(link)
+                row = conn.execute("SELECT content_hash FROM links WHERE profile = ? AND url = ?", (profile, link)).fetchone()
+                if row is None:
+                    conn.execute(
+                        "INSERT INTO links (profile, url, source_url, first_seen, last_seen, content_hash) VALUES (?, ?, ?, ?, ?, ?)",
+                        (profile, link, source_url, now, now, new_hash),
+                    )
+                    fresh.append(link)
+                    continue
+                if new_hash is not None and row[0] is not None and row[0] != new_hash:
+                    fresh.append(link)
+                conn.execute(
+                    "UPDATE links SET last_seen = ?, content_hash = COALESCE(?, content_hash), source_url = COALESCE(?, source_url) "
+                    "WHERE profile = ? AND url = ?",
+                    (now, new_hash, source_url, profile, link),
+                )
+        return fresh
+
+    def known_links(self, profile, links):
+        """Returns the subset of links already recorded for the profile."""
+        with self._lock, self._connect() as conn:
+            return {link for link in links
+                    if conn.execute("SELECT 1 FROM links WHERE profile = ? AND url = ?", (profile, link)).fetchone()}
+
+    def record_tables(self, profile, source_url, tables):
+        """Records tables scraped from source_url. Returns the ones whose content was not seen there before."""
+        now = time.time()
+        fresh = []
+        with self._lock, self._connect() as conn:
+            for df in tables:
+                digest = table_hash(df)
+                cursor = conn.execute(
+                    "UPDATE tables SET last_seen = ? WHERE profile = ? AND source_url = ? AND table_hash = ?",
+                    (now, profile, source_url, digest),
+                )
+                if cursor.rowcount == 0:
+                    conn.execute(
+                        "INSERT INTO tables (profile, source_url, table_hash, first_seen, last_seen) VALUES (?, ?, ?, ?, ?)",
+                        (profile, source_url, digest, now, now),
+                    )
+                    fresh.append(df)
+        return fresh
+
+    def links_from(self, profile, source_url):
+        """Returns the links last recorded as found on source_url (a page or sitemap)."""
+        with self._lock, self._connect() as conn:
+            rows = conn.execute("SELECT url FROM links WHERE profile = ? AND source_url = ? ORDER BY first_seen", (profile, source_url)).fetchall()
+        return [row[0] for row in rows]
+
+    def lastmods(self, profile):
+        """
+        Returns {url: (lastmod timestamp or None, parent sitemap URL)} of the
+        sitemaps and pages processed in earlier runs.
+        """
+        with self._lock, self._connect() as conn:
+            rows = conn.execute("SELECT url, lastmod, parent FROM lastmods WHERE profile = ?", (profile,)).fetchall()
+        return {url: (lastmod, parent) for url, lastmod, parent in rows}
+
+    def record_lastmods(self, profile, lastmods):
+        """Records {url: (lastmod, parent sitemap URL)} for sitemaps and pages processed completely in this run."""
+        now = time.time()
+        with self._lock, self._connect() as conn:
+            conn.executemany(
+                "INSERT INTO lastmods (profile, url, parent, lastmod, checked_at) VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT (profile, url) DO UPDATE SET parent = excluded.parent, lastmod = excluded.lastmod, checked_at = excluded.checked_at",
+                [(profile, url, parent, lastmod, now) for url, (lastmod, parent) in lastmods.items()],
+            )
+
+    def seen_links(self, profile):
+        """Returns every link recorded for a profile with its first/last seen times."""
+        with self._lock, self._connect() as conn:
+            rows = conn.execute(
+                "SELECT url, source_url, first_seen, last_seen, content_hash FROM links WHERE profile = ? ORDER BY first_seen",
+                (profile,),
+            ).fetchall()
+        return [dict(zip(("url", "source_url", "first_seen", "last_seen", "content_hash"), row)) for row in rows]
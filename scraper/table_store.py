@@ -0,0 +1,212 @@
+# scraper/table_store.py
+import hashlib
+import json
+import os
+import shutil
+import time
+import pyarrow as pa
+import pyarrow.parquet as pq
+from .dedup import canonical_url
+
+DEFAULT_TABLE_DIR = os.path.join(os.getcwd(), ".scraper_tables")
+DEFAULT_KEEP_RUNS = 5
+# Other sessions' run directories are removed once untouched for this long.
+SESSION_MAX_AGE = 24 * 60 * 60
+MANIFEST = "manifest.json"
+
+
+def source_key(url):
+    """Partition key of a source URL: a short hash of its canonical form."""
+    return hashlib.sha1(canonical_url(url).encode("utf-8")).hexdigest()[:16]
+
+
+def _column_names(columns):
+    """String column names, with blanks named column_<i> and duplicates suffixed .1, .2 ..."""
+    names = []
+    seen = {}
+    for i, column in enumerate(columns):
+        name = str(column).strip() or f"column_{i}"
+        if name in seen:
+            seen[name] += 1
+            name = f"{name}.{seen[name]}"
+        else:
+            seen[name] = 0
+        names.append(name)
+    return names
+
+
+def to_arrow(df):
+    """Converts a scraped table to Arrow; object columns Arrow cannot type are stored as strings."""
+    df = df.copy(deep=False)
+    df.columns = _column_names(df.columns)
+    try:
+        return pa.Table.from_pandas(df, preserve_index=False)
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        for column in df.columns[df.dtypes == object]:
+            df[column] = df[column].map(lambda value: value if value is None else str(value))
+        return pa.Table.from_pandas(df, preserve_index=False)
+
+
+def reconcile_schemas(schema, other):
+    """
+    Merges two table schemas into one every table can be cast to: numeric
+    types are widened, null columns take the other side's type and any
+    other conflict falls back to string.
+    """
+    fields = {field.name: field.type for field in schema}
+    for field in other:
+        current = fields.get(field.name)
+        if current is None or current == field.type:
+            fields[field.name] = field.type if current is None else current
+            continue
+        try:
+            fields[field.name] = pa.unify_schemas(
+                [pa.schema([(field.name, current)]), pa.schema([(field.name, field.type)])], promote_options="permissive"
+            ).field(field.name).type
+        except (pa.ArrowInvalid, pa.ArrowTypeError, pa.ArrowNotImplementedError):
+            fields[field.name] = pa.string()
+    return pa.schema(list(fields.items()))
+
+
+def conform(table, schema):
+    """Casts a table to `schema`, adding its missing columns as nulls."""
+    columns = []
+    for field in schema:
+        if field.name in table.column_names:
+            column = table.column(field.name)
+            if column.type != field.type:
+                column = column.cast(pa.string()) if pa.types.is_string(field.type) else column.cast(field.type)
+            columns.append(column)
+        else:
+            columns.append(pa.nulls(table.num_rows, type=field.type))
+    return pa.Table.from_arrays(columns, schema=schema)
+
+
+class TableStore:
+    """
+    Streams scraped tables to a Parquet dataset on disk instead of keeping
+    them in memory. Each table becomes <root>/source=<source key>/table_<n>.parquet
+    (n counts the tables of that source URL) and a manifest.json records the
+    source URL, row count, content hash and provenance of every table plus a
+    reconciled schema covering all of them. Tables are read back one at a time.
+    """
+
+    def __init__(self, root):
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+        self._entries = []
+        self._per_source = {}
+        self._schema = pa.schema([])
+        if os.path.exists(os.path.join(root, MANIFEST)):
+            self._load_manifest()
+
+    def _load_manifest(self):
+        with open(os.path.join(self.root, MANIFEST), "r") as f:
+            manifest = json.load(f)
+        self._entries = manifest["tables"]
+        for entry in self._entries:
+            self._per_source[entry["source_url"]] = max(self._per_source.get(entry["source_url"], 0), entry["table_index"] + 1)
+            self._schema = reconcile_schemas(self._schema, pq.read_schema(os.path.join(self.root, entry["path"])))
+
+    def write(self, df, source_url, table_hash=None):
+        """Writes one table and returns its manifest entry."""
+        table = to_arrow(df)
+        index = self._per_source.get(source_url, 0)
+        self._per_source[source_url] = index + 1
+        path = os.path.join(f"source={source_key(source_url)}", f"table_{index:04d}.parquet")
+        os.makedirs(os.path.join(self.root, os.path.dirname(path)), exist_ok=True)
+        pq.write_table(table, os.path.join(self.root, path))
+        self._schema = reconcile_schemas(self._schema, table.schema)
+        entry = {
+            "path": path,
+            "source_url": source_url,
+            "table_index": index,
+            "rows": table.num_rows,
+            "columns": table.num_columns,
+            "table_hash": table_hash,
+            "sources": [source_url],
+        }
+        self._entries.append(entry)
+        return entry
+
+    def close(self, provenance=None):
+        """Writes the manifest; `provenance` entries (table_hash, sources) update each table's sources."""
+        sources = {entry["table_hash"]: entry["sources"] for entry in provenance or ()}
+        for entry in self._entries:
+            if entry["table_hash"] in sources:
+                entry["sources"] = list(sources[entry["table_hash"]])
+        manifest = {"written_at": time.time(), "schema": [[field.name, str(field.type)] for field in self._schema], "tables": self._entries}
+        with open(os.path.join(self.root, MANIFEST), "w") as f:
+            json.dump(manifest, f, indent=4)
+        return self
+
+    def __len__(self):
+        return len(self._entries)
+
+    @property
+    def total_rows(self):
+        return sum(entry["rows"] for entry in self._entries)
+
+    @property
+    def schema(self):
+        """The reconciled schema of all tables."""
+        return self._schema
+
+    def entries(self):
+        return list(self._entries)
+
+    def provenance(self):
+        """Returns one {"path", "source_url", "table_index", "rows", "table_hash", "sources"} entry per table."""
+        return [{key: entry[key] for key in ("path", "source_url", "table_index", "rows", "table_hash", "sources")} for entry in self._entries]
+
+    def read(self, i, max_rows=None):
+        """Reads table i (in write order) from disk as a DataFrame, optionally only its first max_rows rows."""
+        path = os.path.join(self.root, self._entries[i]["path"])
+        if max_rows is None:
+            return pq.read_table(path).to_pandas()
+        parquet = pq.ParquetFile(path)
+        batches = []
+        rows = 0
+        for batch in parquet.iter_batches(batch_size=max_rows):
+            batches.append(batch)
+            rows += batch.num_rows
+            if rows >= max_rows:
+                break
+        return pa.Table.from_batches(batches, schema=parquet.schema_arrow).slice(0, max_rows).to_pandas()
+
+    def iter_tables(self, conformed=False):
+        """Yields the tables one at a time; with conformed=True all share the reconciled schema."""
+        for entry in self._entries:
+            table = pq.read_table(os.path.join(self.root, entry["path"]))
+            yield (conform(table, self._schema) if conformed else table).to_pandas()
+
+    def to_csv(self, path):
+        """Writes every table, aligned to the reconciled schema, to one CSV without loading them together."""
+        with open(path, "w", newline="") as f:
+            for i, df in enumerate(self.iter_tables(conformed=True)):
+                df.to_csv(f, index=False, header=(i == 0))
+
+
+def new_table_store(base_dir=DEFAULT_TABLE_DIR, keep_runs=DEFAULT_KEEP_RUNS, session="default", max_age=SESSION_MAX_AGE):
+    """
+    Creates a TableStore in a fresh run directory under base_dir/<session>/.
+    Only the session's own runs are pruned to the newest keep_runs, so a run
+    another session is still reading is never removed; directories of other
+    sessions are deleted once untouched for max_age seconds.
+    """
+    session_dir = os.path.join(base_dir, session)
+    os.makedirs(session_dir, exist_ok=True)
+    now = time.time()
+    for name in os.listdir(base_dir):
+        path = os.path.join(base_dir, name)
+        try:
+            stale = name != session and now - os.path.getmtime(path) > max_age
+        except FileNotFoundError:
+            # Removed by another session meanwhile.
+            continue
+        if stale:
+            shutil.rmtree(path, ignore_errors=True)
+    runs = sorted(name for name in os.listdir(session_dir) if name.startswith("run_"))
+    for name in runs[:max(0, len(runs) - keep_runs + 1)]:
+        shutil.rmtree(os.path.join(session_dir, name), ignore_errors=True)
+    return TableStore(os.path.join(session_dir, f"run_{time.strftime('%Y%m%d-%H%M%S')}_{os.getpid()}"))
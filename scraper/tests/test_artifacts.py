@@ -0,0 +1,66 @@
+# scraper/tests/test_artifacts.py
+"""Stored artifacts handed to readers that need a file extension."""
+import os
+import pytest
+from scraper.artifacts import ArtifactStore, with_suffix
+
+ROWS = [("Month", "CPI"), ("January", "101.2"), ("February", "101.9"), ("March", "102.4"), ("April", "102.8"), ("May", "103.1")]
+
+
+def _table_pdf(rows):
+    """A one-page PDF with rows of text laid out in two columns."""
+    lines = ["BT /F1 11 Tf"]
+    for index, (left, right) in enumerate(rows):
+        lines.append(f"1 0 0 1 72 {720 - 18 * index} Tm ({left}) Tj 1 0 0 1 240 {720 - 18 * index} Tm ({right}) Tj")
+    lines.append("ET")
+    content = "\n".join(lines).encode("latin-1")
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"<< /Type /Pages /Kids [3 0 R] /Count 1 >>",
+        b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Contents 4 0 R /Resources << /Font << /F1 5 0 R >> >> >>",
+        b"<< /Length %d >>\nstream\n" % len(content) + content + b"\nendstream",
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    pdf = b"%PDF-1.4\n"
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(len(pdf))
+        pdf += b"%d 0 obj\n" % number + body + b"\nendobj\n"
+    xref = len(pdf)
+    pdf += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    pdf += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    pdf += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    return pdf
+
+
+@pytest.fixture
+def stored_pdf(tmp_path):
+    data = _table_pdf(ROWS)
+    return ArtifactStore(str(tmp_path / "store")).put_bytes(data, "cpi.pdf"), data
+
+
+def test_with_suffix_gives_a_stored_object_an_extension(stored_pdf):
+    artifact, data = stored_pdf
+    assert not artifact.path.endswith(".pdf")
+    with with_suffix(artifact.path, ".pdf") as pdf_path:
+        assert pdf_path.endswith(".pdf")
+        with open(pdf_path, "rb") as f:
+            assert f.read() == data
+    assert not os.path.exists(pdf_path)
+    assert os.path.exists(artifact.path)
+
+
+def test_with_suffix_keeps_a_path_that_has_it(tmp_path):
+    path = tmp_path / "report.PDF"
+    path.write_bytes(b"%PDF-1.4")
+    with with_suffix(str(path), ".pdf") as pdf_path:
+        assert pdf_path == str(path)
+    assert path.exists()
+
+
+def test_read_tables_accepts_a_stored_artifact(stored_pdf):
+    pytest.importorskip("camelot")
+    pages = pytest.importorskip("pdf_table_extraction_page")
+    artifact, _ = stored_pdf
+    tables = pages.read_tables(artifact.path, "Camelot", "stream", "1")
+    assert isinstance(tables, list)
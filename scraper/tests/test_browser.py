@@ -0,0 +1,142 @@
+# scraper/tests/test_browser.py
+"""
+BrowserPool reuse, recycling and crash handling, with a fake driver that
+"renders" pages by fetching them from a local static server.
+"""
+import threading
+import pytest
+import requests
+from scraper import browser
+from scraper.benchmarks.server import FixtureServer
+from scraper.browser import BrowserPool, wait_until_ready
+from scraper.scraper import fetch_dynamic_page
+
+SITE = {
+    "/table": "<html><body><h1>CPI</h1><table><tr><th>Month</th><th>Value</th></tr><tr><td>Jan</td><td>1</td></tr></table></body></html>",
+    "/crash": "<html><body>tab crashes here</body></html>",
+}
+
+
+class FakeDriver:
+    """The WebDriver methods the scraper uses, backed by plain HTTP requests."""
+
+    created = []
+
+    def __init__(self):
+        self.pages = []
+        self.quit_called = False
+        self.page_source = ""
+        self.current_url = None
+        FakeDriver.created.append(self)
+
+    def set_page_load_timeout(self, timeout):
+        self.page_load_timeout = timeout
+
+    def get(self, url):
+        if self.quit_called:
+            raise RuntimeError("driver used after quit")
+        if url.endswith("/crash"):
+            raise RuntimeError("tab crashed")
+        response = requests.get(url, timeout=5)
+        response.raise_for_status()
+        self.pages.append(url)
+        self.current_url = url
+        self.page_source = response.text
+
+    def execute_script(self, script, *args):
+        if "readyState" in script:
+            return "complete"
+        if "querySelector" in script:
+            return f"<{args[0]}" in self.page_source
+        return 0
+
+    def quit(self):
+        self.quit_called = True
+
+
+@pytest.fixture
+def server():
+    FakeDriver.created = []
+    with FixtureServer(SITE) as server:
+        yield server
+
+
+def _render(pool, url):
+    with pool.lease() as driver:
+        driver.get(url)
+        wait_until_ready(driver, timeout=2)
+        return driver, driver.page_source
+
+
+def test_drivers_are_started_lazily_and_reused(server):
+    pool = BrowserPool(size=2, max_pages_per_driver=10, driver_factory=FakeDriver)
+    assert FakeDriver.created == []
+    first, html = _render(pool, server.url("/table"))
+    second, _ = _render(pool, server.url("/table"))
+    assert first is second
+    assert "<table>" in html
+    assert first.pages == [server.url("/table")] * 2
+    assert first.page_load_timeout == pool.page_timeout
+    pool.close()
+    assert first.quit_called
+
+
+def test_driver_is_recycled_after_max_pages(server):
+    pool = BrowserPool(size=1, max_pages_per_driver=2, driver_factory=FakeDriver)
+    drivers = [_render(pool, server.url("/table"))[0] for _ in range(5)]
+    assert [len(driver.pages) for driver in FakeDriver.created] == [2, 2, 1]
+    assert drivers[0] is drivers[1] and drivers[2] is drivers[3] and drivers[0] is not drivers[2]
+    assert FakeDriver.created[0].quit_called and FakeDriver.created[1].quit_called
+    assert not FakeDriver.created[2].quit_called
+    pool.close()
+
+
+def test_crashed_driver_is_replaced(server):
+    pool = BrowserPool(size=1, driver_factory=FakeDriver)
+    with pytest.raises(RuntimeError, match="tab crashed"):
+        _render(pool, server.url("/crash"))
+    crashed = FakeDriver.created[0]
+    assert crashed.quit_called
+    replacement, html = _render(pool, server.url("/table"))
+    assert replacement is not crashed
+    assert "<table>" in html
+    pool.close()
+
+
+def test_leases_are_bounded_by_pool_size(server):
+    pool = BrowserPool(size=2, driver_factory=FakeDriver)
+    active = []
+    peak = [0]
+    lock = threading.Lock()
+
+    def work():
+        with pool.lease() as driver:
+            with lock:
+                active.append(driver)
+                peak[0] = max(peak[0], len(active))
+            driver.get(server.url("/table"))
+            with lock:
+                active.remove(driver)
+
+    threads = [threading.Thread(target=work) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert peak[0] <= 2
+    assert len(FakeDriver.created) <= 2
+    pool.close()
+    with pytest.raises(RuntimeError, match="closed"):
+        with pool.lease():
+            pass
+
+
+def test_fetch_dynamic_page_uses_the_shared_pool(server, monkeypatch):
+    pool = BrowserPool(size=1, driver_factory=FakeDriver)
+    monkeypatch.setattr(browser, "_pool", pool)
+    page = fetch_dynamic_page(server.url("/table"))
+    assert page.soup.find("table") is not None
+    assert fetch_dynamic_page(server.url("/crash")) is None
+    assert fetch_dynamic_page(server.url("/table")) is not None
+    assert len(FakeDriver.created) == 2
+    pool.close()
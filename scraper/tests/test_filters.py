@@ -0,0 +1,125 @@
+# scraper/tests/test_filters.py
+"""
+LinkMatcher and KeywordSet against the previous per-anchor filtering
+(legacy_filter in scraper.benchmarks.link_filter) on synthetic NSO-style hrefs,
+and the text TableFilter matches table keywords against.
+"""
+import pytest
+from scraper.benchmarks.link_filter import compiled_filter, legacy_filter, synthetic_hrefs
+from scraper.filters import HEADING_LOOKBACK, KeywordSet, LinkMatcher, TableFilter
+from scraper.parsing import make_soup
+from scraper.utils import FILE_EXTENSIONS
+
+PAGE_URL = "https://stats.example.org/publications/"
+HREFS = synthetic_hrefs(3000, seed=1)
+
+
+def _legacy_names(extensions=FILE_EXTENSIONS):
+    """Every file name the legacy filter accepts when no keyword criteria are set."""
+    return legacy_filter(HREFS, PAGE_URL, extensions, False, [], [], "", "", [], [], [])
+
+
+# Criteria whose meaning did not change: custom filters, file types, years and months.
+UNCHANGED_CRITERIA = [
+    (FILE_EXTENSIONS, False, [], [], "", "", [], [], []),
+    ([".pdf", ".csv"], False, [], [], "", "", [], [], []),
+    (FILE_EXTENSIONS, False, [], [], "cpi", "", [], [], []),
+    (FILE_EXTENSIONS, False, [], [], "", "GDP, census , Bulletin", [], [], []),
+    (FILE_EXTENSIONS, False, [], [], "", "", [".PDF", ".xlsx"], [], []),
+    (FILE_EXTENSIONS, False, [], [], "", "cpi, gdp, census, bulletin", [".pdf", ".xlsx", ".csv"], ["2023", "2024"], ["January", "february"]),
+    (FILE_EXTENSIONS, False, [], [], "", "", [], ["2020"], []),
+    (FILE_EXTENSIONS, False, [], [], "", "", [], [], ["MARCH", "april"]),
+]
+
+
+@pytest.mark.parametrize("criteria", UNCHANGED_CRITERIA)
+def test_matches_legacy_filter(criteria):
+    expected = legacy_filter(HREFS, PAGE_URL, *criteria)
+    assert expected
+    assert compiled_filter(HREFS, PAGE_URL, *criteria) == expected
+
+
+@pytest.mark.parametrize("keywords", [["CPI"], ["gdp", "Population"], ["cpi", "CPI-Core", "core"], ["Trade", "2024"]])
+def test_any_keyword_matches_legacy_expression(keywords):
+    expected = [name for name in _legacy_names() if any(kw.lower() in name.lower() for kw in keywords)]
+    assert expected
+    assert compiled_filter(HREFS, PAGE_URL, FILE_EXTENSIONS, False, [], keywords, "", "", [], [], []) == expected
+
+
+@pytest.mark.parametrize("keywords", [["CPI", "2024"], ["gdp", "JANUARY"], ["cpi", "cp"]])
+def test_all_keywords_match_legacy_expression(keywords):
+    expected = [name for name in _legacy_names() if all(kw.lower() in name.lower() for kw in keywords)]
+    assert expected
+    # file_name_contains_all applies the "any" keywords as "all"; query_keywords_all always requires every keyword.
+    assert compiled_filter(HREFS, PAGE_URL, FILE_EXTENSIONS, True, [], keywords, "", "", [], [], []) == expected
+    assert compiled_filter(HREFS, PAGE_URL, FILE_EXTENSIONS, False, keywords, [], "", "", [], [], []) == expected
+
+
+def test_general_keywords_also_apply_with_custom_filters():
+    # The legacy filter ignored the general keywords whenever every custom filter passed.
+    criteria = (FILE_EXTENSIONS, False, [], ["GDP"], "", "", [".pdf"], [], [])
+    legacy = legacy_filter(HREFS, PAGE_URL, *criteria)
+    compiled = compiled_filter(HREFS, PAGE_URL, *criteria)
+    assert compiled == [name for name in legacy if "gdp" in name.lower()]
+    assert len(compiled) < len(legacy)
+
+
+def test_extension_filtering_is_case_insensitive_and_uses_the_href():
+    # Extensions given in upper case match too (the legacy filter only lowercased the href).
+    matcher = LinkMatcher([".PDF", ".xlsx"])
+    hrefs = ["/a/CPI.PDF", "/a/gdp.Xlsx", "/a/report.pdf?download=1", "/a/page.html", "/a/pdf", "https://x.org/b/Trade.pdf"]
+    assert matcher.filter_anchors(hrefs, PAGE_URL) == [
+        "https://stats.example.org/a/CPI.PDF",
+        "https://stats.example.org/a/gdp.Xlsx",
+        "https://x.org/b/Trade.pdf",
+    ]
+
+
+def test_keywords_are_case_folded():
+    matcher = LinkMatcher(FILE_EXTENSIONS, query_keywords_any=["  Consumer-Price ", "CPI"], selected_months=["JANUARY"])
+    assert matcher.matches("consumer-price_january_2024.pdf")
+    assert matcher.matches("CPI_January_2024.PDF")
+    assert not matcher.matches("CPI_February_2024.pdf")
+    assert not matcher.matches("GDP_January_2024.pdf")
+
+
+def test_keyword_set_reports_overlapping_keywords():
+    keywords = KeywordSet(["cpi", "cpi-core", "core", "re", "gdp"])
+    assert keywords.find("monthly_cpi-core_2024") == {"cpi", "cpi-core", "core", "re"}
+    assert keywords.find("cpi_and_core") == {"cpi", "core", "re"}
+    assert keywords.find("population") == set()
+
+
+def test_empty_criteria_accept_every_file():
+    matcher = LinkMatcher()
+    assert not matcher.has_keywords
+    assert matcher.matches("anything.bin")
+    assert matcher.filter_anchors(["/x.bin", "/y"], PAGE_URL) == ["https://stats.example.org/x.bin", "https://stats.example.org/y"]
+
+
+def _tables_for(html, keyword):
+    table_filter = TableFilter(table_keyword=keyword)
+    return [table.get("id") for table in make_soup(html).find_all("table") if table_filter.rows(table) is not None]
+
+
+def test_table_heading_does_not_reach_past_the_previous_table():
+    html = """<h2>Labour force</h2><p>Table 1</p>
+    <table id="a"><tr><th>x</th></tr><tr><td>1</td></tr></table>
+    <table id="b"><tr><th>y</th></tr><tr><td>2</td></tr></table>
+    <h3>Prices</h3><div><table id="c"><tr><th>z</th></tr><tr><td>3</td></tr></table></div>"""
+    assert _tables_for(html, "labour") == ["a"]
+    assert _tables_for(html, "prices") == ["c"]
+
+
+def test_table_heading_is_found_through_a_layout_table():
+    html = """<h2>Consumer prices</h2><table id="layout"><tr><td>
+    <table id="inner"><tr><th>Month</th></tr><tr><td>Jan</td></tr></table>
+    </td></tr></table>"""
+    assert _tables_for(html, "consumer prices") == ["layout", "inner"]
+
+
+def test_table_heading_lookback_is_bounded():
+    filler = "<span>note</span>" * HEADING_LOOKBACK
+    html = f"<h2>GDP</h2>{{}}<table id='t'><tr><th>Q</th></tr><tr><td>1</td></tr></table>"
+    assert _tables_for(html.format(""), "gdp") == ["t"]
+    assert _tables_for(html.format(filler), "gdp") == []
@@ -0,0 +1,27 @@
+# scraper/tests/test_inference.py
+"""Column type inference on scraped text columns."""
+import pandas as pd
+from scraper.inference import SAMPLE_SIZE, infer_column, infer_column_types
+
+
+def test_date_column_with_a_stray_value_outside_the_sample_stays_text():
+    dates = [f"{day % 28 + 1:02d}/{day % 12 + 1:02d}/2023" for day in range(20 * SAMPLE_SIZE)]
+    column = pd.Series(dates + ["Total"], dtype="object")
+    converted, column_type = infer_column(column)
+    assert column_type == "string"
+    assert converted.tolist() == column.tolist()
+
+
+def test_date_column_longer_than_the_sample():
+    column = pd.Series([f"{day % 28 + 1:02d}/{day % 12 + 1:02d}/2023" for day in range(2 * SAMPLE_SIZE)], dtype="object")
+    converted, column_type = infer_column(column)
+    assert column_type == "datetime"
+    assert converted.iloc[1] == pd.Timestamp(2023, 2, 2)
+
+
+def test_duplicate_headers_keep_their_own_types():
+    df = pd.DataFrame([["Jan", "1", "x"], ["Feb", "2", "y"]], columns=["Month", "Value", "Value"])
+    typed, column_types = infer_column_types(df)
+    assert column_types == {0: "string", 1: "integer", 2: "string"}
+    assert typed.iloc[:, 1].tolist() == [1, 2]
+    assert typed.iloc[:, 2].tolist() == ["x", "y"]
@@ -1 +1,110 @@
+# scraper/tests/test_scraper.py
+"""
+Parser parity: tables, file links and pagination links extracted with
+lxml and a restricted (SoupStrainer) parse must be identical to those from
+a full html.parser tree, the previous behaviour.
+"""
+import pandas as pd
+import pytest
+from scraper.benchmarks.fixtures import build_site
+from scraper.parsing import LXML_AVAILABLE, extraction_tags, make_soup
+from scraper.pagination import discover_page_urls, find_next_url
+from scraper.scraper import extract_tables
+from scraper.utils import FILE_EXTENSIONS, filter_file_links
 
+BASE_URL = "http://stats.example.org"
+
+MESSY_PAGE = """<html><head><title>Releases</title></head><body>
+<h2>Consumer Price Index &amp; inflation</h2>
+<p>Table 1: CPI by month<br>provisional
+<table id="cpi" class="data sortable">
+<tr><th>Month</th><th>Value</th></tr>
+<tr><td>January</td><td>101.2 <b>p</b></td></tr>
+<tr><td>February</td><td>101.9</td></tr>
+</table>
+<div><div class="layout">
+  <table class="data"><caption>Quarterly GDP</caption><tr><th>Q</th><th>GDP</th></tr><tr><td>Q1</td><td>1&nbsp;024</td></tr></table>
+</div></div>
+<ul>
+<li><a href="/files/CPI_January_2024.PDF">CPI</a>
+<li><a href="files/gdp-2023.xlsx?v=2">GDP</a>
+<li><a href="https://other.example.org/Population_census_2020.csv">Census</a>
+<li><a>no href</a>
+<li><a href="/about">About</a>
+</ul>
+<p class="pagination"><a href="/releases?page=2">2</a> <a href="/releases?page=3">3</a> <a href="/releases?page=2">Next</a></p>
+</body></html>
+"""
+
+KEYWORDS_ANY = ["CPI", "GDP", "Population", "Customer Price Index"]
+
+
+def _corpus():
+    pages = {"/messy": MESSY_PAGE}
+    pages.update(build_site(scale=0.05))
+    return sorted(pages.items())
+
+
+def _extract(html, url, parser, parse_only, table_keyword=""):
+    soup = make_soup(html, parse_only=parse_only, parser=parser)
+    tables = extract_tables(soup, url, table_keyword=table_keyword)
+    links = filter_file_links(soup, url, FILE_EXTENSIONS, False, [], KEYWORDS_ANY, "", "", [])
+    return tables, links, find_next_url(soup, url), discover_page_urls(soup, url, 5)
+
+
+def _assert_same(expected, actual):
+    expected_tables, *expected_rest = expected
+    actual_tables, *actual_rest = actual
+    assert len(actual_tables) == len(expected_tables)
+    for want, got in zip(expected_tables, actual_tables):
+        pd.testing.assert_frame_equal(got, want)
+        assert got.attrs["column_types"] == want.attrs["column_types"]
+    assert actual_rest == expected_rest
+
+
+def _parsers():
+    return ["lxml", "html.parser"] if LXML_AVAILABLE else ["html.parser"]
+
+
+@pytest.mark.parametrize("parser", _parsers())
+@pytest.mark.parametrize("path,html", _corpus(), ids=[path for path, _ in _corpus()])
+def test_restricted_parse_matches_full_html_parser_tree(parser, path, html):
+    url = BASE_URL + path
+    expected = _extract(html, url, "html.parser", None)
+    _assert_same(expected, _extract(html, url, parser, extraction_tags()))
+
+
+SMALL_TABLE = "<table><tr><th>Month</th><th>Value</th></tr><tr><td>Jan</td><td>1</td></tr></table>"
+KEYWORD_PAGES = [
+    (MESSY_PAGE, "consumer price"),
+    (MESSY_PAGE, "quarterly gdp"),
+    (MESSY_PAGE, "indicator"),
+    # Dropping the <div> would make the paragraph the table's previous sibling.
+    ("<p>Consumer prices</p><div>Source</div>" + SMALL_TABLE, "consumer prices"),
+    # Dropping the notes would bring the heading within HEADING_LOOKBACK.
+    ("<h2>GDP</h2>" + "<span>note</span>" * 60 + SMALL_TABLE, "gdp"),
+]
+
+
+@pytest.mark.parametrize("parser", _parsers())
+@pytest.mark.parametrize("html,keyword", KEYWORD_PAGES, ids=range(len(KEYWORD_PAGES)))
+def test_keyword_parse_matches_full_html_parser_tree(parser, html, keyword):
+    url = BASE_URL + "/messy"
+    expected = _extract(html, url, "html.parser", None, keyword)
+    _assert_same(expected, _extract(html, url, parser, extraction_tags(keyword), keyword))
+
+
+def test_link_only_parse_keeps_every_file_link():
+    url = BASE_URL + "/messy"
+    full = filter_file_links(make_soup(MESSY_PAGE, parser="html.parser"), url, FILE_EXTENSIONS, False, [], KEYWORDS_ANY, "", "", [])
+    anchors_only = filter_file_links(make_soup(MESSY_PAGE, parse_only=("a",)), url, FILE_EXTENSIONS, False, [], KEYWORDS_ANY, "", "", [])
+    assert anchors_only == full == [
+        "http://stats.example.org/files/CPI_January_2024.PDF",
+        "https://other.example.org/Population_census_2020.csv",
+    ]
+
+
+def test_messy_page_tables():
+    tables = extract_tables(make_soup(MESSY_PAGE, parse_only=extraction_tags()), BASE_URL + "/messy")
+    assert [list(df.columns) for df in tables] == [["Month", "Value"], ["Q", "GDP"]]
+    assert len(tables[0]) == 2
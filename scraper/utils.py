@@ -1,244 +1,415 @@
 # scraper/utils.py
-import streamlit as st
-from urllib.parse import urljoin
 import requests
+import hashlib
 import logging
-import pandas as pd
-from bs4 import BeautifulSoup
-from requests.packages.urllib3.util.retry import Retry
-from requests.adapters import HTTPAdapter
 import json
 import os
+import shutil
+import sqlite3
+import tempfile
+from .cache import get_page_cache
+from .artifacts import get_artifact_store
+from .downloads import FileDownload, download, probe
+from .http_client import build_session, get_session
+from .page import fetch_page
+from .pagination import discover_page_urls, find_next_url, page_key
+from .parsing import extraction_tags
+from .robots import get_robots_cache
+from .crawler import CrawlEngine, DEFAULT_MAX_WORKERS, DEFAULT_PER_HOST_LIMIT
+from .filters import MIN_TABLE_COLS, MIN_TABLE_ROWS, LinkMatcher
+from .ratelimit import get_rate_controller
+from .sitemaps import SitemapDiscovery, site_root
+from .dedup import LinkDeduplicator, TableDeduplicator, unique_urls
+from .metrics import STAGE_LINKS, STAGE_URL, incr, timed
+from .events import CrawlEvents, StreamlitSubscriber, STAGE_FILES, STAGE_PAGES, STAGE_TABLES, default_events
 
 
 def check_robots_txt(url: str) -> bool:
     """
-    Checks if the website's robots.txt permits scraping.
-    A simple check is performed (this can be enhanced with a full parser).
+    Checks if the website's robots.txt permits scraping the URL.
+    Rules are cached per host and evaluated as in RFC 9309.
     """
-    robots_url = urljoin(url, "/robots.txt")
-    try:
-        response = requests.get(robots_url, timeout=5)
-        if response.status_code == 200:
-            # Basic check: if "Disallow: /" is present, block scraping
-            if "Disallow: /" in response.text:
-                return False
-        return True
-    except Exception:
-        # If robots.txt is unreachable, default to disallowing scraping.
-        return False
+    return get_robots_cache().can_fetch(url)
     
 
 # Utility functions (could be moved to utils.py)
+FILE_EXTENSIONS = [".pdf", ".csv", ".xls", ".xlsx", ".json"]
+
 def is_file_link(url):
-    file_extensions = [".pdf", ".csv", ".xls", ".xlsx", ".json"]
-    return any(url.lower().endswith(ext) for ext in file_extensions)
+    return any(url.lower().endswith(ext) for ext in FILE_EXTENSIONS)
 
 def create_session_with_retry():
-    session = requests.Session()
-    retry = Retry(total=3, backoff_factor=1, status_forcelist=[429,500,502,503,504], allowed_methods=["GET"])
-    adapter = HTTPAdapter(max_retries=retry)
-    session.mount("http://", adapter)
-    session.mount("https://", adapter)
-    return session
-
-def download_file(url):
-    session = create_session_with_retry()
+    """Builds a private session with retries. Prefer get_session(), which reuses pooled connections."""
+    return build_session()
+
+def download_file(url, events=None, path=None, sha256=None):
+    """
+    Downloads a file through the resumable download manager (see
+    downloads.download) into the artifact store, where a URL already
+    downloaded is not fetched again. With `path` the file is also saved
+    there and the FileDownload is returned; otherwise its bytes are.
+    Returns None on failure.
+    """
+    events = events or default_events()
+    store = get_artifact_store()
     try:
-        response = session.get(url, timeout=10)
-        response.raise_for_status()
-        return response.content
-    except requests.exceptions.RequestException as e:
-        st.error(f"Error downloading file from {url}: {e}")
-        logging.error(f"Error downloading file from {url}: {e}")
+        if store is not None:
+            artifact = store.fetch(url, sha256=sha256)
+            if path is not None:
+                shutil.copyfile(artifact.path, path)
+                return FileDownload(path, artifact.size, artifact.sha256)
+            with open(artifact.path, "rb") as f:
+                return f.read()
+        if path is not None:
+            return download(url, path, sha256=sha256)
+        with tempfile.TemporaryDirectory() as download_dir:
+            result = download(url, os.path.join(download_dir, "download"), sha256=sha256)
+            with open(result.path, "rb") as f:
+                return f.read()
+    except (requests.exceptions.RequestException, OSError, sqlite3.Error) as e:
+        events.error(f"Error downloading file from {url}: {e}")
         return None
-    finally:
-        session.close()
 
-def extract_file_links(page_url, extensions, file_name_contains_all, query_keywords_all, query_keywords_any, custom_file_name, custom_keywords, custom_file_type):
+def link_fingerprint(url):
+    """
+    Fingerprint of a file link's current content from a HEAD request: its
+    ETag/Last-Modified and size. None when the server reports neither.
+    """
+    remote = probe(url)
+    if remote.validator is None and remote.size is None:
+        return None
+    return hashlib.sha256(f"{remote.validator}|{remote.size}".encode("utf-8")).hexdigest()
+
+def filter_file_links(soup, page_url, extensions, file_name_contains_all, query_keywords_all, query_keywords_any, custom_file_name, custom_keywords, custom_file_type, matcher=None):
+    """
+    Returns the file links in an already parsed page that pass the file filters.
+    A prebuilt LinkMatcher can be passed to avoid recompiling the criteria per page.
+    """
+    if matcher is None:
+        matcher = LinkMatcher(extensions, file_name_contains_all, query_keywords_all, query_keywords_any, custom_file_name, custom_keywords, custom_file_type)
+    with timed(STAGE_LINKS, page_url):
+        links = matcher.filter_anchors((a["href"] for a in soup.find_all("a", href=True)), page_url)
+    incr("file_links_kept", len(links))
+    return links
+
+def extract_file_links(page_url, extensions, file_name_contains_all, query_keywords_all, query_keywords_any, custom_file_name, custom_keywords, custom_file_type, events=None):
     # Robust error handling, logging and returning empty list on failure.
-    session = create_session_with_retry()
+    events = events or default_events()
     try:
-        response = session.get(page_url, timeout=10)
-        response.raise_for_status()
+        page = fetch_page(page_url, parse_only=("a",))
     except Exception as e:
-        st.error(f"Error accessing {page_url}: {e}")
-        logging.error(f"Error accessing {page_url}: {e}")
+        events.error(f"Error accessing {page_url}: {e}")
         return []
-    finally:
-        session.close()
-    
-    soup = BeautifulSoup(response.content, "html.parser")
-    links = []
-    for a in soup.find_all("a", href=True):
-        href = a["href"]
-        for ext in extensions:
-            if href.lower().endswith(ext):
-                full_url = urljoin(page_url, href)
-                file_name = full_url.split("/")[-1].split("?")[0]
-                if custom_keywords:
-                    custom_keywords_list = [kw.strip() for kw in custom_keywords.split(',')] if custom_keywords else []
-                else:
-                    custom_keywords_list = []
-                valid_custom_name = not custom_file_name or custom_file_name.lower() in file_name.lower()
-                valid_custom_keywords = not custom_keywords or any(kw.lower() in file_name.lower() for kw in custom_keywords_list)
-                valid_file_type = not custom_file_type or any(file_name.lower().endswith(ft.lower()) for ft in custom_file_type)
-                if valid_custom_name and valid_custom_keywords and valid_file_type:
-                    links.append(full_url)
-                elif file_name_contains_all and query_keywords_all and not (valid_custom_name or valid_custom_keywords or valid_file_type):
-                    if all(kw.lower() in file_name.lower() for kw in query_keywords_all):
-                        links.append(full_url)
-                elif not file_name_contains_all and query_keywords_any and not (valid_custom_name or valid_custom_keywords or valid_file_type):
-                    if any(kw.lower() in file_name.lower() for kw in query_keywords_any):
-                        links.append(full_url)
-
-                break
-    return links
 
-def extract_paginated_data(base_url, max_pages=5, table_id="", table_class="", table_keyword=""):
-    session = create_session_with_retry()
-    all_tables_data = []
-    next_url = base_url
-    page_count = 0
-    progress_bar = st.progress(0, text="Scraping pages...")
-    while next_url and page_count < max_pages:
+    return filter_file_links(page.soup, page_url, extensions, file_name_contains_all, query_keywords_all, query_keywords_any, custom_file_name, custom_keywords, custom_file_type)
+
+def _fetch_page_or_report(url, session, parse_only, events):
+    """Fetches one page for pagination, reporting failures; returns None on error."""
+    try:
+        return fetch_page(url, session=session, parse_only=parse_only)
+    except requests.exceptions.Timeout as e:
+        events.error(f"Timeout error accessing {url}: {e}")
+    except requests.exceptions.RequestException as e:
+        events.error(f"Error accessing {url}: {e}")
+    except Exception as e:
+        events.error(f"Error parsing HTML from {url}: {e}")
+    return None
+
+def fetch_paginated_pages(base_url, max_pages=5, parse_only=None, max_workers=DEFAULT_PER_HOST_LIMIT, events=None):
+    """
+    Fetches up to max_pages pages of a paginated listing starting at base_url,
+    each downloaded and parsed exactly once, and never the same URL twice.
+    When the page URLs can be worked out from the first page (numbered links,
+    ?page=N patterns) they are fetched concurrently; otherwise "Next" links
+    are followed one at a time.
+    """
+    events = events or default_events()
+    session = get_session()
+    events.progress(STAGE_PAGES, 0, text="Scraping pages...", url=base_url)
+    first_page = _fetch_page_or_report(base_url, session, parse_only, events)
+    if first_page is None:
+        return []
+    pages = [first_page]
+    seen = {page_key(base_url)}
+
+    try:
+        page_urls, complete = discover_page_urls(first_page.soup, base_url, max_pages)
+    except Exception as e:
+        events.error(f"Error parsing HTML from {base_url}: {e}")
+        return pages
+
+    if page_urls:
+        page_urls = [url for url in page_urls if page_key(url) not in seen and not seen.add(page_key(url))]
+        logging.info(f"Fetching {len(page_urls)} known pages of {base_url} concurrently")
+        # Same initializer as the main engine, so errors on these worker threads reach the Streamlit page.
+        engine = CrawlEngine(max_workers=max_workers, per_host_limit=max_workers, initializer=events.thread_initializer(),
+                             rate_controller=get_rate_controller())
+        for url, page, error in engine.map(lambda url: _fetch_page_or_report(url, session, parse_only, events), page_urls):
+            if page is not None:
+                pages.append(page)
+        events.progress(STAGE_PAGES, len(pages) / max_pages, text=f"Scraped {len(pages)} pages from {base_url}", url=base_url)
+        if complete:
+            return pages
+
+    # The full page set is unknown: follow "Next" links sequentially from the last page.
+    current = pages[-1]
+    while len(pages) < max_pages:
         try:
-            response = session.get(next_url, timeout=10)
-            response.raise_for_status()
-        except requests.exceptions.Timeout as e:
-            st.error(f"Timeout error accessing {next_url}: {e}")
-            logging.error(f"Timeout error accessing {next_url}: {e}")
+            next_url = find_next_url(current.soup, current.url)
+        except Exception as e:
+            events.error(f"Error parsing HTML from {current.url}: {e}")
             break
-        except requests.exceptions.RequestException as e:
-            st.error(f"Error accessing {next_url}: {e}")
-            logging.error(f"Error accessing {next_url}: {e}")
+        if not next_url or page_key(next_url) in seen:
             break
-        except Exception as e:
-            st.error(f"Error parsing HTML from {next_url}: {e}")
-            logging.error(f"Error parsing HTML from {next_url}: {e}")
+        seen.add(page_key(next_url))
+        events.progress(STAGE_PAGES, len(pages) / max_pages, text=f"Scraping page : {next_url}", url=base_url)
+        current = _fetch_page_or_report(next_url, session, parse_only, events)
+        if current is None:
             break
+        pages.append(current)
+    return pages
 
-        soup = BeautifulSoup(response.content, 'html.parser')
+def extract_paginated_data(base_url, max_pages=5, table_id="", table_class="", table_keyword="", events=None, min_rows=MIN_TABLE_ROWS, min_cols=MIN_TABLE_COLS):
+    from scraper.scraper import extract_tables
+    events = events or default_events()
+    all_tables_data = []
+    for page in fetch_paginated_pages(base_url, max_pages, parse_only=extraction_tags(table_keyword), events=events):
         try:
-            from scraper.scraper import extract_table_data
-            tables = soup.find_all("table")
-            for table_tag in tables:
-                df = extract_table_data(table_tag, table_id, table_class, table_keyword)
-                if df is not None and not df.empty:
-                    all_tables_data.append(df)
-            
-            next_link = soup.find("a", string="Next")
-            
-            if next_link and next_link.get("href"):
-                next_url = urljoin(next_url, next_link["href"])
-                page_count += 1
-            elif not next_link:
-                # Look for page numbers
-                possible_pages = [a for a in soup.find_all("a", href=True) if a.text.isdigit()]
-                if possible_pages:
-                    # Get the highest page number
-                    highest_page = max(int(a.text) for a in possible_pages)
-                    current_page = page_count + 1
-                    # If current page is lower than the highest page then the next url is found
-                    if current_page < highest_page:
-                        next_url = urljoin(base_url, possible_pages[-1]["href"]) # Get the highest url page number
-                        page_count+=1
-                    else:
-                         next_url=None
-                else:
-                    next_url = None
-            
-            
-            progress_bar.progress(page_count / max_pages, text=f"Scraping page : {next_url}")
-           
-            
+            all_tables_data.extend(extract_tables(page.soup, page.url, table_id, table_class, table_keyword, min_rows, min_cols))
         except Exception as e:
-            st.error(f"Error parsing HTML from {next_url}: {e}")
-            logging.error(f"Error parsing HTML from {next_url}: {e}")
+            events.error(f"Error parsing HTML from {page.url}: {e}")
             break
-        
-        finally:
-            session.close()
     return all_tables_data
 
-def extract_all_data(url_list, query_keywords_all, query_keywords_any, file_name_contains_all, enable_pagination, max_pages, custom_file_name, custom_keywords, custom_file_type, use_dynamic_content, table_id="", table_class="", table_keyword="", table_progress_bar = None, file_progress_bar=None, progress_text=None):
+def _cached_extract(page, result_key, extract):
+    """
+    Runs an extraction over a page, reusing the result stored in the page cache
+    when the page is unchanged since it was cached (so it is not parsed again).
+    """
+    cache = get_page_cache()
+    if cache is None or not page.cacheable:
+        return extract()
+    if page.not_modified:
+        result = cache.load_result(page.url, result_key)
+        if result is not None:
+            logging.info(f"Reusing cached extraction for unchanged page {page.url}")
+            return result
+    result = extract()
+    cache.store_result(page.url, result_key, result)
+    return result
+
+def extract_all_data(url_list, query_keywords_all, query_keywords_any, file_name_contains_all, enable_pagination, max_pages, custom_file_name, custom_keywords, custom_file_type, use_dynamic_content, table_id="", table_class="", table_keyword="", table_progress_bar = None, file_progress_bar=None, progress_text=None, max_workers=DEFAULT_MAX_WORKERS, per_host_limit=DEFAULT_PER_HOST_LIMIT, events=None, crawl_state=None, state_profile="", new_since_last_run=False, table_sink=None, use_sitemaps=False, table_min_rows=MIN_TABLE_ROWS, table_min_cols=MIN_TABLE_COLS):
+    """
+    Scrapes tables and file links from every URL in url_list.
+    Progress and errors are reported through `events` (a CrawlEvents). For
+    backwards compatibility, Streamlit progress widgets passed directly are
+    wrapped in a StreamlitSubscriber.
+    When a CrawlState is given, everything found is recorded under
+    state_profile; with new_since_last_run only links and tables that are new
+    (or changed) since earlier runs are returned. Links seen before count as
+    changed when their ETag/Last-Modified or size differ (see link_fingerprint);
+    they are only checked again when the page listing them changed.
+    Duplicate URLs (by canonical form) are fetched once, and identical tables
+    and file links are kept once: combined_table.attrs["provenance"] and each
+    file's "Source URLs" list every page they were found on.
+    With a table_sink (a TableStore), tables are streamed to disk as they are
+    scraped instead of being concatenated, and the sink is returned in place
+    of combined_table.
+    With use_sitemaps, file links are also discovered through each site's
+    sitemaps and feeds (see SitemapDiscovery).
+    Tables are identified by table_id, table_class, table_keyword and the
+    table_min_rows/table_min_cols thresholds (see TableFilter).
+    Returns (combined_table, files).
+    """
+    if events is None:
+        events = CrawlEvents()
+        if table_progress_bar or file_progress_bar or progress_text:
+            events.subscribe(StreamlitSubscriber(table_progress_bar, file_progress_bar, progress_text))
     if not url_list:
-        st.error("Please select a valid url before extraction.")
+        events.error("Please select a valid url before extraction.")
         return None, None
 
-    all_table_data = []
-    all_file_links = []
-    
-    total_urls = len(url_list)
+    all_tables = TableDeduplicator(sink=table_sink)
+    all_file_links = LinkDeduplicator()
+
+    distinct_urls = unique_urls(url_list)
+    if len(distinct_urls) < len(url_list):
+        logging.info(f"Skipping {len(url_list) - len(distinct_urls)} duplicate URLs")
+    total_urls = len(distinct_urls)
     table_progress_increment = 1.0 / total_urls if total_urls > 0 else 0
     file_progress_increment = 1.0 / total_urls if total_urls > 0 else 0
     current_table_progress = 0.0
     current_file_progress = 0.0
 
-    for index, url in enumerate(url_list):
-        progress_text.text(f"Processing {url}")
+    link_matcher = LinkMatcher(FILE_EXTENSIONS, file_name_contains_all, query_keywords_all, query_keywords_any, custom_file_name, custom_keywords, custom_file_type)
+
+    def scrape_url(url):
+        """
+        Fetches and parses a URL once, then extracts both tables and file links
+        from the shared parse tree (runs on a crawl worker thread).
+        """
         logging.info(f"Processing {url}")
         if is_file_link(url):
-            all_file_links.append(url)
+            return None, [url], True
+        with timed(STAGE_URL, url):
+            return scrape_page_url(url)
+
+    def scrape_page_url(url):
+        from scraper.scraper import fetch_static_page, fetch_dynamic_page, extract_tables
+        parse_only = extraction_tags(table_keyword)
+        if use_dynamic_content:
+            pages = [fetch_dynamic_page(url, parse_only=parse_only)]
+        elif enable_pagination:
+            pages = fetch_paginated_pages(url, max_pages, parse_only=parse_only, events=events)
         else:
-            from scraper.scraper import extract_static_data, extract_dynamic_data
-            try:
-                if use_dynamic_content:
-                    table_data = extract_dynamic_data(url, table_id=table_id, table_class=table_class, table_keyword=table_keyword)
-                    if table_data:
-                        logging.info(f"Tables found in url: {url}")
-                        logging.info(f"Adding tables to all_table_data")
-                        all_table_data.extend(table_data)
-                else:
-                    if enable_pagination:
-                        table_data = extract_paginated_data(url, max_pages, table_id=table_id, table_class=table_class, table_keyword=table_keyword)
-                        if table_data:
-                            logging.info(f"Tables found in url: {url}")
-                            logging.info(f"Adding tables to all_table_data")
-                            all_table_data.extend(table_data)
-                    else:
-                        table_data = extract_static_data(url, table_id=table_id, table_class=table_class, table_keyword=table_keyword)
-                        if table_data:
-                            logging.info(f"Tables found in url: {url}")
-                            logging.info(f"Adding tables to all_table_data")
-                            all_table_data.extend(table_data)
-
-                # Update table progress bar
-                current_table_progress += table_progress_increment
-                if table_progress_bar:
-                    table_progress_bar.progress(current_table_progress, text=f"Processing url {url} for tables")
-
-                file_links = extract_file_links(url, [".pdf", ".csv", ".xls", ".xlsx", ".json"], file_name_contains_all, query_keywords_all, query_keywords_any, custom_file_name, custom_keywords, custom_file_type)
-                logging.info(f"Found {len(file_links)} files in url: {url}")
-                all_file_links.extend(file_links)
-                
-                # Update file progress bar
-                current_file_progress += file_progress_increment
-                if file_progress_bar:
-                    file_progress_bar.progress(current_file_progress, text=f"Processing url {url} for files")
-            except Exception as e:
-                st.error(f"An error occurred when scraping url {url}: {e}")
-                logging.error(f"An error occurred when scraping url {url}: {e}")
+            pages = [fetch_static_page(url, parse_only=parse_only)]
+        pages = [page for page in pages if page is not None]
+        if not pages:
+            events.error(f"Error accessing {url}")
+            return [], [], True
+
+        table_key = f"tables:{table_id}|{table_class}|{table_keyword}|{table_min_rows}|{table_min_cols}"
+        table_data = []
+        for page in pages:
+            tables = _cached_extract(page, table_key, lambda page=page: extract_tables(page.soup, page.url, table_id, table_class, table_keyword, table_min_rows, table_min_cols))
+            table_data.extend((page.url, df) for df in tables)
+        # File links come from the landing page only, as with extract_file_links.
+        link_key = f"file_links:{FILE_EXTENSIONS}|{file_name_contains_all}|{query_keywords_all}|{query_keywords_any}|{custom_file_name}|{custom_keywords}|{custom_file_type}"
+        file_links = _cached_extract(pages[0], link_key, lambda: filter_file_links(pages[0].soup, url, FILE_EXTENSIONS, file_name_contains_all, query_keywords_all, query_keywords_any, custom_file_name, custom_keywords, custom_file_type, matcher=link_matcher))
+        return table_data, file_links, not pages[0].not_modified
+
+    run_id = crawl_state.start_run(state_profile) if crawl_state is not None else None
+
+    def record(url, table_data, file_links, page_changed=True):
+        """
+        Records a URL's results in the crawl state and returns the delta when only new results are wanted.
+        page_changed is False when the page listing the links is unchanged since the last run.
+        """
+        if crawl_state is None:
+            return table_data, file_links
+        new_tables = crawl_state.record_tables(state_profile, url, [df for _, df in table_data]) if table_data else []
+        content_hashes = None
+        if new_since_last_run:
+            # Only the delta is fingerprinted: new links (as the baseline for later runs), and known
+            # links of a changed page. Links on an unchanged page keep their stored fingerprints.
+            known = crawl_state.known_links(state_profile, file_links)
+            to_check = [link for link in file_links if link not in known or page_changed]
+            content_hashes = {link: fingerprint for link, fingerprint, _ in link_engine.map(link_fingerprint, to_check)
+                              if fingerprint is not None}
+        new_links = crawl_state.record_links(state_profile, file_links, source_url=url, content_hashes=content_hashes)
+        if new_since_last_run:
+            new_ids = {id(df) for df in new_tables}
+            kept = None if table_data is None else [(source, df) for source, df in table_data if id(df) in new_ids]
+            return kept, new_links
+        return table_data, file_links
+
+    engine = CrawlEngine(max_workers=max_workers, per_host_limit=per_host_limit, initializer=events.thread_initializer(),
+                         rate_controller=get_rate_controller())
+    # HEADs known file links in new_since_last_run mode, while `engine` is still busy with pages.
+    link_engine = CrawlEngine(max_workers=max_workers, per_host_limit=per_host_limit, initializer=events.thread_initializer(),
+                              rate_controller=get_rate_controller())
+    # Results come back in url_list order, so the progress bars advance exactly as before.
+    for url, result, error in engine.map(scrape_url, distinct_urls):
+        events.status(f"Processing {url}")
+        if error is not None:
+            events.error(f"An error occurred when scraping url {url}: {error}")
+            continue
+        table_data, file_links, page_changed = result
+        if table_data is None:
+            # Direct file link: no page to scrape.
+            for link in record(url, None, file_links)[1]:
+                all_file_links.add(link, url)
+            continue
+        table_data, file_links = record(url, table_data, file_links, page_changed)
+        if table_data:
+            logging.info(f"Tables found in url: {url}")
+            for source, df in table_data:
+                all_tables.add(df, source)
+
+        # Update table progress bar
+        current_table_progress += table_progress_increment
+        events.progress(STAGE_TABLES, current_table_progress, text=f"Processing url {url} for tables", url=url)
+
+        logging.info(f"Found {len(file_links)} files in url: {url}")
+        for link in file_links:
+            all_file_links.add(link, url)
+
+        # Update file progress bar
+        current_file_progress += file_progress_increment
+        events.progress(STAGE_FILES, current_file_progress, text=f"Processing url {url} for files", url=url)
+    if use_sitemaps:
+        sites = unique_urls(site_root(url) for url in distinct_urls if not is_file_link(url))
+        discovery = SitemapDiscovery(link_matcher, crawl_state, state_profile)
+
+        def page_file_links(page_url):
+            page = fetch_page(page_url, parse_only=("a",))
+            return filter_file_links(page.soup, page_url, FILE_EXTENSIONS, file_name_contains_all, query_keywords_all, query_keywords_any, custom_file_name, custom_keywords, custom_file_type, matcher=link_matcher)
+
+        for site, found, error in engine.map(discovery.discover, sites):
+            events.status(f"Reading sitemaps of {site}")
+            if error is not None:
+                events.error(f"An error occurred when reading the sitemaps of {site}: {error}")
                 continue
-    combined_table = pd.concat(all_table_data, ignore_index=True) if all_table_data else None
-    # Process file links applying keyword filtering.
+            lastmods = dict(found.lastmods)
+            sources = list(found.links)
+            for page_url, links, page_error in engine.map(page_file_links, found.pages):
+                if page_error is not None:
+                    # Not remembered, so the page is fetched again next run.
+                    lastmods.pop(page_url, None)
+                    continue
+                sources.append((page_url, links))
+            found_links = 0
+            for source, links in sources:
+                for link in record(source, None, links)[1]:
+                    all_file_links.add(link, source)
+                    found_links += 1
+            logging.info(f"Found {found_links} files through the sitemaps of {site}")
+            discovery.save(lastmods)
+
+    if crawl_state is not None:
+        crawl_state.finish_run(run_id)
+    cache = get_page_cache()
+    if cache is not None:
+        logging.info(f"Page cache stats: {cache.stats()}")
+    controller = get_rate_controller()
+    if controller is not None:
+        logging.info(f"Host rate control: {controller.stats()}")
+    logging.info(f"Kept {len(all_tables)} distinct tables and {len(all_file_links)} distinct file links")
+    combined_table = all_tables.combined()
+    return combined_table, build_file_entries(all_file_links.links())
+
+
+def build_file_entries(links):
+    """Turns (link, source URLs) pairs into the numbered file entries shown and saved by the app."""
     files = []
     idx = 1
-    for link in all_file_links:
+    for link, sources in links:
         file_name = link.split("/")[-1].split("?")[0]
         file_ext = file_name.split(".")[-1] if "." in file_name else ""
         files.append({
             "No": idx,
             "File Extension": file_ext.upper(),
             "File Name": file_name,
-            "URL": link
+            "URL": link,
+            "Source URLs": sources
         })
         idx += 1
-    return combined_table, files
+    return files
 
 
 
-def save_config(config_data):
+def filter_files_by_date(files, selected_years, selected_months):
+    """Keeps the file entries whose names mention one of the selected years and months."""
+    if not files:
+        return []
+    if not selected_years and not selected_months:
+        return list(files)
+    matcher = LinkMatcher(selected_years=selected_years, selected_months=selected_months)
+    return [f for f in files if matcher.matches(f["File Name"])]
+
+
+def save_config(config_data, events=None):
+    events = events or default_events()
     filename = f"extraction_config_{config_data['selected_country']}.json" if config_data['selected_country'] else "extraction_config.json"
     """Saves extraction configuration to a JSON file."""
     filepath = os.path.join(os.getcwd(), "extraction_configs", filename)
@@ -246,18 +417,19 @@ def save_config(config_data):
     try:
         with open(filepath, 'w') as f:
             json.dump(config_data, f, indent=4)
-            st.success(f"Configuration saved to '{filename}' successfully!")
+            events.success(f"Configuration saved to '{filename}' successfully!")
     except Exception as e:
-        st.error(f"Error saving configuration: {e}")
+        events.error(f"Error saving configuration: {e}")
 
 
-def load_config(filename):
+def load_config(filename, events=None):
     """Loads extraction configuration from a JSON file."""
+    events = events or default_events()
     filepath = os.path.join(os.getcwd(), "extraction_configs", filename)
     try:
         with open(filepath, 'r') as f:
             config_data = json.load(f)
         return config_data
     except Exception as e:
-        st.error(f"Error loading configuration: {e}")
+        events.error(f"Error loading configuration: {e}")
         return None
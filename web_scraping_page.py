@@ -5,7 +5,14 @@ import requests
 from urllib.parse import urljoin
 from bs4 import BeautifulSoup
 from scraper.scraper import extract_static_data, extract_dynamic_data
-from scraper.utils import is_file_link, create_session_with_retry, download_file, extract_file_links, extract_paginated_data, extract_all_data
+from scraper.cache import get_page_cache
+from scraper.downloads import write_zip
+from scraper.metrics import configure_metrics, get_metrics
+from scraper.events import CrawlEvents, StreamlitSubscriber
+from scraper.filters import MIN_TABLE_COLS, MIN_TABLE_ROWS
+from scraper.state import CrawlState
+from scraper.table_store import TableStore, new_table_store
+from scraper.utils import is_file_link, create_session_with_retry, download_file, extract_file_links, extract_paginated_data, extract_all_data, filter_files_by_date
 import io
 import zipfile
 from config import CATEGORIES_LIST, COUNTRY_URLS
@@ -15,10 +22,15 @@ from requests.adapters import HTTPAdapter
 from requests.packages.urllib3.util.retry import Retry
 import re
 import os
+import json
+import uuid
 
 # Configure logging
 logging.basicConfig(level=logging.ERROR)
 
+TABLE_PREVIEW_ROWS = 200
+
+
 def web_scraping_page():
     # Function to initialize or re-initialize session state
     def initialize_session_state(loaded_config=None):
@@ -47,8 +59,14 @@ def web_scraping_page():
                 st.session_state["table_class"] = ""
             if "table_keyword" not in st.session_state:
                 st.session_state["table_keyword"] = ""
+            if "table_min_rows" not in st.session_state:
+                st.session_state["table_min_rows"] = MIN_TABLE_ROWS
+            if "table_min_cols" not in st.session_state:
+                st.session_state["table_min_cols"] = MIN_TABLE_COLS
             if "use_dynamic_content" not in st.session_state:
                 st.session_state["use_dynamic_content"] = False
+            if "use_sitemaps" not in st.session_state:
+                st.session_state["use_sitemaps"] = False
             if "selected_country" not in st.session_state:
                 st.session_state["selected_country"] = ""
             if "url_list" not in st.session_state:
@@ -58,7 +76,7 @@ def web_scraping_page():
     def load_config_from_selected_file():
         if "config_file_select" in st.session_state:
             from scraper.utils import load_config
-            loaded_config = load_config(st.session_state["config_file_select"])
+            loaded_config = load_config(st.session_state["config_file_select"], events=CrawlEvents(StreamlitSubscriber()))
             if loaded_config is not None:
                 st.session_state.clear()
                 initialize_session_state(loaded_config)
@@ -102,6 +120,8 @@ def web_scraping_page():
         st.session_state["table_id"] = ""
         st.session_state["table_class"] = ""
         st.session_state["table_keyword"] = ""
+        st.session_state["table_min_rows"] = MIN_TABLE_ROWS
+        st.session_state["table_min_cols"] = MIN_TABLE_COLS
         st.session_state["use_dynamic_content"] = False
         st.session_state["selected_country"] = ""
         st.session_state["url_list"] = []
@@ -113,6 +133,30 @@ def web_scraping_page():
         st.header("⚙️ Controls")
         if st.button("🔄 Clear All Inputs", type="primary", key="clear_all_button"):
             clear_all_inputs()
+        page_cache = get_page_cache()
+        if page_cache is not None:
+            with st.expander("🗄️ Page Cache"):
+                st.json(page_cache.stats())
+        with st.expander("⏱️ Pipeline Metrics"):
+            metrics_enabled = st.checkbox("Record stage timings", value=get_metrics() is not None, key="metrics_enabled",
+                                          help="Times robots waits, downloads, parsing, table building and link filtering per URL.")
+            metrics = configure_metrics(metrics_enabled)
+            if metrics is not None:
+                metrics_data = metrics.to_json()
+                if metrics_data["stages"]:
+                    stages = pd.DataFrame(metrics_data["stages"]).T.drop(columns="buckets")
+                    st.dataframe(stages.sort_values("sum", ascending=False))
+                    st.json(metrics_data["counters"])
+                    slowest = sorted(metrics_data["urls"].items(), key=lambda item: -item[1].get("url_total", 0))[:10]
+                    if slowest:
+                        st.markdown("**Slowest URLs (seconds)**")
+                        st.dataframe(pd.DataFrame({url: stages for url, stages in slowest}).T.fillna(0))
+                    st.download_button("⬇️ Metrics (JSON)", json.dumps(metrics_data, indent=2), file_name="scraper_metrics.json", mime="application/json")
+                    st.download_button("⬇️ Metrics (Prometheus)", metrics.to_prometheus(), file_name="scraper_metrics.prom", mime="text/plain")
+                    if st.button("Reset metrics", key="reset_metrics"):
+                        metrics.reset()
+                else:
+                    st.caption("No timings recorded yet; start a scrape.")
            
 
     st.subheader("1.🌍 Data Source Configuration")
@@ -173,7 +217,13 @@ def web_scraping_page():
     with col2:
         table_class = st.text_input("🔤 Table class (optional):", value=st.session_state["table_class"],key="table_class")
     with col3:
-        table_keyword = st.text_input("🔑 Keyword near the table (optional):", value=st.session_state["table_keyword"], key="table_keyword")
+        table_keyword = st.text_input("🔑 Keyword near the table (optional):", value=st.session_state["table_keyword"], key="table_keyword",
+                                      help="Looked for in the table's caption and header row, the paragraph just before it and the nearest preceding heading.")
+    col1, col2 = st.columns(2)
+    with col1:
+        table_min_rows = st.number_input("↕️ Minimum rows (header included):", min_value=1, value=st.session_state["table_min_rows"], step=1, key="table_min_rows")
+    with col2:
+        table_min_cols = st.number_input("↔️ Minimum columns:", min_value=1, value=st.session_state["table_min_cols"], step=1, key="table_min_cols")
     
     st.markdown("---")
     st.subheader("3.🗂️ File Filtering Options")
@@ -190,6 +240,13 @@ def web_scraping_page():
         help="Filter files by these keywords (at least one must match). "
              "Separate multiple keywords with commas (e.g., GDP, population, census).",
     )
+    use_sitemaps = st.checkbox(
+        "🗺️ Also find files through the site's sitemaps and feeds",
+        value=st.session_state["use_sitemaps"],
+        key="use_sitemaps",
+        help="Reads sitemap.xml / RSS feeds to find files anywhere on the site, not only those linked from the pages above. "
+             "Sitemaps and pages unchanged since the last run are not fetched again.",
+    )
 
     st.markdown("---")
     st.subheader("4. 🔤 General Keywords (Optional)")
@@ -225,6 +282,14 @@ def web_scraping_page():
     enable_pagination = st.checkbox("📃 Enable Pagination", value=False)
     max_pages = st.number_input("🔢 Maximum Pages to Scrape", min_value=1, value=5)
 
+    st.markdown("---")
+    st.subheader("7. 🆕 Incremental Crawl")
+    new_since_last_run = st.checkbox(
+        "🆕 Only show files and tables new since the last run",
+        value=False,
+        help="Every run is recorded per country/configuration. When checked, only links and tables not seen in earlier runs are returned.",
+    )
+
     if st.button("🚀 Start Scraping Data"):
         total_tables_scraped = 0
         total_file_links_found = 0
@@ -251,9 +316,15 @@ def web_scraping_page():
                 table_id,
                 table_class,
                 table_keyword,
-                table_progress_bar,
-                file_progress_bar,
-                progress_text
+                events=CrawlEvents(StreamlitSubscriber(table_progress_bar, file_progress_bar, progress_text)),
+                crawl_state=CrawlState(),
+                state_profile=st.session_state.get("selected_country") or "custom",
+                new_since_last_run=new_since_last_run,
+                # Runs are kept per browser session, so pruning never removes another session's tables.
+                table_sink=new_table_store(session=st.session_state.setdefault("tables_session", uuid.uuid4().hex)),
+                use_sitemaps=use_sitemaps,
+                table_min_rows=table_min_rows,
+                table_min_cols=table_min_cols,
             )
         except Exception as e:
             st.error(f"⚠️ An error occurred during data extraction: {e}")
@@ -262,7 +333,7 @@ def web_scraping_page():
 
         if combined_tables_all is not None:
             st.session_state["all_tables_data"] = combined_tables_all
-            total_tables_scraped = len(combined_tables_all) if isinstance(combined_tables_all, list) else (combined_tables_all.shape[0] if isinstance(combined_tables_all, pd.DataFrame) else 0)
+            total_tables_scraped = len(combined_tables_all) if isinstance(combined_tables_all, (list, TableStore)) else (combined_tables_all.shape[0] if isinstance(combined_tables_all, pd.DataFrame) else 0)
         else:
             st.session_state["all_tables_data"] = []
             total_tables_scraped = 0
@@ -273,10 +344,7 @@ def web_scraping_page():
             st.session_state["extracted_files"] = []
         
         final_files = files.copy() if files else []
-        if selected_years:
-            final_files = [f for f in final_files if any(year in f["File Name"] for year in selected_years)]
-        if selected_months:
-            final_files = [f for f in final_files if any(month.lower() in f["File Name"].lower() for month in selected_months)]
+        final_files = filter_files_by_date(final_files, selected_years, selected_months)
         
         total_file_links_found = len(final_files)
         
@@ -294,10 +362,22 @@ def web_scraping_page():
     with tabs[0]:
         st.subheader("📊 Extracted Table Data")
         all_tables_data = st.session_state.get("all_tables_data", [])
-        if all_tables_data:
-            for i, df in enumerate(all_tables_data):
-                st.markdown(f"**Table {i + 1}**")
-                st.dataframe(df)
+        if isinstance(all_tables_data, TableStore) and len(all_tables_data):
+            # Tables live on disk; only the selected one is read back.
+            entries = all_tables_data.entries()
+            st.caption(f"{len(entries)} tables, {all_tables_data.total_rows} rows, stored in {all_tables_data.root}")
+            table_index = st.selectbox(
+                "📄 Table",
+                range(len(entries)),
+                format_func=lambda i: f"Table {i + 1} ({entries[i]['rows']} rows) - {entries[i]['source_url']}",
+                key="table_preview_index",
+            )
+            show_all_rows = st.checkbox("Show all rows", value=False, key="table_preview_all_rows")
+            st.dataframe(all_tables_data.read(table_index, max_rows=None if show_all_rows else TABLE_PREVIEW_ROWS))
+            if len(entries[table_index]["sources"]) > 1:
+                st.caption("Also found on: " + ", ".join(entries[table_index]["sources"][1:]))
+        elif isinstance(all_tables_data, pd.DataFrame) and not all_tables_data.empty:
+            st.dataframe(all_tables_data)
         else:
             st.info("🔍 No table data found across the pages.")
     
@@ -306,10 +386,7 @@ def web_scraping_page():
         files = st.session_state.get("extracted_files", [])
         # Apply additional filters: Year and Month.
         final_files = files.copy() if files else []
-        if selected_years:
-            final_files = [f for f in final_files if any(year in f["File Name"] for year in selected_years)]
-        if selected_months:
-            final_files = [f for f in final_files if any(month.lower() in f["File Name"].lower() for month in selected_months)]
+        final_files = filter_files_by_date(final_files, selected_years, selected_months)
         
         if final_files:
             final_df = pd.DataFrame(final_files)
@@ -317,6 +394,8 @@ def web_scraping_page():
                 lambda row: f'<a href="{row["URL"]}" target="_blank">{row["File Name"]}</a>',
                 axis=1
             )
+            if "Source URLs" in final_df:
+                final_df["Source URLs"] = final_df["Source URLs"].apply(lambda urls: "<br>".join(urls) if isinstance(urls, list) else urls)
             st.markdown(final_df.to_html(escape=False, index=False), unsafe_allow_html=True)
         else:
             st.warning("⚠️ No files match the selected filters.")
@@ -337,26 +416,27 @@ def web_scraping_page():
                     if not selected_files:
                         st.warning("⚠️ No files selected.")
                     else:
-                        zip_buffer = io.BytesIO()
-                        with zipfile.ZipFile(zip_buffer, "w", zipfile.ZIP_DEFLATED) as zf:
-                            for file in selected_files:
-                                try:
-                                    content = download_file(file["URL"])
-                                    if content is not None:
-                                        zf.writestr(f"{folder_name}/{file['File Name']}", content)
-                                except Exception as e:
-                                    st.error(f"⚠️ Error downloading {file['File Name']}: {e}")
-                        zip_buffer.seek(0)
-                        st.session_state["zip_data"] = zip_buffer.getvalue()
+                        # Replace this session's previously generated archive.
+                        previous_zip = st.session_state.pop("zip_path", None)
+                        if previous_zip and os.path.exists(previous_zip):
+                            os.remove(previous_zip)
+                        with st.spinner("📦 Downloading files..."):
+                            zip_path, download_errors = write_zip(selected_files, folder_name)
+                        for file, e in download_errors:
+                            st.error(f"⚠️ Error downloading {file['File Name']}: {e}")
+                        st.session_state["zip_path"] = zip_path
                         st.success("✅ ZIP file generated!")
             
-            if st.session_state.get("zip_data") is not None:
-                st.download_button(
-                    label="📦 Download Selected Files as ZIP",
-                    data=st.session_state["zip_data"],
-                    file_name=f"{folder_name}.zip",
-                    mime="application/zip"
-                )
+            zip_path = st.session_state.get("zip_path")
+            if zip_path and os.path.exists(zip_path):
+                # Handed over as a file object, which is closed once the button is rendered.
+                with open(zip_path, "rb") as zip_file:
+                    st.download_button(
+                        label="📦 Download Selected Files as ZIP",
+                        data=zip_file,
+                        file_name=f"{folder_name}.zip",
+                        mime="application/zip"
+                    )
         else:
             st.warning("⚠️ No files available for download based on the selected filters.")
     
@@ -375,8 +455,11 @@ def web_scraping_page():
                 "table_id": st.session_state["table_id"],
                 "table_class": st.session_state["table_class"],
                 "table_keyword": st.session_state["table_keyword"],
+                "table_min_rows": st.session_state["table_min_rows"],
+                "table_min_cols": st.session_state["table_min_cols"],
                 "use_dynamic_content": st.session_state["use_dynamic_content"],
+                "use_sitemaps": st.session_state["use_sitemaps"],
                 "url_list": st.session_state["url_list"],
             }
             from scraper.utils import save_config
-            save_config(config_data)
+            save_config(config_data, events=CrawlEvents(StreamlitSubscriber()))